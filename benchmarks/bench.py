@@ -0,0 +1,236 @@
+from __future__ import annotations
+from typing import Any, Callable, Dict, List
+from dataclasses import asdict
+from datetime import date
+from pathlib import Path
+import argparse
+import copy
+import json
+import platform
+import sys
+import tempfile
+import time
+import timeit
+
+from src.core.geocode import DummyGeocoder
+from src.core.metrics import METRICS
+from src.core.models import Event, EventRecord, Venue, VenueRecord
+from src.core.normalize import Normalizer
+from src.core import frontier
+from src.utils.http import HttpClient
+from src.utils.parse import clean_text, make_soup, parse_datetime, parse_price_byn
+from src import runner
+from benchmarks.fixture_server import ADAPTERS, FixtureServer, load_fixture
+
+DATETIME_SAMPLES = [
+    "14.06.2024 19:00",
+    "2024-06-14T19:00:00+03:00",
+    "02.07.2024",
+    "21 сентября 2024, 19:30",
+    "Сб, 15.08.2024 11:00",
+    "30.09.2024 19:00",
+]
+PRICE_SAMPLES = [
+    "от 25 до 60 BYN",
+    "30 руб.",
+    "Бесплатно",
+    "15,50 – 45 BYN",
+    "от 20 BYN",
+    "40 / 55 / 80 руб.",
+    "45 BYN 90 BYN",
+]
+
+# Страницы корпуса записаны летом 2024 — даты карточек оцениваются относительно этого дня
+CORPUS_DATE = date(2024, 6, 1)
+
+Result = Dict[str, Any]
+
+
+def _per_call(fn: Callable[[], Any], repeat: int) -> float:
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def _result(value: float, unit: str, better: str) -> Result:
+    return {"value": round(value, 3), "unit": unit, "better": better}
+
+
+def _count_fields(data: Any) -> int:
+    if isinstance(data, dict):
+        return sum(_count_fields(v) for v in data.values())
+    return 0 if data is None else 1
+
+
+def bench_parse(repeat: int) -> Dict[str, Result]:
+    results: Dict[str, Result] = {}
+    geocoder = DummyGeocoder()
+    for source, module in ADAPTERS.items():
+        list_html = load_fixture(source, "list")
+        detail_html = load_fixture(source, "detail")
+        url = module.BASE + "event/bench-1/"
+        ev = module._parse_detail(url, detail_html, geocoder)
+        if ev is None:
+            print(f"warning: {source} detail fixture does not parse", file=sys.stderr)
+            continue
+        fields = _count_fields(asdict(ev))
+        t_list = _per_call(lambda: module._parse_list(make_soup(list_html)), repeat)
+        t_detail = _per_call(lambda: module._parse_detail(url, detail_html, geocoder), repeat)
+        results[f"parse_list/{source}"] = _result(1.0 / t_list, "pages/s", "higher")
+        results[f"parse_detail/{source}"] = _result(1.0 / t_detail, "pages/s", "higher")
+        results[f"parse_detail_field/{source}"] = _result(t_detail * 1e6 / fields, "us/field", "lower")
+    return results
+
+
+def bench_micro(repeat: int) -> Dict[str, Result]:
+    def run_all(fn, samples):
+        return lambda: [fn(s) for s in samples]
+
+    return {
+        "parse_datetime": _result(
+            _per_call(run_all(parse_datetime, DATETIME_SAMPLES), repeat) * 1e6 / len(DATETIME_SAMPLES),
+            "us/call", "lower",
+        ),
+        "parse_price_byn": _result(
+            _per_call(run_all(parse_price_byn, PRICE_SAMPLES), repeat) * 1e6 / len(PRICE_SAMPLES),
+            "us/call", "lower",
+        ),
+        "clean_text": _result(
+            _per_call(run_all(clean_text, [load_fixture("relax", "detail")]), repeat) * 1e6, "us/page", "lower",
+        ),
+    }
+
+
+def bench_records(repeat: int) -> Dict[str, Result]:
+    # Стоимость построения одного события: pydantic напрямую vs лёгкая запись + валидация на выходе
+    module = ADAPTERS["relax"]
+    record = module._parse_detail(module.BASE + "event/bench-1/", load_fixture("relax", "detail"), DummyGeocoder())
+    fields = asdict(record)
+    venue = fields.pop("venue")
+    # типичная страница: галерея из пары десятков картинок
+    fields["images"] = [f"https://img.example.by/gallery/{i}.jpg" for i in range(24)]
+
+    def pydantic_event():
+        return Event(venue=Venue(**venue), **fields)
+
+    def plain_record():
+        return EventRecord(venue=VenueRecord(**venue), **fields)
+
+    built = plain_record()
+    return {
+        "construct/pydantic_event": _result(_per_call(pydantic_event, repeat) * 1e6, "us/event", "lower"),
+        "construct/event_record": _result(_per_call(plain_record, repeat) * 1e6, "us/event", "lower"),
+        "construct/emit_event": _result(_per_call(built.to_event, repeat) * 1e6, "us/event", "lower"),
+    }
+
+
+def bench_normalize(repeat: int, size: int = 10_000) -> Dict[str, Result]:
+    # Пачка сырых событий, как в reparse/backfill: строки дат и цен повторяются
+    geocoder = DummyGeocoder()
+    raws = []
+    for source, module in ADAPTERS.items():
+        raws.append(module.PLAN.extract(module.BASE + "event/bench-1/", load_fixture(source, "detail")))
+    for i, text in enumerate(DATETIME_SAMPLES + PRICE_SAMPLES):
+        raw = copy.deepcopy(raws[i % len(raws)])
+        raw.start, raw.price = [DATETIME_SAMPLES[i % len(DATETIME_SAMPLES)]], PRICE_SAMPLES[i % len(PRICE_SAMPLES)]
+        raws.append(raw)
+    batch = [raws[i % len(raws)] for i in range(size)]
+
+    def one_by_one():
+        return [Normalizer(geocoder).normalize([raw]) for raw in batch]
+
+    def batched():
+        return Normalizer(geocoder).normalize(batch)
+
+    return {
+        "normalize/per_event": _result(_per_call(one_by_one, repeat) * 1e6 / size, "us/event", "lower"),
+        "normalize/batch": _result(_per_call(batched, repeat) * 1e6 / size, "us/event", "lower"),
+    }
+
+
+def bench_e2e(limit: int) -> Dict[str, Result]:
+    METRICS.reset()
+    frontier.set_reference_date(CORPUS_DATE)
+    with FixtureServer() as server, tempfile.TemporaryDirectory() as tmp:
+        # чистая статистика выхода, не зависящая от прошлых боевых прогонов
+        frontier.YIELD_STATS = frontier.YieldStats(Path(tmp) / "frontier_stats.json")
+        client = HttpClient(base_overrides=server.base_overrides())
+        t0 = time.perf_counter()
+        events = runner.harvest(list(runner.SOURCES), client, DummyGeocoder(), limit)
+        unique = runner.emit_events(events)
+        runner.write_jsonl(str(Path(tmp) / "events.jsonl"), unique)
+        elapsed = time.perf_counter() - t0
+    requests_done = sum(
+        value for (name, _), value in METRICS.counters.items() if name == "http_responses"
+    )
+    return {
+        "e2e/events": _result(len(unique), "events", "higher"),
+        "e2e/events_per_sec": _result(len(unique) / elapsed, "events/s", "higher"),
+        "e2e/requests_per_sec": _result(requests_done / elapsed, "req/s", "higher"),
+    }
+
+
+def compare(current: Dict[str, Result], baseline: Dict[str, Result], threshold: float) -> List[str]:
+    regressions: List[str] = []
+    for name, cur in sorted(current.items()):
+        base = baseline.get(name)
+        if not base or not base.get("value"):
+            continue
+        ratio = cur["value"] / base["value"]
+        worse = ratio < 1 - threshold if cur["better"] == "higher" else ratio > 1 + threshold
+        mark = "REGRESSION" if worse else ""
+        print(f"{name:40s} {base['value']:>12.3f} -> {cur['value']:>12.3f} {cur['unit']:10s} {ratio:6.2f}x {mark}")
+        if worse:
+            regressions.append(name)
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline benchmarks over the recorded page corpus")
+    parser.add_argument("--out", type=str, default="outputs/bench.json")
+    parser.add_argument("--only", type=str, default="parse,micro,records,normalize,e2e", help="comma-separated groups")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--limit", type=int, default=20, help="per-source limit for the e2e run")
+    parser.add_argument("--baseline", type=str, default=None, help="JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed relative slowdown")
+    args = parser.parse_args()
+
+    groups = {g.strip() for g in args.only.split(",") if g.strip()}
+    results: Dict[str, Result] = {}
+    if "parse" in groups:
+        results.update(bench_parse(args.repeat))
+    if "micro" in groups:
+        results.update(bench_micro(args.repeat))
+    if "records" in groups:
+        results.update(bench_records(args.repeat))
+    if "normalize" in groups:
+        results.update(bench_normalize(args.repeat))
+    if "e2e" in groups:
+        results.update(bench_e2e(args.limit))
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.time(),
+        },
+        "results": results,
+    }
+    out = Path(args.out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+    else:
+        for name, res in sorted(results.items()):
+            print(f"{name:40s} {res['value']:>12.3f} {res['unit']}")
+    print(f"Wrote {len(results)} results to {out}")
+
+
+if __name__ == "__main__":
+    main()
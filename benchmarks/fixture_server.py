@@ -0,0 +1,319 @@
+from __future__ import annotations
+from typing import Callable, Dict, List, Optional, Tuple
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+import math
+import random
+import re
+import threading
+import time
+import zlib
+
+from src.adapters import relax, bez_kassira, ticketpro, belarus_by, minsk_tourism, virtualbrest, vitebsk_biz
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+
+ADAPTERS = {
+    "relax": relax,
+    "bezkassira": bez_kassira,
+    "ticketpro": ticketpro,
+    "belarus.by": belarus_by,
+    "minsktourism": minsk_tourism,
+    "virtualbrest": virtualbrest,
+    "vitebsk.biz": vitebsk_biz,
+}
+
+# Пути листингов (относительно BASE), которые запрашивают адаптеры; всё остальное — детальные страницы
+LISTING_PATHS: Dict[str, Tuple[str, ...]] = {
+    "relax": ("", "minsk/", "minsk/concert/", "minsk/theatre/", "minsk/exhibition/", "minsk/festival/"),
+    "bezkassira": ("afisha/",),
+    "ticketpro": ("ru/Events/",),
+    "belarus.by": ("calendar/",),
+    "minsktourism": ("afisha/",),
+    "virtualbrest": ("afisha",),
+    "vitebsk.biz": ("afisha/",),
+}
+
+PAGE_PARAMS = ("page", "PAGEN_1", "p")
+# ссылки на детальные страницы в записанных листингах заканчиваются на -<id>/
+_RE_DETAIL_ID = re.compile(r'(href="[^"]*-)(\d+)(/?")')
+_RE_NEXT = re.compile(r'<a[^>]*(?:rel="next"|PAGEN_1=|[?&]page=)[^>]*>.*?</a>', re.S)
+
+
+def load_fixture(source: str, kind: str, page_id: str = "1") -> str:
+    html = (FIXTURES_DIR / source / f"{kind}.html").read_text(encoding="utf-8")
+    return html.replace("{{id}}", page_id)
+
+
+def page_id(source: str, path: str) -> str:
+    return str(zlib.crc32(f"{source}/{path}".encode("utf-8")) % 1000000)
+
+
+def listing_page(html: str, page: int, depth: int) -> str:
+    # Страница N пагинации: те же карточки со сдвинутыми id (другие детальные URL) и rel="next" до depth
+    if page > depth:
+        return "<html><body><p>Ничего не найдено</p></body></html>"
+    html = _RE_NEXT.sub("", html)
+    if page > 1:
+        html = _RE_DETAIL_ID.sub(lambda m: f"{m.group(1)}{int(m.group(2)) + (page - 1) * 100000}{m.group(3)}", html)
+    if page < depth:
+        html = html.replace("</body>", f'<a rel="next" class="next" href="?page={page + 1}">Далее</a></body>')
+    return html
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    # 0.05 | fixed:0.05 | uniform:0.01:0.2 | lognormal:MEDIAN:SIGMA | exp:MEAN (секунды)
+    kind, _, rest = spec.partition(":") if ":" in spec else ("fixed", "", spec)
+    try:
+        args = [float(x) for x in rest.split(":")] if rest else []
+        if kind == "fixed" and len(args) == 1:
+            return lambda rng: args[0]
+        if kind == "uniform" and len(args) == 2:
+            return lambda rng: rng.uniform(args[0], args[1])
+        if kind == "lognormal" and len(args) == 2 and args[0] > 0:
+            mu = math.log(args[0])
+            return lambda rng: rng.lognormvariate(mu, args[1])
+        if kind == "exp" and len(args) == 1 and args[0] > 0:
+            return lambda rng: rng.expovariate(1.0 / args[0])
+    except ValueError:
+        pass
+    raise ValueError(f"Bad latency spec: {spec!r}")
+
+
+def _quantile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(math.ceil(q * len(ordered))) - 1)]
+
+
+@dataclass
+class MockProfile:
+    # Поведение поддельных источников: задержки, отказы, медленная отдача, глубина пагинации
+    latency: Dict[str, str] = field(default_factory=dict)  # источник ("*" — все) -> спецификация задержки
+    p429: float = 0.0
+    p503: float = 0.0
+    retry_after: Optional[float] = None  # заголовок Retry-After у 429/503, секунды
+    drip: float = 0.0  # доля ответов, отдаваемых медленно по кускам
+    drip_chunk: int = 1024
+    drip_delay: float = 0.05  # пауза между кусками, секунды
+    pages: Optional[int] = None  # глубина пагинации листингов (None — одна записанная страница)
+    seed: int = 0
+
+    def sampler(self, source: str) -> Optional[Callable[[random.Random], float]]:
+        spec = self.latency.get(source) or self.latency.get("*")
+        return parse_latency(spec) if spec else None
+
+
+class MockStats:
+    # Серверная сторона нагрузочного теста: коды ответов, внедрённые отказы, время обслуживания,
+    # запросы, пришедшие раньше выданного Retry-After
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.responses: Dict[str, int] = {}
+        self.service_s: List[float] = []
+        self.retry_after_until: Dict[str, float] = {}
+        self.early_retries = 0
+        self.started = time.monotonic()
+
+    def arrival(self, key: str, now: float) -> None:
+        with self._lock:
+            until = self.retry_after_until.pop(key, None)
+            if until is not None and now < until:
+                self.early_retries += 1
+
+    def record(self, source: str, status: int, service: float) -> None:
+        with self._lock:
+            label = f"{source} {status}"
+            self.responses[label] = self.responses.get(label, 0) + 1
+            self.service_s.append(service)
+
+    def throttled(self, key: str, until: float) -> None:
+        with self._lock:
+            self.retry_after_until[key] = until
+
+    def report(self) -> Dict[str, object]:
+        with self._lock:
+            service = list(self.service_s)
+            responses = dict(sorted(self.responses.items()))
+            early = self.early_retries
+        by_status: Dict[str, int] = {}
+        for label, n in responses.items():
+            status = label.rsplit(" ", 1)[1]
+            by_status[status] = by_status.get(status, 0) + n
+        elapsed = time.monotonic() - self.started
+        return {
+            "requests": len(service),
+            "requests_per_s": round(len(service) / elapsed, 2) if elapsed > 0 else None,
+            "by_status": by_status,
+            "by_source": responses,
+            "early_retries": early,
+            "service_p50_s": _quantile(service, 0.5),
+            "service_p95_s": _quantile(service, 0.95),
+            "service_p99_s": _quantile(service, 0.99),
+            "service_max_s": max(service) if service else None,
+        }
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    server: "FixtureServer"
+
+    def do_GET(self) -> None:
+        t0 = time.monotonic()
+        parts = urlsplit(self.path)
+        source, _, rest = parts.path.lstrip("/").partition("/")
+        if source not in ADAPTERS:
+            self._send(404, "not found")
+            return
+        srv = self.server
+        srv.stats.arrival(self.path, t0)
+        delay = srv.latency
+        sampler = srv.samplers.get(source)
+        if sampler is not None:
+            delay = max(0.0, srv.draw(sampler))
+        if delay:
+            time.sleep(delay)
+        status = srv.fault()
+        if status:
+            if srv.profile.retry_after is not None:
+                srv.stats.throttled(self.path, time.monotonic() + srv.profile.retry_after)
+            self._send(status, "busy", retry_after=srv.profile.retry_after)
+        elif rest in LISTING_PATHS[source]:
+            html = load_fixture(source, "list")
+            if srv.profile.pages:
+                query = parse_qs(parts.query)
+                page = next((query[p][0] for p in PAGE_PARAMS if p in query), "1")
+                html = listing_page(html, int(page) if page.isdigit() else 1, srv.profile.pages)
+            self._send(200, html)
+        elif rest.endswith(".xml") or rest in ("favicon.ico", "robots.txt"):
+            status = 404
+            self._send(404, "not found")
+        else:
+            self._send(200, load_fixture(source, "detail", page_id(source, rest)))
+        srv.stats.record(source, status or 200, time.monotonic() - t0)
+
+    def _send(self, status: int, body: str, retry_after: Optional[float] = None) -> None:
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        if retry_after is not None:
+            self.send_header("Retry-After", str(int(math.ceil(retry_after))))
+        self.end_headers()
+        profile = self.server.profile
+        if status == 200 and profile.drip and self.server.chance(profile.drip):
+            # медленная отдача: тело уходит кусками с паузами (заголовки уже получены клиентом)
+            for i in range(0, len(data), profile.drip_chunk):
+                self.wfile.write(data[i:i + profile.drip_chunk])
+                self.wfile.flush()
+                time.sleep(profile.drip_delay)
+            return
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+class FixtureServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0,
+                 handler=FixtureHandler, profile: Optional[MockProfile] = None):
+        super().__init__((host, port), handler)
+        self.latency = latency
+        self.profile = profile or MockProfile()
+        self.samplers = {source: self.profile.sampler(source) for source in ADAPTERS}
+        self.stats = MockStats()
+        self._rng = random.Random(self.profile.seed)
+        self._rng_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def draw(self, sampler: Callable[[random.Random], float]) -> float:
+        with self._rng_lock:
+            return sampler(self._rng)
+
+    def chance(self, p: float) -> bool:
+        with self._rng_lock:
+            return self._rng.random() < p
+
+    def fault(self) -> Optional[int]:
+        with self._rng_lock:
+            roll = self._rng.random()
+        if roll < self.profile.p429:
+            return 429
+        if roll < self.profile.p429 + self.profile.p503:
+            return 503
+        return None
+
+    @property
+    def origin(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def base_overrides(self) -> Dict[str, str]:
+        return {module.BASE: f"{self.origin}/{source}/" for source, module in ADAPTERS.items()}
+
+    def __enter__(self) -> "FixtureServer":
+        self._thread = threading.Thread(target=self.serve_forever, name="fixture-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+def add_profile_arguments(parser) -> None:
+    parser.add_argument(
+        "--latency", action="append", default=[], metavar="[SOURCE=]SPEC",
+        help="response latency: 0.05, uniform:0.01:0.2, lognormal:MEDIAN:SIGMA, exp:MEAN (per source with SOURCE=)",
+    )
+    parser.add_argument("--p429", type=float, default=0.0, help="share of responses replaced by 429")
+    parser.add_argument("--p503", type=float, default=0.0, help="share of responses replaced by 503")
+    parser.add_argument("--retry-after", type=float, default=None, help="Retry-After seconds on 429/503")
+    parser.add_argument("--drip", type=float, default=0.0, help="share of bodies sent slowly in chunks")
+    parser.add_argument("--drip-chunk", type=int, default=1024, help="slow-drip chunk size, bytes")
+    parser.add_argument("--drip-delay", type=float, default=0.05, help="pause between slow-drip chunks, s")
+    parser.add_argument("--pages", type=int, default=None, help="pagination depth of every listing")
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def profile_from_args(args) -> MockProfile:
+    latency: Dict[str, str] = {}
+    for item in args.latency:
+        source, sep, spec = item.partition("=")
+        if not sep:
+            source, spec = "*", item
+        if source != "*" and source not in ADAPTERS:
+            raise SystemExit(f"Unknown source in --latency: {source}")
+        try:
+            parse_latency(spec)
+        except ValueError as exc:
+            raise SystemExit(str(exc))
+        latency[source] = spec
+    return MockProfile(
+        latency=latency,
+        p429=args.p429,
+        p503=args.p503,
+        retry_after=args.retry_after,
+        drip=args.drip,
+        drip_chunk=max(1, args.drip_chunk),
+        drip_delay=args.drip_delay,
+        pages=args.pages,
+        seed=args.seed,
+    )
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve recorded source pages locally")
+    parser.add_argument("--port", type=int, default=8765)
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    srv = FixtureServer(port=args.port, profile=profile_from_args(args))
+    for base, target in srv.base_overrides().items():
+        print(f"--base-override {base}={target}")
+    srv.serve_forever()
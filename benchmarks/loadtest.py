@@ -0,0 +1,126 @@
+from __future__ import annotations
+from typing import Any, Dict, List, Optional
+from pathlib import Path
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.bench import CORPUS_DATE
+from benchmarks.fixture_server import ADAPTERS, FixtureServer, add_profile_arguments, profile_from_args
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+def _counters(report: Dict[str, Any], name: str, by: Optional[str] = None) -> Dict[str, float]:
+    out: Dict[str, float] = {}
+    for row in report.get("counters", []):
+        if row["name"] == name:
+            key = row["labels"].get(by, "") if by else ""
+            out[key] = out.get(key, 0.0) + row["value"]
+    return out
+
+
+def client_latency(report: Dict[str, Any]) -> Dict[str, Optional[float]]:
+    # http_fetch по всем хостам: квантили по бакетам гистограмм (как histogram_quantile)
+    rows = [row for row in report.get("timings", []) if row["name"] == "http_fetch"]
+    if not rows:
+        return {}
+    bounds = list(rows[0]["buckets"].keys())
+    counts = [sum(row["buckets"][b] for row in rows) for b in bounds]
+    total = sum(counts)
+    result: Dict[str, Optional[float]] = {"max": max((row["max"] or 0.0) for row in rows)}
+    for q in (0.5, 0.95, 0.99):
+        acc = 0
+        for bound, c in zip(bounds, counts):
+            acc += c
+            if acc >= q * total:
+                result[f"p{int(q * 100)}"] = result["max"] if bound == "+Inf" else float(bound)
+                break
+    return result
+
+
+def run(args: argparse.Namespace, extra: List[str]) -> Dict[str, Any]:
+    sources = args.sources or ",".join(ADAPTERS)
+    with FixtureServer(profile=profile_from_args(args)) as server, tempfile.TemporaryDirectory() as tmp:
+        cmd = [
+            sys.executable, "-m", "src.runner",
+            "--sources", sources,
+            "--limit", str(args.limit),
+            "--no-geocode",
+            "--as-of", CORPUS_DATE.isoformat(),
+            "--out", str(Path(tmp) / "events.jsonl"),
+            "--metrics-json", str(Path(tmp) / "metrics.json"),
+        ]
+        for base, target in server.base_overrides().items():
+            cmd += ["--base-override", f"{base}={target}"]
+        cmd += extra
+        # прогон в чистом каталоге: data/*.json (статистика фронтира, рендера, эндпоинтов) не смешивается с боевой
+        env = dict(os.environ, PYTHONPATH=str(REPO_ROOT) + os.pathsep + os.environ.get("PYTHONPATH", ""))
+        t0 = time.perf_counter()
+        proc = subprocess.run(cmd, cwd=tmp, env=env, capture_output=True, text=True, timeout=args.timeout)
+        elapsed = time.perf_counter() - t0
+        if proc.returncode != 0:
+            sys.stderr.write(proc.stdout + proc.stderr)
+            raise SystemExit(f"runner exited with {proc.returncode}")
+        report = json.loads((Path(tmp) / "metrics.json").read_text(encoding="utf-8"))
+        server_report = server.stats.report()
+    written = sum(_counters(report, "events_written").values())
+    return {
+        "command": " ".join(cmd[2:]),
+        "elapsed_s": round(elapsed, 3),
+        "events": int(written),
+        "events_per_s": round(written / elapsed, 2),
+        "client": {
+            "responses": _counters(report, "http_responses", "status"),
+            "errors": _counters(report, "http_errors", "error"),
+            "circuit_rejected": sum(_counters(report, "circuit_rejected").values()),
+            "concurrency_backoffs": sum(_counters(report, "concurrency_backoff").values()),
+            "latency_s": client_latency(report),
+        },
+        "server": server_report,
+        "output": proc.stdout.strip().splitlines(),
+    }
+
+
+def print_report(result: Dict[str, Any]) -> None:
+    server, client = result["server"], result["client"]
+    print(f"{result['events']} events in {result['elapsed_s']}s ({result['events_per_s']} events/s), "
+          f"{server['requests']} requests ({server['requests_per_s']} req/s)")
+    print(f"server statuses: {server['by_status']}, early retries (before Retry-After): {server['early_retries']}")
+    print("server service time: " + ", ".join(
+        f"{k[8:-2]} {v:.3f}s" for k, v in server.items() if k.startswith("service_") and v is not None))
+    print(f"client statuses: {client['responses']}, errors: {client['errors'] or '-'}")
+    print(f"client backoffs: {client['concurrency_backoffs']:g}, circuit-rejected: {client['circuit_rejected']:g}")
+    if client["latency_s"]:
+        print("client fetch latency: " + ", ".join(f"{k} {v:.3f}s" for k, v in client["latency_s"].items()))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Load-test runner against the local mock sources; arguments after -- go to src.runner",
+    )
+    parser.add_argument("--sources", type=str, default=None, help="comma-separated sources (default: all)")
+    parser.add_argument("--limit", type=int, default=50, help="per-source limit")
+    parser.add_argument("--timeout", type=float, default=600.0, help="kill the runner after this many seconds")
+    parser.add_argument("--out", type=str, default=None, help="also write the report as JSON")
+    add_profile_arguments(parser)
+    argv = sys.argv[1:]
+    extra: List[str] = []
+    if "--" in argv:
+        i = argv.index("--")
+        argv, extra = argv[:i], argv[i + 1:]
+    args = parser.parse_args(argv)
+    result = run(args, extra)
+    print_report(result)
+    if args.out:
+        Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.out).write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"Wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,34 +1,28 @@
 from __future__ import annotations
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from urllib.parse import urljoin
-from datetime import datetime, timezone
 import re
 
 from bs4 import BeautifulSoup
 
 from src.utils.http import HttpClient
-from src.utils.parse import (
-    clean_text,
-    parse_datetime,
-    parse_price_byn,
-    parse_age,
-    extract_meta,
-)
-from src.core.models import Event, Venue
+from src.utils.parse import make_soup
+from src.core.models import EventRecord
 from src.core.geocode import Geocoder
+from src.core.crawl import SETTINGS, Card, accept_cards, card_event, fetch_details, listing_pages
+from src.core.endpoints import capture, harvest_api
+from src.core.frontier import Frontier
+from src.core.scheduler import BudgetExhausted
+from src.core.plans import (
+    ADDRESS, DESCRIPTION, JSONLD_DESCRIPTION, OG_IMAGE, VENUE, Css, DetailPlan, JsonLd, description, join_text,
+)
 from xml.etree import ElementTree as ET
-from src.utils.render import render_html
 
 
 BASE = "https://bezkassira.by/"
 
 
-def _now_iso() -> str:
-    return datetime.now(timezone.utc).isoformat()
-
-
-def _parse_list(html: str) -> List[str]:
-    soup = BeautifulSoup(html, "lxml")
+def _parse_list(soup) -> List[str]:
     links: List[str] = []
     # Типовые карточки: ссылки внутри плиток афиши
     for a in soup.select("a[href].event-card, .event-card a[href], .afisha-item a[href], a[href]"):
@@ -52,105 +46,78 @@ def _parse_list(html: str) -> List[str]:
     return uniq
 
 
-def _parse_detail(url: str, html: str, geocoder: Geocoder) -> Optional[Event]:
-    soup = BeautifulSoup(html, "lxml")
-
-    # try JSON-LD
-    jsonld = None
-    for s in soup.select('script[type="application/ld+json"]'):
-        try:
-            import json as _json
-            data = _json.loads(s.get_text() or "{}")
-            if isinstance(data, dict) and data.get("@type") in ("Event",):
-                jsonld = data
-                break
-        except Exception:
+def _parse_cards(soup, geocoder: Geocoder) -> List[Card]:
+    cards: List[Card] = []
+    for a in soup.select("a[href].event-card, .event-card a[href]"):
+        link = urljoin(BASE, a.get("href"))
+        lf = link.lower()
+        if ("minsk" not in lf) and ("vitebsk" not in lf):
             continue
+        item = a if "event-card" in (a.get("class") or []) else a.parent
+        title_node = item.select_one(".event-card__title")
+        date_node = item.select_one(".event-card__date")
+        place_node = item.select_one(".event-card__place")
+        price_node = item.select_one(".event-card__price")
+        img = item.select_one("img[src]")
+        cards.append(card_event(
+            link,
+            "bezkassira",
+            geocoder,
+            title=title_node.get_text() if title_node else None,
+            date_text=date_node.get_text() if date_node else None,
+            venue_name=place_node.get_text() if place_node else None,
+            price_text=price_node.get_text() if price_node else None,
+            cover_url=urljoin(BASE, img.get("src")) if img else None,
+            city="Витебск" if "vitebsk" in lf else "Минск",
+        ))
+    return cards
+
+
+def _needs_render(detail: str) -> bool:
+    # статический HTML без JSON-LD и дат — вероятно, карточка рисуется JS
+    return 'application/ld+json' not in detail and 'time' not in detail
+
+
+PLAN = DetailPlan(
+    "bezkassira",
+    title=(JsonLd("name"), Css("h1")),
+    start=(JsonLd("startDate"),),
+    end=(JsonLd("endDate"),),
+    venue=(JsonLd("location.name"), Css(VENUE)),
+    address=(JsonLd("location.address.streetAddress"), Css(ADDRESS)),
+    city=(JsonLd("location.address.addressLocality"),),
+    category=(Css(".category, .breadcrumbs a:last-child, .tags a"),),
+    price=(Css(".price, .prices, .cost", pick=join_text),),
+    age=(Css(".age-limit"),),
+    cover=(Css(OG_IMAGE, attr="content"), JsonLd("image")),
+    description=(JSONLD_DESCRIPTION, Css(DESCRIPTION, pick=description)),
+)
 
-    title = clean_text((jsonld or {}).get("name")) if jsonld else None
-    if not title:
-        title = clean_text(soup.select_one("h1") and soup.select_one("h1").get_text())
-    if not title:
-        return None
-
-    start_dt = parse_datetime((jsonld or {}).get("startDate")) if jsonld else None
-    end_dt = parse_datetime((jsonld or {}).get("endDate")) if jsonld else None
-    if not start_dt:
-        for n in soup.select("time, .date, .event-date"):
-            val = parse_datetime(clean_text(n.get_text()))
-            if val and not start_dt:
-                start_dt = val
-            elif val and not end_dt:
-                end_dt = val
-    if not start_dt:
-        return None
-
-    loc = (jsonld or {}).get("location") if jsonld else None
-    venue_name = None
-    venue_address = None
-    city = None
-    if isinstance(loc, dict):
-        venue_name = clean_text((loc.get("name") or "") if loc else None)
-        addr = loc.get("address") or {}
-        if isinstance(addr, dict):
-            venue_address = clean_text(addr.get("streetAddress"))
-            city = clean_text(addr.get("addressLocality")) or city
-
-    if not venue_name:
-        vnode = soup.select_one(".venue, .place, .location a, .location")
-        if vnode:
-            venue_name = clean_text(vnode.get_text())
-    if not venue_address:
-        anode = soup.select_one(".address, .place-address, .venue-address")
-        if anode:
-            venue_address = clean_text(anode.get_text())
-
-    category = None
-    cnode = soup.select_one(".category, .breadcrumbs a:last-child, .tags a")
-    if cnode:
-        category = clean_text(cnode.get_text())
-
-    price_text = clean_text(" ".join([n.get_text() for n in soup.select(".price, .prices, .cost")] ))
-    price_min, price_max, is_free = parse_price_byn(price_text)
-
-    age = parse_age(clean_text((soup.select_one(".age-limit") or {}).get_text() if soup.select_one(".age-limit") else None))
-
-    cover_url, images = extract_meta(soup)
-    if jsonld and isinstance(jsonld.get("image"), str):
-        cover_url = cover_url or jsonld.get("image")
-    description = clean_text((jsonld or {}).get("description"))
-    if not description:
-        dnode = soup.select_one(".description, .event-description, article, .content")
-        if dnode:
-            description = clean_text(dnode.get_text())
-
-    lat, lon = geocoder.geocode(venue_address or venue_name, city)
-
-    venue = Venue(name=venue_name or "Unknown", address=venue_address, lat=lat, lon=lon)
-
-    return Event(
-        title=title,
-        start_dt=start_dt,
-        end_dt=end_dt,
-        venue=venue,
-        city=city,
-        category=category,
-        price_min_byn=price_min,
-        price_max_byn=price_max,
-        is_free=is_free,
-        age=age,
-        link=url,
-        source="bezkassira",
-        source_uid=None,
-        cover_url=cover_url,
-        description=description,
-        images=images or None,
-        fetched_at=_now_iso(),
-    )
 
+def _parse_detail(url: str, html: str, geocoder: Geocoder) -> Optional[EventRecord]:
+    return PLAN.parse(url, html, geocoder)
 
-def harvest_bezkassira(client: HttpClient, geocoder: Geocoder, limit: int = 50) -> List[Event]:
-    results: List[Event] = []
+
+def _load_listing(client: HttpClient, url: str) -> Tuple[str, BeautifulSoup]:
+    html = client.get(url).text
+    soup = make_soup(html)
+    if len(_parse_list(soup)) == 0:
+        # fallback: отрисовать JS
+        html = client.render(url, wait_selector="a", on_json=capture("bezkassira"))
+        soup = make_soup(html)
+    return html, soup
+
+
+def harvest_bezkassira(client: HttpClient, geocoder: Geocoder, limit: int = 50) -> List[EventRecord]:
+    results: List[EventRecord] = []
+    frontier = Frontier("bezkassira")
+    # JSON-API, подсмотренный при прошлых рендерах листинга: без браузера и разбора HTML
+    harvest_api(
+        client, geocoder, "bezkassira", BASE, _parse_detail, limit, results,
+        needs_render=_needs_render, on_result=frontier.record,
+    )
+    if len(results) >= limit:
+        return results
     # Попытка нескольких лент: главная афиша и тематические разделы
     candidate_lists = [
         urljoin(BASE, "afisha/"),
@@ -166,9 +133,11 @@ def harvest_bezkassira(client: HttpClient, geocoder: Geocoder, limit: int = 50)
     list_url = None
     for url in candidate_lists:
         try:
-            client.get(url)
+            client.probe(url)
             list_url = url
             break
+        except BudgetExhausted:
+            raise
         except Exception:
             continue
     if not list_url:
@@ -183,47 +152,30 @@ def harvest_bezkassira(client: HttpClient, geocoder: Geocoder, limit: int = 50)
                     if "/event/" in u or "/afisha/" in u:
                         urls.append(u)
             for url in urls:
-                if len(results) >= limit:
-                    break
-                try:
-                    detail = client.get(url).text
-                    ev = _parse_detail(url, detail, geocoder)
-                    if ev:
-                        results.append(ev)
-                except Exception:
-                    continue
+                frontier.push(url)
+            fetch_details(
+                client, geocoder, frontier, _parse_detail, "bezkassira", limit, results,
+                on_result=frontier.record,
+            )
+        except BudgetExhausted:
+            raise
         except Exception:
             pass
         return results
-    visited_pages = 0
-    while list_url and visited_pages < 5 and len(results) < limit:
+    pages = listing_pages(client, [list_url], "bezkassira", load=lambda url: _load_listing(client, url))
+    for list_url, html, soup in pages:
         if len(results) >= limit:
             break
-        try:
-            html = client.get(list_url).text
-            if len(_parse_list(html)) == 0:
-                # fallback: отрисовать JS
-                html = render_html(list_url, wait_selector="a")
-        except Exception:
-            break
-        links = _parse_list(html)
-        for url in links:
-            if len(results) >= limit:
-                break
-            try:
-                detail = client.get(url).text
-                if 'application/ld+json' not in detail and 'time' not in detail:
-                    detail = render_html(url, wait_selector="h1")
-                ev = _parse_detail(url, detail, geocoder)
-                if ev:
-                    results.append(ev)
-            except Exception:
-                continue
-        # пагинация: ищем ссылку на следующую страницу
-        soup = BeautifulSoup(html, "lxml")
-        next_a = soup.select_one('a[rel="next"], .pagination a.next, a[aria-label="Next"]')
-        list_url = urljoin(list_url, next_a.get('href')) if next_a and next_a.get('href') else None
-        visited_pages += 1
+        links = _parse_list(soup)
+        if SETTINGS.listing_only:
+            cards = _parse_cards(soup, geocoder)
+            if cards:
+                links = accept_cards(cards, results, limit, "bezkassira")
+        frontier.push_listing(links, soup, BASE, list_url)
+        fetch_details(
+            client, geocoder, frontier, _parse_detail, "bezkassira", limit, results,
+            needs_render=_needs_render, on_result=frontier.record,
+        )
     return results
 
 
@@ -1,32 +1,21 @@
 from __future__ import annotations
-from typing import List, Optional, Tuple
+from typing import List, Optional
 from urllib.parse import urljoin
-from datetime import datetime, timezone
-import re
-
-from bs4 import BeautifulSoup
 
 from src.utils.http import HttpClient
-from src.utils.parse import (
-    clean_text,
-    parse_datetime,
-    parse_price_byn,
-    parse_age,
-    extract_meta,
-)
-from src.core.models import Event, Venue
+from src.core.models import EventRecord
 from src.core.geocode import Geocoder
+from src.core.crawl import SETTINGS, Card, accept_cards, card_event, fetch_details, listing_pages
+from src.core.frontier import Frontier
+from src.core.plans import (
+    ADDRESS, DESCRIPTION, JSONLD_DESCRIPTION, OG_IMAGE, VENUE, Css, DetailPlan, JsonLd, description, join_text,
+)
 
 
 BASE = "https://afisha.relax.by/"
 
 
-def _now_iso() -> str:
-    return datetime.now(timezone.utc).isoformat()
-
-
-def _parse_list(html: str) -> List[str]:
-    soup = BeautifulSoup(html, "lxml")
+def _parse_list(soup) -> List[str]:
     links: List[str] = []
     # Ищем ссылки на детальные карточки событий
     for a in soup.select("a[href*='/event/']"):
@@ -46,171 +35,92 @@ def _parse_list(html: str) -> List[str]:
     return unique
 
 
-def _parse_detail(url: str, html: str, geocoder: Geocoder) -> Optional[Event]:
-    soup = BeautifulSoup(html, "lxml")
-
-    # Попытка разобрать JSON-LD со схемой Event
-    jsonld_title = None
-    jsonld_start = None
-    jsonld_end = None
-    jsonld_address = None
-    jsonld_city = None
-    jsonld_image = None
-    jsonld_desc = None
-    for script in soup.select('script[type="application/ld+json"]'):
-        try:
-            import json as _json
-            data = _json.loads(script.get_text() or "{}")
-            if isinstance(data, dict) and data.get("@type") in ("Event",):
-                jsonld_title = data.get("name") or jsonld_title
-                jsonld_start = data.get("startDate") or jsonld_start
-                jsonld_end = data.get("endDate") or jsonld_end
-                jsonld_image = (data.get("image") or jsonld_image)
-                jsonld_desc = data.get("description") or jsonld_desc
-                loc = data.get("location") or {}
-                addr = (loc.get("address") if isinstance(loc, dict) else None) or {}
-                if isinstance(addr, dict):
-                    jsonld_address = addr.get("streetAddress") or jsonld_address
-                    jsonld_city = addr.get("addressLocality") or jsonld_city
-        except Exception:
+def _parse_cards(soup, geocoder: Geocoder, city: Optional[str]) -> List[Card]:
+    # Карточки расписания: название, дата, площадка и цена видны прямо в листинге
+    cards: List[Card] = []
+    for item in soup.select(".schedule__item"):
+        a = item.select_one("a.schedule__event-link[href]")
+        if not a:
             continue
-
-    title = clean_text(jsonld_title) or clean_text(soup.select_one("h1") and soup.select_one("h1").get_text())
-    if not title:
-        # fallback для некоторых страниц
-        title = clean_text(soup.select_one("meta[property='og:title']") and soup.select_one("meta[property='og:title']").get("content"))
-    if not title:
-        return None
-
-    # Дата/время: пробуем найти элемент со временем
-    start_dt = parse_datetime(jsonld_start) if jsonld_start else None
-    end_dt = parse_datetime(jsonld_end) if jsonld_end else None
-    date_nodes = soup.select("time, .event-date, .date, .schedule")
-    for node in date_nodes:
-        txt = clean_text(node.get_text())
-        val = parse_datetime(txt)
-        if val and not start_dt:
-            start_dt = val
-        elif val and not end_dt:
-            end_dt = val
-    # если ничего не нашли — пробуем og:updated_time как суррогат (не идеально)
-    if not start_dt:
-        meta_time = soup.select_one("meta[property='event:start_time']") or soup.select_one("meta[property='og:updated_time']")
-        if meta_time and meta_time.get("content"):
-            start_dt = parse_datetime(meta_time.get("content"))
-    if not start_dt:
-        # невозможно нормализовать без даты
-        return None
-
-    # Площадка: имя и адрес
-    venue_name = None
-    venue_address = jsonld_address
-    # частые места: .place, .venue, .location
-    v_name_node = soup.select_one(".place, .venue, .location a, .location")
-    if v_name_node:
-        venue_name = clean_text(v_name_node.get_text())
-    # адрес
-    addr_node = soup.select_one(".address, .place-address, .venue-address")
-    if addr_node:
-        venue_address = clean_text(addr_node.get_text())
-    if not venue_name:
-        # fallback из меты
-        meta_site = soup.select_one("meta[property='business:contact_data:street_address']")
-        if meta_site and meta_site.get("content"):
-            venue_name = clean_text(meta_site.get("content"))
-    if not venue_name:
-        venue_name = ""
-
-    # Город из хлебных крошек/заголовков
-    city = jsonld_city
-    crumbs = soup.select(".breadcrumbs a, .crumbs a")
-    for a in crumbs:
+        title_node = item.select_one(".schedule__event-link.link") or a
+        date_node = item.select_one(".schedule__date, .schedule__seance-time")
+        place_node = item.select_one(".schedule__place-link, .schedule__place")
+        price_node = item.select_one(".schedule__price")
+        img = item.select_one("img[src]")
+        cards.append(card_event(
+            urljoin(BASE, a.get("href")),
+            "relax",
+            geocoder,
+            title=title_node.get_text(),
+            date_text=date_node.get_text() if date_node else None,
+            venue_name=place_node.get_text() if place_node else None,
+            price_text=price_node.get_text() if price_node else None,
+            cover_url=img.get("src") if img else None,
+            city=city,
+        ))
+    return cards
+
+
+def _city_crumb(nodes) -> Optional[str]:
+    # Город из хлебных крошек: первое слово с заглавной, кроме разделов
+    for a in nodes:
         t = (a.get_text() or "").strip()
         if t and len(t) > 2 and t[0].isupper():
             if t.lower() in ("афиша", "календарь"):
                 continue
-            city = t
-            break
+            return t
+    return None
+
+
+PLAN = DetailPlan(
+    "relax",
+    title=(JsonLd("name"), Css("h1"), Css("meta[property='og:title']", attr="content")),
+    start=(JsonLd("startDate"),),
+    end=(JsonLd("endDate"),),
+    date_nodes="time, .event-date, .date, .schedule",
+    date_nodes_always=True,
+    # если ничего не нашли — og:updated_time как суррогат (не идеально)
+    start_fallback=(
+        Css("meta[property='event:start_time']", attr="content"),
+        Css("meta[property='og:updated_time']", attr="content"),
+    ),
+    venue=(Css(VENUE), Css("meta[property='business:contact_data:street_address']", attr="content")),
+    address=(Css(ADDRESS), JsonLd("location.address.streetAddress")),
+    city=(Css(".breadcrumbs a, .crumbs a", pick=_city_crumb), JsonLd("location.address.addressLocality")),
+    category=(Css(".category, .rubric, .tags a"),),
+    price=(Css(".price, .prices, .ticket-price, .cost", pick=join_text),),
+    age=(Css(".age-limit"), Css(".age")),
+    cover=(Css(OG_IMAGE, attr="content"), JsonLd("image")),
+    description=(Css(DESCRIPTION, pick=description), JSONLD_DESCRIPTION),
+)
+
+
+def _parse_detail(url: str, html: str, geocoder: Geocoder) -> Optional[EventRecord]:
+    return PLAN.parse(url, html, geocoder)
 
-    # Категория
-    category = None
-    cat_node = soup.select_one(".category, .rubric, .tags a")
-    if cat_node:
-        category = clean_text(cat_node.get_text())
-
-    # Цена/возраст
-    price_text_candidates = [
-        n.get_text() for n in soup.select(".price, .prices, .ticket-price, .cost")
-    ]
-    price_text = clean_text(" ".join(price_text_candidates)) if price_text_candidates else None
-    price_min, price_max, is_free = parse_price_byn(price_text)
-
-    age_text = clean_text(
-        (soup.select_one(".age-limit") and soup.select_one(".age-limit").get_text())
-        or (soup.select_one(".age") and soup.select_one(".age").get_text())
-    )
-    age = parse_age(age_text)
-
-    # Обложка и изображения, описание
-    cover_url, images = extract_meta(soup)
-    if isinstance(jsonld_image, str):
-        cover_url = cover_url or jsonld_image
-    description = clean_text(jsonld_desc) if jsonld_desc else None
-    desc_node = soup.select_one(".description, .event-description, article, .content")
-    if desc_node:
-        description = clean_text(desc_node.get_text())
-
-    # Геокодирование
-    lat, lon = geocoder.geocode(venue_address or venue_name, city)
-
-    venue = Venue(name=venue_name or "Unknown", address=venue_address, lat=lat, lon=lon)
-
-    return Event(
-        title=title,
-        start_dt=start_dt,
-        end_dt=end_dt,
-        venue=venue,
-        city=city,
-        category=category,
-        price_min_byn=price_min,
-        price_max_byn=price_max,
-        is_free=is_free,
-        age=age,
-        link=url,
-        source="relax",
-        source_uid=None,
-        cover_url=cover_url,
-        description=description,
-        images=images or None,
-        fetched_at=_now_iso(),
-    )
-
-
-def harvest_relax(client: HttpClient, geocoder: Geocoder, limit: int = 50) -> List[Event]:
-    results: List[Event] = []
+
+def harvest_relax(client: HttpClient, geocoder: Geocoder, limit: int = 50) -> List[EventRecord]:
+    results: List[EventRecord] = []
+    frontier = Frontier("relax")
     # Перебираем несколько потенциальных лент: корень, город, город+рубрики
     sections = ["concert", "theatre", "exhibition", "festival"]
     list_urls: List[str] = [BASE, urljoin(BASE, "minsk/")]
     list_urls += [urljoin(BASE, f"minsk/{s}/") for s in sections]
 
-    for list_url in list_urls:
+    pages = listing_pages(client, list_urls, "relax", max_pages=len(list_urls), follow_next=False)
+    for list_url, html, soup in pages:
         if len(results) >= limit:
             break
-        try:
-            html = client.get(list_url).text
-        except Exception:
-            continue
-        links = _parse_list(html)
-        for url in links:
-            if len(results) >= limit:
-                break
-            try:
-                detail = client.get(url).text
-                ev = _parse_detail(url, detail, geocoder)
-                if ev:
-                    results.append(ev)
-            except Exception:
-                continue
+        links = _parse_list(soup)
+        if SETTINGS.listing_only:
+            cards = _parse_cards(soup, geocoder, "Минск" if "/minsk/" in list_url else None)
+            if cards:
+                links = accept_cards(cards, results, limit, "relax")
+        frontier.push_listing(links, soup, BASE, list_url)
+        fetch_details(
+            client, geocoder, frontier, _parse_detail, "relax", limit, results,
+            on_result=frontier.record,
+        )
     return results
 
 
@@ -0,0 +1,126 @@
+from __future__ import annotations
+from typing import Iterable, List, Optional
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+
+from src.core.models import Event
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow — необязательная зависимость, нужна только для --parquet
+    pa = None
+    pq = None
+
+LOCAL_TZ = "Europe/Minsk"
+BATCH_SIZE = 5000
+
+_MINSK = ZoneInfo(LOCAL_TZ)
+
+
+def _schema():
+    dict_str = pa.dictionary(pa.int32(), pa.string())
+    local_ts = pa.timestamp("us", tz=LOCAL_TZ)
+    return pa.schema([
+        ("title", pa.string()),
+        ("start_dt", local_ts),
+        ("end_dt", local_ts),
+        ("venue_name", pa.string()),
+        ("venue_address", pa.string()),
+        ("venue_lat", pa.float64()),
+        ("venue_lon", pa.float64()),
+        ("city", dict_str),
+        ("category", dict_str),
+        ("price_min_byn", pa.float64()),
+        ("price_max_byn", pa.float64()),
+        ("is_free", pa.bool_()),
+        ("age", pa.string()),
+        ("link", pa.string()),
+        ("source", dict_str),
+        ("source_uid", pa.string()),
+        ("cover_url", pa.string()),
+        ("description", pa.string()),
+        ("images", pa.list_(pa.string())),
+        ("fetched_at", pa.timestamp("us", tz="UTC")),
+    ])
+
+
+def _ts(value: Optional[str], default_tz) -> Optional[datetime]:
+    # ISO-строки без смещения считаем местным временем (для fetched_at — UTC)
+    if not value:
+        return None
+    try:
+        dt = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    return dt if dt.tzinfo else dt.replace(tzinfo=default_tz)
+
+
+def _columns(events: List[Event]) -> dict:
+    return {
+        "title": [e.title for e in events],
+        "start_dt": [_ts(e.start_dt, _MINSK) for e in events],
+        "end_dt": [_ts(e.end_dt, _MINSK) for e in events],
+        "venue_name": [e.venue.name for e in events],
+        "venue_address": [e.venue.address for e in events],
+        "venue_lat": [e.venue.lat for e in events],
+        "venue_lon": [e.venue.lon for e in events],
+        "city": [e.city for e in events],
+        "category": [e.category for e in events],
+        "price_min_byn": [e.price_min_byn for e in events],
+        "price_max_byn": [e.price_max_byn for e in events],
+        "is_free": [e.is_free for e in events],
+        "age": [e.age for e in events],
+        "link": [str(e.link) for e in events],
+        "source": [e.source for e in events],
+        "source_uid": [e.source_uid for e in events],
+        "cover_url": [str(e.cover_url) if e.cover_url else None for e in events],
+        "description": [e.description for e in events],
+        "images": [[str(u) for u in e.images] if e.images else None for e in events],
+        "fetched_at": [_ts(e.fetched_at, timezone.utc) for e in events],
+    }
+
+
+class ParquetWriter:
+    # Пишет события батчами по BATCH_SIZE: в памяти одновременно только одна record batch
+    def __init__(self, path: str, batch_size: int = BATCH_SIZE, compression: str = "zstd"):
+        if pa is None:
+            raise RuntimeError("Parquet output needs pyarrow: pip install pyarrow")
+        self.schema = _schema()
+        self.batch_size = batch_size
+        self._buffer: List[Event] = []
+        self._writer = pq.ParquetWriter(
+            path, self.schema, compression=compression,
+            use_dictionary=["city", "category", "source"],
+        )
+        self.rows = 0
+
+    def write(self, events: Iterable[Event]) -> None:
+        for e in events:
+            self._buffer.append(e)
+            if len(self._buffer) >= self.batch_size:
+                self._flush()
+
+    def _flush(self) -> None:
+        if not self._buffer:
+            return
+        batch = pa.RecordBatch.from_pydict(_columns(self._buffer), schema=self.schema)
+        self._writer.write_batch(batch)
+        self.rows += len(self._buffer)
+        self._buffer = []
+
+    def close(self) -> None:
+        self._flush()
+        self._writer.close()
+
+    def __enter__(self) -> "ParquetWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def write_parquet(path: str, events: Iterable[Event], batch_size: int = BATCH_SIZE) -> int:
+    with ParquetWriter(path, batch_size) as writer:
+        writer.write(events)
+    return writer.rows
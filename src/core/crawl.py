@@ -0,0 +1,421 @@
+from __future__ import annotations
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+import hashlib
+import inspect
+import queue
+import re
+import threading
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+
+from src.utils.http import HttpClient, host_of
+from src.core.models import EventRecord, VenueRecord
+from src.core.geocode import Geocoder
+from src.core.metrics import METRICS
+from src.core.frontier import reference_date
+from src.core.visited import VisitedSet
+from src.core.output import read_jsonl
+from src.core.pages import PageArchive
+from src.core.store import EventStore
+from src.core.render_cache import RENDER, RENDER_STATS, STATIC
+from src.core.scheduler import BudgetExhausted
+from src.core import normalize as _normalize
+from src.core import plans as _plans
+from src.utils.urls import canonicalize
+from src.utils import parse as _parse
+from src.utils import selectors as _selectors
+from src.utils.parse import clean_text, make_soup, normalize_ru_date, parse_datetime, parse_price_byn
+
+ParseDetail = Callable[[str, str, Geocoder], Optional[EventRecord]]
+# (URL страницы листинга, HTML, разобранное дерево)
+ListingPage = Tuple[str, str, BeautifulSoup]
+
+NEXT_SELECTOR = 'a[rel="next"], .pagination a.next, a[aria-label="Next"]'
+# (ссылка, предварительный Event из карточки листинга или None, если обязательных полей нет)
+Card = Tuple[str, Optional[EventRecord]]
+
+
+@dataclass
+class CrawlSettings:
+    # listing_only: собирать Event из карточек листинга, детальные страницы — только при необходимости
+    listing_only: bool = False
+    # ссылки событий из прошлых выгрузок; новые (не из этого множества) добираются с детальной страницы
+    known_links: Set[str] = field(default_factory=set)
+    # канонические URL детальных страниц, уже запрошенных в этом прогоне (между листингами и источниками)
+    visited: VisitedSet = field(default_factory=VisitedSet)
+    # архив сырого HTML детальных страниц для последующего reparse
+    pages: Optional[PageArchive] = None
+    # хеши содержимого страниц с прошлых прогонов: неизменившаяся страница не разбирается и не геокодируется
+    changes: Optional[EventStore] = None
+    # одновременных загрузок детальных страниц на источник (1 — последовательно)
+    detail_workers: int = 1
+    # сколько следующих страниц листинга загружать в фоне, пока обрабатываются детали текущей (0 — последовательно)
+    prefetch_pages: int = 1
+    # брать события из JSON-эндпоинтов, подсмотренных при рендере (src.core.endpoints), раньше HTML-листингов
+    api: bool = True
+
+
+# Настройки прогона, задаются раннером
+SETTINGS = CrawlSettings()
+
+# Части страницы, которые меняются от запроса к запросу без изменения события
+_VOLATILE = [
+    re.compile(r"<!--.*?-->", re.S),
+    re.compile(r"<meta[^>]+name=[\"'](?:csrf[-_]?token|csrf-param|_token)[\"'][^>]*>", re.I),
+    re.compile(r"<input[^>]+name=[\"'](?:csrfmiddlewaretoken|_token|csrf[-_]?token|authenticity_token)[\"'][^>]*>", re.I),
+    re.compile(r"\s(?:nonce|data-csrf|data-token)=[\"'][^\"']*[\"']", re.I),
+    re.compile(r"([?&](?:v|ver|_|t|ts|cb|timestamp)=)[0-9a-f]{6,}", re.I),
+    re.compile(r"\b(?:window\.)?__(?:NOW|TIMESTAMP|REQUEST_ID|BUILD_ID)__\s*=\s*[^;<]+", re.I),
+]
+_RE_SPACES = re.compile(r"\s+")
+_PLAN_MODULES = (_plans, _selectors, _normalize, _parse)
+_PARSER_FINGERPRINTS: dict = {}
+
+
+def _parser_fingerprint(parse_detail: ParseDetail) -> str:
+    # Исходник модуля адаптера входит в хеш: после правки селекторов старые хеши не совпадут.
+    # Планы разбора исполняет общий движок, даты/цены/возраст доводят normalize и parse — их исходники
+    # тоже часть парсера, как и бюджет описания (--description-chars меняет результат разбора).
+    module_key = getattr(parse_detail, "__module__", None) or repr(parse_detail)
+    key = f"{module_key}:{_parse.DESCRIPTION_MAX_CHARS}"
+    if key not in _PARSER_FINGERPRINTS:
+        try:
+            source = "".join(
+                inspect.getsource(module)
+                for module in (inspect.getmodule(parse_detail), *_PLAN_MODULES)
+            )
+        except Exception:
+            source = module_key
+        source += f"\ndescription_max_chars={_parse.DESCRIPTION_MAX_CHARS}"
+        _PARSER_FINGERPRINTS[key] = hashlib.sha256(source.encode("utf-8")).hexdigest()[:16]
+    return _PARSER_FINGERPRINTS[key]
+
+
+def content_hash(html: str, parse_detail: ParseDetail) -> str:
+    for rx in _VOLATILE:
+        html = rx.sub(lambda m: m.group(1) if m.re.groups else "", html)
+    html = _RE_SPACES.sub(" ", html)
+    digest = hashlib.sha256(_parser_fingerprint(parse_detail).encode("ascii"))
+    digest.update(html.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def load_known_links(path: str) -> Set[str]:
+    # прошлый --out: обычный JSONL, .gz/.zst или шарды по манифесту; нет файла — ничего не известно
+    return {canonicalize(row["link"]) for row in read_jsonl(path)}
+
+
+def card_event(
+    link: str,
+    source: str,
+    geocoder: Geocoder,
+    title: Optional[str],
+    date_text: Optional[str],
+    venue_name: Optional[str],
+    price_text: Optional[str] = None,
+    cover_url: Optional[str] = None,
+    city: Optional[str] = None,
+) -> Card:
+    # Предварительный Event по данным карточки листинга (без описания и галереи)
+    title = clean_text(title)
+    today = reference_date()
+    start_dt = parse_datetime(normalize_ru_date(clean_text(date_text), today), today)
+    venue_name = clean_text(venue_name)
+    if not title or not start_dt:
+        return link, None
+    price_min, price_max, is_free = parse_price_byn(clean_text(price_text))
+    lat, lon = geocoder.geocode(venue_name, city)
+    # URL проверяются только на выходе (EventRecord.to_event) — здесь отсекаем заведомо битые
+    if not link.startswith(("http://", "https://")):
+        return link, None
+    if cover_url and not cover_url.startswith(("http://", "https://")):
+        cover_url = None
+    ev = EventRecord(
+        title=title,
+        start_dt=start_dt,
+        venue=VenueRecord(name=venue_name or "Unknown", lat=lat, lon=lon),
+        city=city,
+        price_min_byn=price_min,
+        price_max_byn=price_max,
+        is_free=is_free,
+        link=link,
+        source=source,
+        cover_url=cover_url,
+        fetched_at=datetime.now(timezone.utc).isoformat(),
+    )
+    return link, ev
+
+
+def accept_cards(cards: List[Card], results: List[EventRecord], limit: int, source: str) -> List[str]:
+    # Полные карточки известных событий идут в результат сразу; возвращает ссылки, которым нужна детальная
+    need_detail: List[str] = []
+    for link, ev in cards:
+        complete = ev is not None and bool(ev.venue.name) and ev.venue.name != "Unknown"
+        known = not SETTINGS.known_links or canonicalize(link) in SETTINGS.known_links
+        if complete and known:
+            if len(results) < limit:
+                results.append(ev)
+                METRICS.inc("events_from_listing", source=source)
+        else:
+            need_detail.append(link)
+    return need_detail
+
+
+def _fetch_detail(
+    client: HttpClient, url: str, needs_render: Optional[Callable[[str], bool]],
+) -> Tuple[str, bool, Optional[str]]:
+    # Для адаптеров с рендером способ загрузки берётся из выученной статистики паттерна URL
+    mode = RENDER_STATS.decide(url) if needs_render else STATIC
+    if needs_render:
+        METRICS.inc("render_decision", host=host_of(url), mode=mode or "probe")
+    if mode == RENDER:
+        return client.render(url, wait_selector="h1"), True, mode
+    return client.get(url).text, False, mode
+
+
+def _handle_detail(
+    client: HttpClient,
+    url: str,
+    detail: str,
+    rendered: bool,
+    mode: Optional[str],
+    needs_render: Optional[Callable[[str], bool]],
+    geocoder: Geocoder,
+    parse_detail: ParseDetail,
+    source: str,
+    limit: int,
+    results: List[EventRecord],
+    on_result: Optional[Callable[[str, bool], None]],
+) -> None:
+    digest = None
+    ev = None
+    cached = None
+    if SETTINGS.changes is not None:
+        key = canonicalize(url)
+        digest = content_hash(detail, parse_detail)
+        cached = SETTINGS.changes.page(key)
+    if cached is not None and cached[0] == digest:
+        ev = cached[1]
+        METRICS.inc("detail_unchanged", source=source)
+        if ev:
+            ev.fetched_at = datetime.now(timezone.utc).isoformat()
+    else:
+        with METRICS.timer("parse_detail", source=source):
+            ev = parse_detail(url, detail, geocoder)
+        if ev is None and not rendered and needs_render and needs_render(detail):
+            if mode is None:
+                # проба: статика не разобралась и похожа на JS-страницу — рендерим
+                detail = client.render(url, wait_selector="h1")
+                rendered = True
+                with METRICS.timer("parse_detail", source=source):
+                    ev = parse_detail(url, detail, geocoder)
+            else:
+                RENDER_STATS.record_suspect(url)
+        if ev is not None and needs_render:
+            RENDER_STATS.record(url, rendered)
+        if digest is not None:
+            SETTINGS.changes.remember_page(key, digest, ev)
+        if ev:
+            METRICS.inc("events_parsed", source=source)
+    if SETTINGS.pages is not None:
+        SETTINGS.pages.put(url, source, detail, rendered)
+    if ev and len(results) < limit:
+        results.append(ev)
+    elif not ev:
+        METRICS.inc("pages_discarded", source=source)
+    if on_result:
+        on_result(url, ev is not None)
+
+
+def fetch_details(
+    client: HttpClient,
+    geocoder: Geocoder,
+    urls: Iterable[str],
+    parse_detail: ParseDetail,
+    source: str,
+    limit: int,
+    results: List[EventRecord],
+    needs_render: Optional[Callable[[str], bool]] = None,
+    on_result: Optional[Callable[[str, bool], None]] = None,
+) -> None:
+    # Общий цикл по детальным страницам: fetch -> (render) -> parse, до достижения limit.
+    # BudgetExhausted не ошибка страницы: обход прекращается, собранное отдаёт Scheduler.
+    if client.scheduler is not None:
+        client.scheduler.track(results)
+    if SETTINGS.detail_workers > 1:
+        _fetch_details_concurrent(
+            client, geocoder, urls, parse_detail, source, limit, results, needs_render, on_result,
+        )
+        return
+    for url in urls:
+        if len(results) >= limit:
+            break
+        if not SETTINGS.visited.add(url):
+            METRICS.inc("detail_already_visited", source=source)
+            continue
+        try:
+            detail, rendered, mode = _fetch_detail(client, url, needs_render)
+            _handle_detail(
+                client, url, detail, rendered, mode, needs_render,
+                geocoder, parse_detail, source, limit, results, on_result,
+            )
+        except BudgetExhausted:
+            raise
+        except Exception:
+            METRICS.inc("detail_errors", source=source)
+            continue
+
+
+def _fetch_details_concurrent(
+    client: HttpClient,
+    geocoder: Geocoder,
+    urls: Iterable[str],
+    parse_detail: ParseDetail,
+    source: str,
+    limit: int,
+    results: List[EventRecord],
+    needs_render: Optional[Callable[[str], bool]],
+    on_result: Optional[Callable[[str, bool], None]],
+) -> None:
+    # Загрузка — в пуле потоков (реальную конкурентность на хост держит client.limits, AIMD),
+    # разбор, геокодирование и обратная связь фронтиру — в потоке источника
+    scheduler = client.scheduler
+    owner = scheduler.current_source if scheduler is not None else None
+
+    def task(url: str) -> Tuple[str, bool, Optional[str]]:
+        if scheduler is not None:
+            scheduler.bind(owner)
+        return _fetch_detail(client, url, needs_render)
+
+    workers = SETTINGS.detail_workers
+    it = iter(urls)
+    exhausted = False
+    budget: Optional[BudgetExhausted] = None
+    pending: Dict[Future, str] = {}
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"detail-{source}") as pool:
+        while True:
+            while not exhausted and not budget and len(pending) < workers and len(results) + len(pending) < limit:
+                url = next(it, None)
+                if url is None:
+                    exhausted = True
+                    break
+                if not SETTINGS.visited.add(url):
+                    METRICS.inc("detail_already_visited", source=source)
+                    continue
+                pending[pool.submit(task, url)] = url
+            if not pending:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                url = pending.pop(fut)
+                try:
+                    detail, rendered, mode = fut.result()
+                    _handle_detail(
+                        client, url, detail, rendered, mode, needs_render,
+                        geocoder, parse_detail, source, limit, results, on_result,
+                    )
+                except BudgetExhausted as exc:
+                    # уже отправленные запросы дорабатывают, новые не ставятся
+                    budget = budget or exc
+                except Exception:
+                    METRICS.inc("detail_errors", source=source)
+    if budget is not None:
+        raise budget
+
+
+def next_listing(soup: BeautifulSoup, list_url: str) -> Optional[str]:
+    next_a = soup.select_one(NEXT_SELECTOR)
+    return urljoin(list_url, next_a.get("href")) if next_a and next_a.get("href") else None
+
+
+def listing_pages(
+    client: HttpClient,
+    urls: List[str],
+    source: str,
+    max_pages: int = 5,
+    follow_next: bool = True,
+    load: Optional[Callable[[str], Tuple[str, BeautifulSoup]]] = None,
+) -> Iterator[ListingPage]:
+    # Страницы листинга: urls по порядку, с follow_next — дальше по ссылкам «следующая» (ошибка обрывает цепочку).
+    # С SETTINGS.prefetch_pages > 0 следующие страницы загружаются и разбираются в фоне, пока адаптер
+    # обрабатывает детали текущей, так что пагинация не лежит на критическом пути.
+    # load(url) -> (html, soup): адаптер, которому soup нужен уже при загрузке, отдаёт его сам
+    def fetch(url: str) -> Tuple[str, BeautifulSoup]:
+        html = client.get(url).text
+        return html, make_soup(html)
+
+    load = load or fetch
+
+    def chain() -> Iterator[ListingPage]:
+        todo = list(urls)
+        pages = 0
+        while todo and pages < max_pages:
+            url = todo.pop(0)
+            try:
+                html, soup = load(url)
+            except BudgetExhausted:
+                raise
+            except Exception:
+                if follow_next:
+                    return
+                continue
+            pages += 1
+            yield url, html, soup
+            if follow_next:
+                nxt = next_listing(soup, url)
+                if nxt:
+                    todo.append(nxt)
+
+    depth = SETTINGS.prefetch_pages
+    if depth <= 0:
+        yield from chain()
+        return
+
+    scheduler = client.scheduler
+    owner = scheduler.current_source if scheduler is not None else None
+    ready: "queue.Queue[Optional[ListingPage]]" = queue.Queue()
+    budget: List[BudgetExhausted] = []
+    slots = threading.Semaphore(depth)
+    stop = threading.Event()
+
+    def produce() -> None:
+        if scheduler is not None:
+            scheduler.bind(owner)
+        try:
+            it = chain()
+            while not stop.is_set():
+                # не больше depth загруженных, но ещё не взятых адаптером страниц
+                while not slots.acquire(timeout=0.1):
+                    if stop.is_set():
+                        return
+                # запасной слот хоста: иначе при лимите 1 страница ждёт, пока детальные воркеры отпустят хост
+                with client.limits.reserve():
+                    page = next(it, None)
+                if page is None or stop.is_set():
+                    return
+                METRICS.inc("listing_pages", source=source)
+                ready.put(page)
+        except BudgetExhausted as exc:
+            budget.append(exc)
+        except Exception:
+            METRICS.inc("listing_errors", source=source)
+        finally:
+            ready.put(None)
+
+    worker = threading.Thread(target=produce, name=f"listing-{source}", daemon=True)
+    worker.start()
+    try:
+        while True:
+            page = ready.get()
+            if page is None:
+                if budget:
+                    raise budget[0]
+                return
+            slots.release()
+            yield page
+    finally:
+        stop.set()
@@ -0,0 +1,180 @@
+from __future__ import annotations
+from typing import Callable, Dict, List, Optional, Tuple
+from datetime import datetime, timezone
+from pathlib import Path
+import hashlib
+import json
+import threading
+import time
+
+from src.core.dedupe import build_event_key
+from src.core.metrics import METRICS
+from src.core.models import Event
+from src.core.store import EventStore
+
+REVISIT_PATH = Path("data/revisit.json")
+
+# Интервал обхода источника: стартовый (как у почасового cron) и границы адаптации
+BASE_INTERVAL = 3600.0
+MIN_INTERVAL = 300.0
+MAX_INTERVAL = 6 * 3600.0
+# Обход с новыми/изменившимися событиями сокращает интервал, пустой — растягивает
+SPEEDUP = 0.5
+SLOWDOWN = 1.5
+# Отпечатки событий, не встречавшихся столько секунд, забываются
+FORGET_AFTER = 7 * 24 * 3600.0
+
+
+class RevisitSchedule:
+    # Интервал и время следующего обхода по источникам; переживает перезапуск демона (data/revisit.json)
+    def __init__(
+        self,
+        path: Path = REVISIT_PATH,
+        base_interval: float = BASE_INTERVAL,
+        min_interval: float = MIN_INTERVAL,
+        max_interval: float = MAX_INTERVAL,
+    ):
+        self.path = Path(path)
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self.base_interval = min(max(base_interval, self.min_interval), self.max_interval)
+        self.sources: Dict[str, Dict[str, float]] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        if self.path.exists():
+            try:
+                self.sources = json.loads(self.path.read_text(encoding="utf-8"))
+            except Exception:
+                self.sources = {}
+
+    def _entry(self, source: str) -> Dict[str, float]:
+        self._load()
+        entry = self.sources.setdefault(source, {"interval": self.base_interval, "next": 0.0})
+        entry["interval"] = min(max(entry["interval"], self.min_interval), self.max_interval)
+        return entry
+
+    def due(self, sources: List[str], now: float) -> List[str]:
+        with self._lock:
+            return [src for src in sources if self._entry(src)["next"] <= now]
+
+    def wait(self, sources: List[str], now: float) -> float:
+        # секунд до ближайшего обхода
+        with self._lock:
+            return max(0.0, min(self._entry(src)["next"] for src in sources) - now)
+
+    def update(self, source: str, events: int, changed: Optional[int], now: float) -> float:
+        # changed=None — первый обход после старта: сравнивать не с чем, интервал не меняется
+        with self._lock:
+            entry = self._entry(source)
+            if changed is not None:
+                factor = SPEEDUP if changed else SLOWDOWN
+                entry["interval"] = min(max(entry["interval"] * factor, self.min_interval), self.max_interval)
+            entry["next"] = now + entry["interval"]
+            entry["events"] = events
+            entry["changed"] = changed or 0
+            entry["last"] = now
+            interval = entry["interval"]
+        METRICS.set_gauge("revisit_interval_seconds", round(interval, 1), source=source)
+        return interval
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._loaded:
+                return
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self.path.write_text(json.dumps(self.sources, ensure_ascii=False, indent=2), encoding="utf-8")
+            except Exception:
+                pass
+
+
+def event_fingerprint(event: Event) -> str:
+    # содержимое события без времени загрузки
+    payload = event.model_dump_json(exclude={"fetched_at"})
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=12).hexdigest()
+
+
+class ChangeTracker:
+    # Отпечатки последних версий событий по источникам: на выход уходят только новые и изменившиеся
+    def __init__(self, forget_after: float = FORGET_AFTER):
+        self.forget_after = forget_after
+        self.seen: Dict[str, Dict[str, Tuple[str, float]]] = {}
+
+    def seed(self, store: EventStore, now: float) -> int:
+        # Прогрев из --store: после перезапуска неизменившиеся события не пишутся повторно как «новые»
+        since = datetime.fromtimestamp(now - self.forget_after, timezone.utc).isoformat()
+        count = 0
+        for source, key, event, last_seen in store.latest(since):
+            try:
+                ts = datetime.fromisoformat(last_seen).timestamp()
+            except ValueError:
+                ts = now
+            self.seen.setdefault(source, {})[key] = (event_fingerprint(event), ts)
+            count += 1
+        return count
+
+    def diff(self, source: str, events: List[Event], now: float) -> List[Event]:
+        known = self.seen.setdefault(source, {})
+        changed: List[Event] = []
+        for ev in events:
+            key = build_event_key(ev.title, ev.start_dt, ev.venue.name, ev.source_uid)
+            digest = event_fingerprint(ev)
+            prev = known.get(key)
+            if prev is None or prev[0] != digest:
+                changed.append(ev)
+            known[key] = (digest, now)
+        for key in [k for k, (_, ts) in known.items() if now - ts > self.forget_after]:
+            del known[key]
+        return changed
+
+
+def run_daemon(
+    sources: List[str],
+    cycle: Callable[[List[str]], Dict[str, List[Event]]],
+    on_changed: Callable[[List[Event]], None],
+    after_cycle: Callable[[], None],
+    schedule: RevisitSchedule,
+    stop: threading.Event,
+    tracker: Optional[ChangeTracker] = None,
+    max_cycles: Optional[int] = None,
+    on_seen: Optional[Callable[[List[Event]], None]] = None,
+) -> int:
+    # Долгоживущий цикл: берёт источники, у которых подошёл срок, обходит их одним прогоном
+    # (клиент, браузеры и кэши остаются прогретыми) и пишет только новые/изменившиеся события
+    tracker = tracker or ChangeTracker()
+    cycles = 0
+    while not stop.is_set() and (max_cycles is None or cycles < max_cycles):
+        now = time.time()
+        due = schedule.due(sources, now)
+        if not due:
+            stop.wait(min(schedule.wait(sources, now), 60.0))
+            continue
+        cycles += 1
+        METRICS.inc("daemon_cycles")
+        try:
+            by_source = cycle(due)
+        except Exception as exc:
+            METRICS.inc("daemon_errors", error=type(exc).__name__)
+            print(f"cycle failed: {type(exc).__name__}: {exc}")
+            by_source = {}
+        now = time.time()
+        for src in due:
+            events = by_source.get(src, [])
+            warm = src in tracker.seen
+            changed = tracker.diff(src, events, now)
+            interval = schedule.update(src, len(events), len(changed) if warm else None, now)
+            METRICS.inc("daemon_events_changed", len(changed), source=src)
+            print(f"{src}: {len(events)} events, {len(changed)} new/changed, next visit in {interval:.0f}s")
+            if changed:
+                on_changed(changed)
+            # все встреченные события, в том числе неизменившиеся (last_seen в --store)
+            if events and on_seen is not None:
+                on_seen(events)
+        schedule.save()
+        after_cycle()
+    return cycles
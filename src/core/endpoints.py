@@ -0,0 +1,263 @@
+from __future__ import annotations
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from datetime import datetime, timezone
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+import json
+
+import requests
+
+from src.utils.breaker import CircuitOpen
+from src.utils.http import HttpClient
+from src.core.crawl import SETTINGS, Card, ParseDetail, accept_cards, card_event, fetch_details
+from src.core.geocode import Geocoder
+from src.core.models import EventRecord
+from src.core.learned import LearnedStore
+from src.core.metrics import METRICS
+from src.core.scheduler import BudgetExhausted
+
+ENDPOINTS_PATH = Path("data/endpoints.json")
+
+# Параметры пагинации, которые в шаблоне заменяются на {page}/{offset}
+PAGE_PARAMS = {"page", "p", "pagenumber", "page_number", "pageindex"}
+OFFSET_PARAMS = {"offset", "skip", "start", "from"}
+MAX_API_PAGES = 20
+# Эндпоинт забывается только после стольких прогонов подряд с настоящим отказом (4xx, не JSON, нет событий)
+FORGET_AFTER = 3
+
+# Поля JSON-объекта события (в порядке предпочтения, без учёта регистра)
+TITLE_KEYS = ("title", "name", "eventname", "event_name", "caption")
+START_KEYS = ("startdate", "start_date", "datestart", "date_start", "start", "datetime", "date", "begin", "eventdate")
+VENUE_KEYS = ("venue", "place", "location", "hall", "venuename", "placename", "location_name")
+CITY_KEYS = ("city", "cityname", "city_name", "addresslocality")
+PRICE_MIN_KEYS = ("minprice", "price_min", "pricemin", "pricefrom", "price_from", "price")
+PRICE_MAX_KEYS = ("maxprice", "price_max", "pricemax", "priceto", "price_to")
+LINK_KEYS = ("url", "link", "href", "permalink", "slug")
+IMAGE_KEYS = ("image", "poster", "cover", "img", "picture", "imageurl", "image_url")
+
+
+def _field(item: Dict[str, Any], keys: Tuple[str, ...]) -> Any:
+    lowered = {str(k).lower(): v for k, v in item.items()}
+    for key in keys:
+        value = lowered.get(key)
+        if value not in (None, "", [], {}):
+            return value
+    return None
+
+
+def _text(value: Any) -> Optional[str]:
+    if isinstance(value, dict):
+        value = _field(value, ("name", "title", "url", "src", "value"))
+    if isinstance(value, list):
+        value = value[0] if value else None
+        return _text(value)
+    return None if value is None else str(value)
+
+
+def _looks_like_event(item: Any) -> bool:
+    return isinstance(item, dict) and _field(item, TITLE_KEYS) is not None and _field(item, START_KEYS) is not None
+
+
+def find_items(data: Any, path: Tuple[str, ...] = (), depth: int = 0) -> Optional[Tuple[Tuple[str, ...], int]]:
+    # Путь к самому длинному списку объектов, похожих на события (title + дата)
+    best: Optional[Tuple[Tuple[str, ...], int]] = None
+    if isinstance(data, list):
+        hits = sum(1 for item in data[:50] if _looks_like_event(item))
+        if hits >= 2 and hits * 2 >= min(len(data), 50):
+            best = (path, hits)
+    elif isinstance(data, dict) and depth < 4:
+        for key, value in data.items():
+            found = find_items(value, path + (key,), depth + 1)
+            if found and (best is None or found[1] > best[1]):
+                best = found
+    return best
+
+
+def items_at(data: Any, path: List[str]) -> List[Dict[str, Any]]:
+    for key in path:
+        if not isinstance(data, dict):
+            return []
+        data = data.get(key)
+    return [item for item in data if isinstance(item, dict)] if isinstance(data, list) else []
+
+
+def url_template(url: str) -> Tuple[str, Optional[str]]:
+    # https://host/api/events?city=minsk&page=2 -> (https://host/api/events?city=minsk&page={page}, "page")
+    parts = urlsplit(url)
+    params = []
+    paging = None
+    for key, value in parse_qsl(parts.query, keep_blank_values=True):
+        if key.lower() in PAGE_PARAMS and value.isdigit():
+            params.append((key, "{page}"))
+            paging = "page"
+        elif key.lower() in OFFSET_PARAMS and value.isdigit():
+            params.append((key, "{offset}"))
+            paging = "offset"
+        else:
+            params.append((key, value.replace("{", "{{").replace("}", "}}")))
+    query = urlencode(params, safe="{}")
+    path = parts.path.replace("{", "{{").replace("}", "}}")
+    return urlunsplit((parts.scheme, parts.netloc, path, query, "")), paging
+
+
+class EndpointStore(LearnedStore):
+    # JSON-эндпоинты, замеченные во время рендера (XHR/fetch), по источникам
+    indent = 2
+
+    def __init__(self, path: Path = ENDPOINTS_PATH):
+        super().__init__(path)
+
+    def observe(self, source: str, url: str, body: str) -> bool:
+        # Ответ рендера с JSON: запоминаем шаблон, если в нём есть список событий
+        try:
+            data = json.loads(body)
+        except ValueError:
+            return False
+        found = find_items(data)
+        if not found:
+            return False
+        item_path, hits = found
+        template, paging = url_template(url)
+        with self._lock:
+            self._load()
+            entry = self.data.setdefault(source, {}).setdefault(template, {"seen": 0})
+            entry.update(
+                item_path=list(item_path),
+                paging=paging,
+                items=hits,
+                seen=entry["seen"] + 1,
+                last_seen=datetime.now(timezone.utc).isoformat(),
+            )
+        METRICS.inc("api_endpoint_observed", source=source)
+        return True
+
+    def templates(self, source: str) -> List[Tuple[str, Dict[str, Any]]]:
+        with self._lock:
+            self._load()
+            entries = list(self.data.get(source, {}).items())
+        return sorted(entries, key=lambda kv: (kv[1].get("items", 0), kv[1].get("seen", 0)), reverse=True)
+
+    def failed(self, source: str, template: str) -> bool:
+        # Настоящий отказ эндпоинта; True — отказов подряд набралось FORGET_AFTER и он забыт
+        with self._lock:
+            self._load()
+            entry = self.data.get(source, {}).get(template)
+            if entry is None:
+                return True
+            entry["failures"] = entry.get("failures", 0) + 1
+            if entry["failures"] < FORGET_AFTER:
+                return False
+            self.data[source].pop(template, None)
+        METRICS.inc("api_endpoint_forgotten", source=source)
+        return True
+
+    def succeeded(self, source: str, template: str) -> None:
+        with self._lock:
+            self._load()
+            entry = self.data.get(source, {}).get(template)
+            if entry is not None:
+                entry["failures"] = 0
+
+
+ENDPOINTS = EndpointStore()
+
+
+def capture(source: str) -> Callable[[str, str], None]:
+    # колбэк для client.render(..., on_json=...)
+    return lambda url, body: ENDPOINTS.observe(source, url, body)
+
+
+def api_card(item: Dict[str, Any], source: str, base: str, geocoder: Geocoder) -> Optional[Card]:
+    link = _text(_field(item, LINK_KEYS))
+    if not link:
+        return None
+    venue = _field(item, VENUE_KEYS)
+    city = _text(_field(item, CITY_KEYS))
+    if city is None and isinstance(venue, dict):
+        address = venue.get("address")
+        city = _text(_field(venue, CITY_KEYS))
+        if city is None and isinstance(address, dict):
+            city = _text(_field(address, CITY_KEYS))
+    low, high = _field(item, PRICE_MIN_KEYS), _field(item, PRICE_MAX_KEYS)
+    price_text = None
+    if isinstance(low, (int, float, str)) and str(low).strip():
+        if str(low).strip() in ("0", "0.0") and high in (None, 0, "0"):
+            price_text = "бесплатно"
+        else:
+            price_text = f"{low}–{high}" if high is not None else str(low)
+    return card_event(
+        urljoin(base, link),
+        source,
+        geocoder,
+        _text(_field(item, TITLE_KEYS)),
+        _text(_field(item, START_KEYS)),
+        _text(venue),
+        price_text,
+        _text(_field(item, IMAGE_KEYS)),
+        city,
+    )
+
+
+def harvest_api(
+    client: HttpClient,
+    geocoder: Geocoder,
+    source: str,
+    base: str,
+    parse_detail: ParseDetail,
+    limit: int,
+    results: List[EventRecord],
+    needs_render: Optional[Callable[[str], bool]] = None,
+    on_result: Optional[Callable[[str, bool], None]] = None,
+) -> bool:
+    # События напрямую из выученных JSON-эндпоинтов, без браузера и HTML-листингов.
+    # Неполные объекты добираются детальными страницами; False — эндпоинтов нет или они перестали отвечать.
+    if not SETTINGS.api:
+        return False
+    for template, meta in ENDPOINTS.templates(source):
+        per_page = meta.get("items") or 20
+        got_any = False
+        # отказ самого эндпоинта (4xx, не JSON, нет списка событий) — в отличие от таймаута, 5xx,
+        # открытого автомата или исчерпанного бюджета, которые ничего не говорят об эндпоинте
+        broken = False
+        for n in range(MAX_API_PAGES if meta.get("paging") else 1):
+            if len(results) >= limit:
+                break
+            url = template.format(page=n + 1, offset=n * per_page)
+            try:
+                data = client.get(url).json()
+            except BudgetExhausted:
+                raise
+            except CircuitOpen:
+                METRICS.inc("api_errors", source=source)
+                break
+            except requests.HTTPError as exc:
+                METRICS.inc("api_errors", source=source)
+                status = exc.response.status_code if exc.response is not None else 0
+                broken = 400 <= status < 500 and status != 429
+                break
+            except ValueError:
+                # тело не JSON (requests.JSONDecodeError — тоже ValueError)
+                METRICS.inc("api_errors", source=source)
+                broken = True
+                break
+            except Exception:
+                METRICS.inc("api_errors", source=source)
+                break
+            items = items_at(data, meta.get("item_path") or [])
+            if not items:
+                broken = not got_any
+                break
+            got_any = True
+            METRICS.inc("api_pages", source=source)
+            cards = [c for c in (api_card(item, source, base, geocoder) for item in items) if c]
+            need_detail = accept_cards(cards, results, limit, source)
+            fetch_details(
+                client, geocoder, need_detail, parse_detail, source, limit, results,
+                needs_render=needs_render, on_result=on_result,
+            )
+        if got_any:
+            ENDPOINTS.succeeded(source, template)
+            return True
+        if broken:
+            ENDPOINTS.failed(source, template)
+    return False
@@ -0,0 +1,195 @@
+from __future__ import annotations
+from typing import Dict, Iterator, List, Optional, Tuple
+from datetime import date
+from pathlib import Path
+from urllib.parse import urljoin, urlsplit
+import heapq
+import re
+import zlib
+
+from bs4 import BeautifulSoup
+
+from src.core.learned import LearnedStore
+from src.core.metrics import METRICS
+from src.utils.parse import MONTHS_RU, guess_year
+from src.utils.urls import canonicalize
+
+STATS_PATH = Path("data/frontier_stats.json")
+
+_RE_ISO = re.compile(r"(20\d\d)-(\d\d)-(\d\d)")
+# «20.05 BYN» — цена, а не дата
+_RE_DOTTED = re.compile(
+    r"(?<![\d.,])(\d{1,2})\.(\d{1,2})(?:\.(\d{2,4}))?\b(?![.,]\d)(?!\s*(?:byn|br\b|бел|руб|р\.|\$|€|usd|eur))",
+    re.I,
+)
+_RE_WORDS = re.compile(r"\b(\d{1,2})\s+(янв|фев|мар|апр|ма[яй]|июн|июл|авг|сен|окт|ноя|дек)[а-я]*\.?(?:\s+(20\d\d))?", re.I)
+
+# Сегменты, по которым ссылка точно не карточка события
+_NON_EVENT = re.compile(r"/(tags?|news|place|places|venues?|about|contacts|search|login|adv|rules)/", re.I)
+
+# Паттерн с таким числом попыток и долей успеха ниже порога запрашивается только в доле EXPLORE ссылок:
+# старые попытки затухают (DECAY на каждую новую), так что паттерн, починенный правкой селекторов
+# или выученным рендером, возвращается после нескольких удачных проб
+MIN_SAMPLES = 10
+MIN_YIELD = 0.05
+EXPLORE = 0.05
+DECAY = 0.97
+# карточка с датой в прошлом (многодневное событие ещё может идти) — в конец очереди
+PAST_PENALTY = 1.0
+
+
+def url_pattern(url: str) -> str:
+    parts = urlsplit(url)
+    segments = []
+    for seg in parts.path.split("/"):
+        if not seg:
+            continue
+        if seg.isdigit():
+            seg = "{n}"
+        elif any(ch.isdigit() for ch in seg):
+            seg = "{id}"
+        elif "-" in seg or "_" in seg or len(seg) > 24:
+            seg = "{slug}"
+        segments.append(seg)
+    tail = "/" if parts.path.endswith("/") else ""
+    query = "?" if parts.query else ""
+    return f"{parts.hostname}/" + "/".join(segments) + tail + query
+
+
+def card_date(text: str, today: date) -> Optional[date]:
+    try:
+        m = _RE_ISO.search(text)
+        if m:
+            return date(int(m.group(1)), int(m.group(2)), int(m.group(3)))
+        m = _RE_DOTTED.search(text)
+        if m:
+            day, month, year = int(m.group(1)), int(m.group(2)), m.group(3)
+        else:
+            m = _RE_WORDS.search(text)
+            if not m:
+                return None
+            day, month, year = int(m.group(1)), MONTHS_RU[m.group(2).lower()[:3]], m.group(3)
+        if year:
+            y = int(year)
+            return date(y + 2000 if y < 100 else y, month, day)
+        return date(guess_year(day, month, today), month, day)
+    except ValueError:
+        return None
+
+
+def card_hints(soup: BeautifulSoup, base: str) -> Dict[str, str]:
+    # Текст карточки листинга вокруг каждой ссылки: ближайший предок, где есть что-то кроме самой ссылки
+    hints: Dict[str, str] = {}
+    for a in soup.select("a[href]"):
+        full = urljoin(base, a.get("href"))
+        own = len(a.get_text(strip=True))
+        node = a
+        text = ""
+        for _ in range(4):
+            node = node.parent
+            if node is None or node.name in ("body", "html", "main", "ul", "nav"):
+                break
+            text = node.get_text(" ", strip=True)
+            if len(text) > own + 10:
+                break
+        if len(text) > 400:
+            text = text[:400]
+        if len(text) > len(hints.get(full, "")):
+            hints[full] = text
+    return hints
+
+
+class YieldStats(LearnedStore):
+    # Историческая доля страниц, из которых _parse_detail собрал Event, по (источник, паттерн URL)
+    def __init__(self, path: Path = STATS_PATH):
+        super().__init__(path)
+
+    def rate(self, source: str, pattern: str) -> Tuple[float, int]:
+        with self._lock:
+            self._load()
+            fetched, parsed = self.data.get(f"{source} {pattern}", (0, 0))
+        # сглаживание Лапласа: неизвестный паттерн ~0.5
+        return (parsed + 1) / (fetched + 2), fetched
+
+    def record(self, source: str, pattern: str, ok: bool) -> None:
+        with self._lock:
+            self._load()
+            entry = self.data.setdefault(f"{source} {pattern}", [0, 0])
+            entry[0] = entry[0] * DECAY + 1
+            entry[1] = entry[1] * DECAY + (1 if ok else 0)
+
+
+YIELD_STATS = YieldStats()
+
+# «Сегодня» для оценки дат карточек; фиксируется при replay/бенчмарках по записанным страницам
+REFERENCE_DATE: Optional[date] = None
+
+
+def set_reference_date(value: Optional[date]) -> None:
+    global REFERENCE_DATE
+    REFERENCE_DATE = value
+
+
+def reference_date() -> date:
+    return REFERENCE_DATE or date.today()
+
+
+def _explore(url: str) -> bool:
+    # детерминированно по URL: одна и та же ссылка пробуется (или нет) одинаково во всех прогонах
+    return zlib.crc32(canonicalize(url).encode("utf-8")) % 1000 < EXPLORE * 1000
+
+
+class Frontier:
+    def __init__(self, source: str, stats: Optional[YieldStats] = None, today: Optional[date] = None):
+        self.source = source
+        self.stats = stats or YIELD_STATS
+        self.today = today or reference_date()
+        self._heap: List[Tuple[float, int, str]] = []
+        self._seen = set()
+        self._counter = 0
+
+    def score(self, url: str, hint: Optional[str] = None) -> Optional[float]:
+        if _NON_EVENT.search(urlsplit(url).path):
+            return None
+        rate, samples = self.stats.rate(self.source, url_pattern(url))
+        if samples >= MIN_SAMPLES and rate < MIN_YIELD and not _explore(url):
+            return None
+        score = 2.0 * rate
+        when = card_date(hint, self.today) if hint else None
+        if when is not None:
+            delta = (when - self.today).days
+            if delta < -1:
+                return score - PAST_PENALTY
+            # ближайшие события ценнее далёких
+            score += 1.5 / (1.0 + max(delta, 0) / 14.0)
+        return score
+
+    def push(self, url: str, hint: Optional[str] = None) -> None:
+        key = canonicalize(url)
+        if key in self._seen:
+            return
+        self._seen.add(key)
+        score = self.score(url, hint)
+        if score is None:
+            METRICS.inc("frontier_skipped", source=self.source)
+            return
+        self._counter += 1
+        heapq.heappush(self._heap, (-score, self._counter, url))
+
+    def push_listing(self, links: List[str], soup: Optional[BeautifulSoup], base: str, list_url: str) -> None:
+        # base — тот же, от которого _parse_list строит абсолютные ссылки
+        hints = card_hints(soup, base) if soup is not None else {}
+        for url in links:
+            if canonicalize(url) == canonicalize(list_url):
+                continue
+            self.push(url, hints.get(url))
+
+    def record(self, url: str, ok: bool) -> None:
+        self.stats.record(self.source, url_pattern(url), ok)
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def __iter__(self) -> Iterator[str]:
+        while self._heap:
+            yield heapq.heappop(self._heap)[2]
@@ -9,6 +9,8 @@ import os
 import ssl
 import certifi
 
+from src.core.metrics import METRICS
+
 CACHE_PATH = Path("/Users/amal/Downloads/1/data/geocache.json")
 
 
@@ -43,11 +45,14 @@ class Geocoder:
         if not address and not city:
             return None, None
         if key in self.cache:
+            METRICS.inc("geocode_cache", result="hit")
             lat, lon = self.cache[key]
             return float(lat), float(lon)
+        METRICS.inc("geocode_cache", result="miss")
         query = ", ".join([part for part in [address, city, "Belarus"] if part])
         try:
-            loc = self.rate_limited(query)
+            with METRICS.timer("geocode_remote"):
+                loc = self.rate_limited(query)
             if loc and getattr(loc, 'latitude', None) and getattr(loc, 'longitude', None):
                 lat = float(loc.latitude)
                 lon = float(loc.longitude)
@@ -0,0 +1,51 @@
+from __future__ import annotations
+from typing import Any, Dict, Optional
+from pathlib import Path
+import json
+import threading
+
+
+class LearnedStore:
+    # Выученное между прогонами состояние в JSON-файле (frontier, рендер, JSON-эндпоинты):
+    # читается лениво при первом обращении под self._lock и пишется save() целиком.
+    # freeze() — replay/--as-of: на диск ничего не пишется, data можно подменить снимком из архива.
+    indent: Optional[int] = None
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.data: Dict[str, Any] = {}
+        self._loaded = False
+        self.frozen = False
+        self._lock = threading.Lock()
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        if self.path.exists():
+            try:
+                self.data = json.loads(self.path.read_text(encoding="utf-8"))
+            except Exception:
+                self.data = {}
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            self._load()
+            return json.loads(json.dumps(self.data))
+
+    def freeze(self, data: Optional[Dict[str, Any]] = None) -> None:
+        with self._lock:
+            if data is not None:
+                self.data = data
+                self._loaded = True
+            self.frozen = True
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._loaded or self.frozen:
+                return
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self.path.write_text(json.dumps(self.data, ensure_ascii=False, indent=self.indent), encoding="utf-8")
+            except Exception:
+                pass
@@ -0,0 +1,202 @@
+from __future__ import annotations
+from typing import Dict, Tuple, List, Optional, Iterator, Any
+from contextlib import contextmanager
+from pathlib import Path
+import json
+import os
+import threading
+import time
+
+# Границы бакетов гистограмм латентности (секунды)
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+PROM_PREFIX = "harvester_"
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None))
+
+
+def _prom_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(labels) + ([extra] if extra else [])
+    if not items:
+        return ""
+    body = ",".join(
+        '{}="{}"'.format(k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", " "))
+        for k, v in items
+    )
+    return "{" + body + "}"
+
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts: List[int] = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def quantile(self, q: float) -> Optional[float]:
+        # оценка по верхней границе бакета, как histogram_quantile в Prometheus
+        if not self.count:
+            return None
+        rank = q * self.count
+        acc = 0
+        for i, c in enumerate(self.counts):
+            acc += c
+            if acc >= rank:
+                return self.buckets[i] if i < len(self.buckets) else self.max
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "mean": round(self.sum / self.count, 6) if self.count else None,
+            "min": self.min,
+            "max": self.max,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "buckets": {str(b): c for b, c in zip(list(self.buckets) + ["+Inf"], self.counts)},
+        }
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: Dict[Tuple[str, Labels], float] = {}
+        self.histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self.gauges: Dict[Tuple[str, Labels], float] = {}
+        self.started = time.time()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+            self.gauges.clear()
+            self.started = time.time()
+
+    def inc(self, name: str, value: float = 1.0, **labels: Any) -> None:
+        key = (name, _labels(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0.0) + value
+
+    def set_gauge(self, name: str, value: float, **labels: Any) -> None:
+        # текущее значение (конкурентность, очередь), а не накопленный счётчик
+        with self._lock:
+            self.gauges[(name, _labels(labels))] = value
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        key = (name, _labels(labels))
+        with self._lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = Histogram()
+            hist.observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels: Any) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - t0, **labels)
+
+    def counter_value(self, name: str, **labels: Any) -> float:
+        with self._lock:
+            return self.counters.get((name, _labels(labels)), 0.0)
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(self.counters.items())
+            ]
+            timings = [
+                {"name": name, "labels": dict(labels), **hist.to_dict()}
+                for (name, labels), hist in sorted(self.histograms.items())
+            ]
+            gauges = [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(self.gauges.items())
+            ]
+        return {
+            "started_at": self.started,
+            "elapsed_s": round(time.time() - self.started, 3),
+            "counters": counters,
+            "timings": timings,
+            "gauges": gauges,
+        }
+
+    def to_prometheus(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            counter_names = sorted({name for name, _ in self.counters})
+            for name in counter_names:
+                metric = f"{PROM_PREFIX}{name}_total"
+                lines.append(f"# TYPE {metric} counter")
+                for (n, labels), value in sorted(self.counters.items()):
+                    if n == name:
+                        lines.append(f"{metric}{_prom_labels(labels)} {value:g}")
+            hist_names = sorted({name for name, _ in self.histograms})
+            for name in hist_names:
+                metric = f"{PROM_PREFIX}{name}_seconds"
+                lines.append(f"# TYPE {metric} histogram")
+                for (n, labels), hist in sorted(self.histograms.items()):
+                    if n != name:
+                        continue
+                    acc = 0
+                    for bound, c in zip(hist.buckets, hist.counts):
+                        acc += c
+                        lines.append(f"{metric}_bucket{_prom_labels(labels, ('le', f'{bound:g}'))} {acc}")
+                    lines.append(f"{metric}_bucket{_prom_labels(labels, ('le', '+Inf'))} {hist.count}")
+                    lines.append(f"{metric}_sum{_prom_labels(labels)} {hist.sum:.6f}")
+                    lines.append(f"{metric}_count{_prom_labels(labels)} {hist.count}")
+            for name in sorted({name for name, _ in self.gauges}):
+                metric = f"{PROM_PREFIX}{name}"
+                lines.append(f"# TYPE {metric} gauge")
+                for (n, labels), value in sorted(self.gauges.items()):
+                    if n == name:
+                        lines.append(f"{metric}{_prom_labels(labels)} {value:g}")
+        lines.append(f"# TYPE {PROM_PREFIX}run_duration_seconds gauge")
+        lines.append(f"{PROM_PREFIX}run_duration_seconds {time.time() - self.started:.3f}")
+        lines.append(f"# TYPE {PROM_PREFIX}run_finished_timestamp_seconds gauge")
+        lines.append(f"{PROM_PREFIX}run_finished_timestamp_seconds {time.time():.0f}")
+        return "\n".join(lines) + "\n"
+
+    def write_json(self, path: str) -> None:
+        _atomic_write(path, json.dumps(self.report(), ensure_ascii=False, indent=2))
+
+    def write_prometheus(self, path: str) -> None:
+        # node_exporter textfile collector читает файл целиком — пишем атомарно
+        _atomic_write(path, self.to_prometheus())
+
+
+def _atomic_write(path: str, text: str) -> None:
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, target)
+
+
+# Общий реестр на процесс
+METRICS = Metrics()
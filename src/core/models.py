@@ -1,5 +1,6 @@
 from __future__ import annotations
 from typing import Optional, List
+from dataclasses import dataclass
 from pydantic import BaseModel, HttpUrl, Field
 
 
@@ -28,3 +29,79 @@ class Event(BaseModel):
     description: Optional[str] = None
     images: Optional[List[HttpUrl]] = None
     fetched_at: str = Field(..., description="ISO8601 time of fetch")
+
+
+# Внутреннее представление события на время обхода: без валидации и копирования полей.
+# Event (pydantic, с проверкой URL) строится только для того, что уходит на выход — после дедупликации.
+@dataclass(slots=True)
+class VenueRecord:
+    name: str
+    address: Optional[str] = None
+    lat: Optional[float] = None
+    lon: Optional[float] = None
+
+
+@dataclass(slots=True)
+class EventRecord:
+    title: str
+    start_dt: str
+    venue: VenueRecord
+    link: str
+    source: str
+    fetched_at: str
+    end_dt: Optional[str] = None
+    city: Optional[str] = None
+    category: Optional[str] = None
+    price_min_byn: Optional[float] = None
+    price_max_byn: Optional[float] = None
+    is_free: Optional[bool] = None
+    age: Optional[str] = None
+    source_uid: Optional[str] = None
+    cover_url: Optional[str] = None
+    description: Optional[str] = None
+    images: Optional[List[str]] = None
+
+    def to_event(self) -> Event:
+        v = self.venue
+        return Event(
+            title=self.title,
+            start_dt=self.start_dt,
+            end_dt=self.end_dt,
+            venue=Venue.model_construct(name=v.name, address=v.address, lat=v.lat, lon=v.lon),
+            city=self.city,
+            category=self.category,
+            price_min_byn=self.price_min_byn,
+            price_max_byn=self.price_max_byn,
+            is_free=self.is_free,
+            age=self.age,
+            link=self.link,
+            source=self.source,
+            source_uid=self.source_uid,
+            cover_url=self.cover_url,
+            description=self.description,
+            images=self.images,
+            fetched_at=self.fetched_at,
+        )
+
+    @classmethod
+    def from_event(cls, e: Event) -> "EventRecord":
+        v = e.venue
+        return cls(
+            title=e.title,
+            start_dt=e.start_dt,
+            end_dt=e.end_dt,
+            venue=VenueRecord(name=v.name, address=v.address, lat=v.lat, lon=v.lon),
+            city=e.city,
+            category=e.category,
+            price_min_byn=e.price_min_byn,
+            price_max_byn=e.price_max_byn,
+            is_free=e.is_free,
+            age=e.age,
+            link=str(e.link),
+            source=e.source,
+            source_uid=e.source_uid,
+            cover_url=str(e.cover_url) if e.cover_url else None,
+            description=e.description,
+            images=[str(u) for u in e.images] if e.images else None,
+            fetched_at=e.fetched_at,
+        )
@@ -0,0 +1,103 @@
+from __future__ import annotations
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from dataclasses import dataclass, field
+from datetime import date
+
+from src.core.geocode import Geocoder
+from src.core.models import EventRecord
+from src.utils.parse import parse_age, parse_datetime, parse_price_byn
+
+Price = Tuple[Optional[float], Optional[float], Optional[bool]]
+
+
+@dataclass(slots=True)
+class RawEvent:
+    # Событие до нормализации: всё, кроме дат/цены/возраста, уже разобрано; эти поля — сырые строки
+    record: EventRecord
+    # кандидаты в порядке приоритета; побеждает первый, который разобрался
+    start: List[str] = field(default_factory=list)
+    end: List[str] = field(default_factory=list)
+    # узлы с датами: первое значение — начало (если его ещё нет), следующее — окончание
+    date_nodes: List[str] = field(default_factory=list)
+    date_nodes_always: bool = False
+    start_fallback: List[str] = field(default_factory=list)
+    price: Optional[str] = None
+    age: Optional[str] = None
+    # название площадки как есть (в record оно уже заменено на "Unknown", если пустое)
+    venue_query: str = ""
+    # «сегодня» на момент разбора (день скачивания при reparse): из него берётся год у дат без года
+    today: Optional[date] = None
+
+    def date_texts(self) -> Iterable[str]:
+        yield from self.start
+        yield from self.end
+        yield from self.date_nodes
+        yield from self.start_fallback
+
+
+class Normalizer:
+    # Пакетная нормализация: строки цен, возрастов и дат собираются по всей пачке событий,
+    # одинаковые разбираются один раз (форматы дат и тексты цен сильно повторяются).
+    # Экземпляр можно держать между пачками — кэш копится, пока не превысит max_cached строк.
+    # Геокодирование тоже здесь: только для событий, у которых разобралась дата начала.
+    def __init__(self, geocoder: Geocoder, max_cached: int = 100_000):
+        self.geocoder = geocoder
+        self.max_cached = max_cached
+        # даты — по (день отсчёта, строка): «14.06 19:00» в пачке из архивов разных лет разбирается по-разному
+        self.dates: Dict[Tuple[Optional[date], str], Optional[str]] = {}
+        self.prices: Dict[str, Price] = {}
+        self.ages: Dict[str, Optional[str]] = {}
+
+    def normalize(self, raws: Sequence[Optional[RawEvent]]) -> List[Optional[EventRecord]]:
+        present = [raw for raw in raws if raw is not None]
+        if len(self.dates) + len(self.prices) + len(self.ages) > self.max_cached:
+            self.dates.clear()
+            self.prices.clear()
+            self.ages.clear()
+        self._bulk(
+            self.dates,
+            ((raw.today, t) for raw in present for t in raw.date_texts()),
+            lambda key: parse_datetime(key[1], key[0]),
+        )
+        self._bulk(self.prices, (raw.price for raw in present if raw.price), parse_price_byn)
+        self._bulk(self.ages, (raw.age for raw in present if raw.age), parse_age)
+        return [None if raw is None else self._finish(raw) for raw in raws]
+
+    def _bulk(self, cache: Dict, texts: Iterable, parse: Callable) -> None:
+        # колонка целиком: сначала уникальные ещё не виденные строки, потом один разбор на каждую
+        fresh = dict.fromkeys(t for t in texts if t not in cache)
+        for text in fresh:
+            cache[text] = parse(text)
+
+    def _first(self, texts: List[str], today: Optional[date]) -> Optional[str]:
+        dates = self.dates
+        for text in texts:
+            value = dates[(today, text)]
+            if value:
+                return value
+        return None
+
+    def _finish(self, raw: RawEvent) -> Optional[EventRecord]:
+        start_dt = self._first(raw.start, raw.today)
+        end_dt = self._first(raw.end, raw.today)
+        if raw.date_nodes_always or not start_dt:
+            for text in raw.date_nodes:
+                val = self.dates[(raw.today, text)]
+                if val and not start_dt:
+                    start_dt = val
+                elif val and not end_dt:
+                    end_dt = val
+        start_dt = start_dt or self._first(raw.start_fallback, raw.today)
+        if not start_dt:
+            return None
+
+        record = raw.record
+        venue = record.venue
+        venue.lat, venue.lon = self.geocoder.geocode(venue.address or raw.venue_query, record.city)
+        record.start_dt = start_dt
+        record.end_dt = end_dt
+        if raw.price:
+            record.price_min_byn, record.price_max_byn, record.is_free = self.prices[raw.price]
+        if raw.age:
+            record.age = self.ages[raw.age]
+        return record
@@ -0,0 +1,251 @@
+from __future__ import annotations
+from typing import Any, Dict, IO, Iterable, Iterator, List, Optional
+from dataclasses import asdict, is_dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+import gzip
+import io
+import json
+import os
+import time
+
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:  # zstd — необязательная зависимость
+    zstandard = None
+
+COMPRESSIONS = ("none", "gzip", "zstd")
+SUFFIXES = {"none": "", "gzip": ".gz", "zstd": ".zst"}
+BATCH_SIZE = 1000
+
+
+def encode(record: Any) -> bytes:
+    # pydantic сериализует модель сам (rust), остальное — orjson, если он установлен
+    if isinstance(record, BaseModel):
+        return record.model_dump_json().encode("utf-8")
+    if orjson is not None:
+        return orjson.dumps(record)
+    if is_dataclass(record):
+        record = asdict(record)
+    return json.dumps(record, ensure_ascii=False, default=str).encode("utf-8")
+
+
+def compression_for(path: str, compression: Optional[str] = None) -> str:
+    if compression:
+        return compression
+    if path.endswith(".gz"):
+        return "gzip"
+    if path.endswith(".zst"):
+        return "zstd"
+    return "none"
+
+
+def _open_text(path: Path) -> IO[str]:
+    compression = compression_for(str(path))
+    if compression == "gzip":
+        return gzip.open(path, "rt", encoding="utf-8")
+    if compression == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstd input needs zstandard: pip install zstandard")
+        raw = open(path, "rb")
+        reader = zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True, closefd=True)
+        return io.TextIOWrapper(reader, encoding="utf-8")
+    return open(path, encoding="utf-8")
+
+
+def output_files(path: str) -> List[Path]:
+    # Файлы, которые JsonlWriter записал под этим именем: сам path, path с суффиксом сжатия
+    # или шарды из манифеста (как при --out x.jsonl --compress gzip [--shard-mb N])
+    p = Path(path)
+    if p.exists():
+        return [p]
+    base = p
+    for suffix in SUFFIXES.values():
+        if suffix and p.name.endswith(suffix):
+            base = p.with_name(p.name[: -len(suffix)])
+    manifest = base.with_name(base.name + ".manifest.json")
+    if manifest.exists():
+        shards = json.loads(manifest.read_text(encoding="utf-8"))["shards"]
+        return [base.with_name(s["file"]) for s in shards]
+    for suffix in SUFFIXES.values():
+        candidate = base.with_name(base.name + suffix)
+        if candidate.exists():
+            return [candidate]
+    return []
+
+
+def read_jsonl(path: str) -> Iterator[Dict[str, Any]]:
+    for file in output_files(path):
+        with _open_text(file) as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def _atomic_write_text(path: Path, text: str) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+class _Shard:
+    # Один файл: пишем в <name>.tmp, при закрытии fsync и rename — читатель не увидит недописанный файл
+    def __init__(self, path: Path, compression: str, level: Optional[int]):
+        self.path = path
+        self.tmp = path.with_name(path.name + ".tmp")
+        self.raw = open(self.tmp, "wb")
+        if compression == "gzip":
+            self.stream = gzip.GzipFile(fileobj=self.raw, mode="wb", compresslevel=level or 6, mtime=0)
+        elif compression == "zstd":
+            if zstandard is None:
+                self.raw.close()
+                self.tmp.unlink()
+                raise RuntimeError("zstd output needs zstandard: pip install zstandard")
+            cctx = zstandard.ZstdCompressor(level=level or 3)
+            self.stream = cctx.stream_writer(self.raw, closefd=False)
+        else:
+            self.stream = self.raw
+        self.opened = time.monotonic()
+        self.rows = 0
+        self.raw_bytes = 0
+
+    @property
+    def size(self) -> int:
+        # сжатый размер на диске (с точностью до буфера компрессора)
+        return self.raw.tell()
+
+    def write(self, data: bytes, rows: int, flush: bool = False) -> None:
+        self.stream.write(data)
+        if flush and self.stream is not self.raw:
+            # иначе компрессор держит данные в буфере и размер шарда на диске не растёт
+            self.stream.flush()
+        self.rows += rows
+        self.raw_bytes += len(data)
+
+    def close(self) -> Dict[str, Any]:
+        if self.stream is not self.raw:
+            self.stream.close()
+        self.raw.flush()
+        os.fsync(self.raw.fileno())
+        size = self.raw.tell()
+        self.raw.close()
+        os.replace(self.tmp, self.path)
+        return {
+            "file": self.path.name,
+            "rows": self.rows,
+            "bytes": size,
+            "raw_bytes": self.raw_bytes,
+            "closed_at": datetime.now(timezone.utc).isoformat(),
+        }
+
+
+class JsonlWriter:
+    # JSONL со сжатием и ротацией. Без ротации — один файл path (атомарно),
+    # с ротацией — path-00001.jsonl.gz, ... и манифест path.manifest.json со списком готовых шардов.
+    def __init__(
+        self,
+        path: str,
+        compression: Optional[str] = None,
+        shard_bytes: Optional[int] = None,
+        shard_seconds: Optional[float] = None,
+        batch_size: int = BATCH_SIZE,
+        level: Optional[int] = None,
+    ):
+        self.compression = compression_for(path, compression)
+        if self.compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression: {self.compression}")
+        suffix = SUFFIXES[self.compression]
+        if suffix and path.endswith(suffix):
+            path = path[: -len(suffix)]
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.suffix = suffix
+        self.sharded = bool(shard_bytes or shard_seconds)
+        self.shard_bytes = shard_bytes
+        self.shard_seconds = shard_seconds
+        self.batch_size = batch_size
+        self.level = level
+        self.shards: List[Dict[str, Any]] = []
+        self.rows = 0
+        self._batch: List[bytes] = []
+        self._shard: Optional[_Shard] = None
+
+    @property
+    def files(self) -> List[Path]:
+        # реально записанные файлы (с суффиксом сжатия и номером шарда)
+        return [self.path.with_name(s["file"]) for s in self.shards]
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.path.with_name(self.path.name + ".manifest.json")
+
+    def _shard_path(self) -> Path:
+        if not self.sharded:
+            return self.path.with_name(self.path.name + self.suffix)
+        stem, ext = (self.path.stem, self.path.suffix) if self.path.suffix else (self.path.name, ".jsonl")
+        return self.path.with_name(f"{stem}-{len(self.shards) + 1:05d}{ext}{self.suffix}")
+
+    def write(self, records: Iterable[Any]) -> None:
+        for record in records:
+            self._batch.append(encode(record))
+            if len(self._batch) >= self.batch_size:
+                self._flush()
+
+    def _flush(self) -> None:
+        if not self._batch:
+            return
+        if self._shard is None:
+            self._shard = _Shard(self._shard_path(), self.compression, self.level)
+        self._shard.write(b"\n".join(self._batch) + b"\n", len(self._batch), flush=bool(self.shard_bytes))
+        self.rows += len(self._batch)
+        self._batch = []
+        if self.sharded and self._should_rotate():
+            self._rotate()
+
+    def flush(self) -> None:
+        # для долгоживущего писателя: сбросить буфер и закрыть шард, если он превысил размер/возраст
+        self._flush()
+        if self.sharded and self._shard is not None and self._should_rotate():
+            self._rotate()
+
+    def _should_rotate(self) -> bool:
+        shard = self._shard
+        if self.shard_bytes and shard.size >= self.shard_bytes:
+            return True
+        return bool(self.shard_seconds and time.monotonic() - shard.opened >= self.shard_seconds)
+
+    def _rotate(self) -> None:
+        if self._shard is None:
+            return
+        self.shards.append(self._shard.close())
+        self._shard = None
+        if self.sharded:
+            self._write_manifest()
+
+    def _write_manifest(self) -> None:
+        manifest = {
+            "compression": self.compression,
+            "rows": sum(s["rows"] for s in self.shards),
+            "shards": self.shards,
+        }
+        _atomic_write_text(self.manifest_path, json.dumps(manifest, ensure_ascii=False, indent=2))
+
+    def close(self) -> None:
+        self._flush()
+        if self._shard is None and not self.shards:
+            # пустой прогон — всё равно создаём (пустой) файл, как раньше делал write_jsonl
+            self._shard = _Shard(self._shard_path(), self.compression, self.level)
+        self._rotate()
+
+    def __enter__(self) -> "JsonlWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,296 @@
+from __future__ import annotations
+from typing import Dict, Iterator, List, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timezone
+from pathlib import Path
+import gzip
+import hashlib
+import importlib
+import json
+import os
+import threading
+
+from src.core.metrics import METRICS
+from src.core.models import EventRecord
+
+try:
+    import zstandard
+except ImportError:  # без zstandard архив пишется в gzip
+    zstandard = None
+
+# Модули адаптеров по имени источника — для reparse нужен только их план разбора (PLAN)
+ADAPTER_MODULES = {
+    "relax": "src.adapters.relax",
+    "bezkassira": "src.adapters.bez_kassira",
+    "ticketpro": "src.adapters.ticketpro",
+    "belarus.by": "src.adapters.belarus_by",
+    "minsktourism": "src.adapters.minsk_tourism",
+    "virtualbrest": "src.adapters.virtualbrest",
+    "vitebsk.biz": "src.adapters.vitebsk_biz",
+}
+
+DICT_SIZE = 112_640
+# reparse отдаёт воркеру пачку страниц: даты/цены/возраст нормализуются пачкой с дедупликацией строк
+REPARSE_BATCH = 2000
+LEVEL = 9
+
+
+class PageArchive:
+    # Контентно-адресуемый архив сырого HTML детальных страниц:
+    #   objects/ab/cdef...zst — тело, ключ sha256 от содержимого (одинаковые страницы хранятся один раз)
+    #   index.jsonl          — url, источник, хеш, время fetch, словарь сжатия
+    #   dicts/<source>-N.dict — обученные zstd-словари (страницы одного источника сделаны по одному шаблону)
+    def __init__(self, root: str, level: int = LEVEL):
+        self.root = Path(root)
+        self.objects = self.root / "objects"
+        self.dicts = self.root / "dicts"
+        self.index_path = self.root / "index.jsonl"
+        self.objects.mkdir(parents=True, exist_ok=True)
+        self.dicts.mkdir(parents=True, exist_ok=True)
+        self.level = level
+        self.codec = "zstd" if zstandard is not None else "gzip"
+        self._lock = threading.Lock()
+        self._compressors: Dict[str, Tuple[Optional[str], object]] = {}
+        self._decompressors: Dict[Optional[str], object] = {}
+        self._dict_ids: Dict[int, str] = {}
+
+    def _latest_dict(self, source: str) -> Optional[str]:
+        versions = sorted(
+            self.dicts.glob(f"{source}-*.dict"),
+            key=lambda p: int(p.stem.rsplit("-", 1)[1]),
+        )
+        return versions[-1].name if versions else None
+
+    def _load_dict(self, name: str):
+        return zstandard.ZstdCompressionDict((self.dicts / name).read_bytes())
+
+    def _dict_of(self, blob: bytes) -> Optional[str]:
+        # Словарь, которым на самом деле сжат объект: его id записан в заголовке zstd-фрейма.
+        # По индексу верить нельзя — повторная запись того же содержимого объект не перезаписывает.
+        dict_id = zstandard.get_frame_parameters(blob[:18]).dict_id
+        if not dict_id:
+            return None
+        with self._lock:
+            if dict_id not in self._dict_ids:
+                for path in self.dicts.glob("*.dict"):
+                    self._dict_ids[self._load_dict(path.name).dict_id()] = path.name
+            name = self._dict_ids.get(dict_id)
+        if name is None:
+            raise LookupError(f"zstd dictionary {dict_id} not found in {self.dicts}")
+        return name
+
+    def _compressor(self, source: str) -> Tuple[Optional[str], object]:
+        with self._lock:
+            if source not in self._compressors:
+                name = self._latest_dict(source)
+                cdict = self._load_dict(name) if name else None
+                self._compressors[source] = (name, zstandard.ZstdCompressor(level=self.level, dict_data=cdict))
+            return self._compressors[source]
+
+    def _object_path(self, digest: str, codec: str) -> Path:
+        return self.objects / digest[:2] / (digest[2:] + (".zst" if codec == "zstd" else ".gz"))
+
+    def put(self, url: str, source: str, html: str, rendered: bool = False) -> str:
+        data = html.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        codec = self.codec
+        dict_name = None
+        path = self._object_path(digest, codec)
+        if path.exists():
+            if codec == "zstd":
+                with open(path, "rb") as f:
+                    dict_name = self._dict_of(f.read(18))
+            METRICS.inc("pages_archived", source=source, result="duplicate")
+        else:
+            if codec == "zstd":
+                dict_name, cctx = self._compressor(source)
+                blob = cctx.compress(data)
+            else:
+                blob = gzip.compress(data, mtime=0)
+            path.parent.mkdir(exist_ok=True)
+            tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_bytes(blob)
+            os.replace(tmp, path)
+            METRICS.inc("pages_archived", source=source, result="new")
+            METRICS.inc("pages_archived_bytes", len(blob), source=source)
+        entry = {
+            "url": url,
+            "source": source,
+            "sha256": digest,
+            "codec": codec,
+            "dict": dict_name,
+            "rendered": rendered,
+            "fetched_at": datetime.now(timezone.utc).isoformat(),
+        }
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock, open(self.index_path, "a", encoding="utf-8") as f:
+            f.write(line)
+        return digest
+
+    def get(self, entry: Dict[str, object]) -> str:
+        digest, codec = str(entry["sha256"]), str(entry.get("codec") or "zstd")
+        blob = self._object_path(digest, codec).read_bytes()
+        if codec == "gzip":
+            return gzip.decompress(blob).decode("utf-8")
+        name = self._dict_of(blob)
+        if name not in self._decompressors:
+            ddict = self._load_dict(str(name)) if name else None
+            self._decompressors[name] = zstandard.ZstdDecompressor(dict_data=ddict)
+        return self._decompressors[name].decompress(blob).decode("utf-8")
+
+    def entries(self, sources: Optional[List[str]] = None, since: Optional[date] = None) -> List[Dict[str, object]]:
+        # последняя запись на каждый URL
+        latest: Dict[str, Dict[str, object]] = {}
+        if not self.index_path.exists():
+            return []
+        with open(self.index_path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                if sources and entry["source"] not in sources:
+                    continue
+                if since and entry["fetched_at"][:10] < since.isoformat():
+                    continue
+                latest[entry["url"]] = entry
+        return list(latest.values())
+
+    def train_dictionary(self, source: str, samples: int = 2000, size: int = DICT_SIZE) -> Optional[str]:
+        # Новый словарь получает следующий номер: старые объекты остаются читаемыми своим словарём
+        if zstandard is None:
+            raise RuntimeError("dictionary training needs zstandard: pip install zstandard")
+        entries = self.entries([source])[-samples:]
+        data = [self.get(e).encode("utf-8") for e in entries]
+        if len(data) < 8:
+            return None
+        trained = zstandard.train_dictionary(size, data, level=self.level)
+        current = self._latest_dict(source)
+        version = int(Path(current).stem.rsplit("-", 1)[1]) + 1 if current else 1
+        name = f"{source}-{version}.dict"
+        (self.dicts / name).write_bytes(trained.as_bytes())
+        with self._lock:
+            self._compressors.pop(source, None)
+        return name
+
+
+# --- reparse: текущие адаптеры по архиву, офлайн и параллельно по ядрам ---
+
+_WORKER_ARCHIVE: Optional[PageArchive] = None
+_WORKER_NORMALIZER = None
+
+
+def _init_worker(root: str) -> None:
+    from src.core.geocode import DummyGeocoder
+    from src.core.normalize import Normalizer
+
+    global _WORKER_ARCHIVE, _WORKER_NORMALIZER
+    _WORKER_ARCHIVE = PageArchive(root)
+    # кэш нормализованных строк живёт весь процесс: форматы дат и цены повторяются и между пачками
+    _WORKER_NORMALIZER = Normalizer(DummyGeocoder())
+
+
+def _extract_one(entry: Dict[str, object]):
+    from src.core.frontier import set_reference_date
+
+    source = str(entry["source"])
+    fetched_at = str(entry["fetched_at"])
+    # нечитаемый объект (нет файла, не тот словарь) — не «страница без события»: о нём сообщает reparse
+    html = _WORKER_ARCHIVE.get(entry)
+    try:
+        module = importlib.import_module(ADAPTER_MODULES[source])
+        # годы у дат без года считаются от дня, когда страница была скачана
+        set_reference_date(date.fromisoformat(fetched_at[:10]))
+        raw = module.PLAN.extract(str(entry["url"]), html)
+    except Exception:
+        return None
+    if raw is not None:
+        raw.record.fetched_at = fetched_at
+    return raw
+
+
+def _reparse_batch(
+    entries: List[Dict[str, object]],
+) -> Tuple[List[Optional[EventRecord]], List[Tuple[str, str, str]]]:
+    raws = []
+    unreadable: List[Tuple[str, str, str]] = []
+    for entry in entries:
+        try:
+            raws.append(_extract_one(entry))
+        except Exception as exc:
+            raws.append(None)
+            unreadable.append((str(entry["source"]), str(entry["url"]), f"{type(exc).__name__}: {exc}"))
+    try:
+        return _WORKER_NORMALIZER.normalize(raws), unreadable
+    except Exception:
+        return [None] * len(entries), unreadable
+
+
+def reparse(
+    root: str,
+    sources: Optional[List[str]] = None,
+    since: Optional[date] = None,
+    workers: Optional[int] = None,
+    batch: int = REPARSE_BATCH,
+) -> Iterator[Optional[EventRecord]]:
+    entries = PageArchive(root).entries(sources, since)
+    # небольшой архив всё равно делится между всеми процессами
+    per_worker = -(-len(entries) // ((workers or os.cpu_count() or 1) * 4))
+    size = max(32, min(batch, per_worker))
+    batches = [entries[i:i + size] for i in range(0, len(entries), size)]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(root,)) as pool:
+        for records, unreadable in pool.map(_reparse_batch, batches):
+            for source, url, error in unreadable:
+                METRICS.inc("reparse_unreadable", source=source)
+                print(f"reparse: cannot read archived page {url} ({error})")
+            yield from records
+
+
+def main() -> None:
+    import argparse
+    import time
+
+    from src.runner import emit_events, write_jsonl
+
+    parser = argparse.ArgumentParser(description="Raw page archive: re-parse offline, train zstd dictionaries")
+    sub = parser.add_subparsers(dest="command", required=True)
+    rp = sub.add_parser("reparse", help="run the current adapters over archived pages")
+    rp.add_argument("--archive", type=str, default="data/pages")
+    rp.add_argument("--out", type=str, required=True)
+    rp.add_argument("--sources", type=str, default=None, help="comma-separated sources")
+    rp.add_argument("--since", type=date.fromisoformat, default=None, metavar="YYYY-MM-DD")
+    rp.add_argument("--workers", type=int, default=None, help="processes (default: CPU count)")
+    rp.add_argument("--batch", type=int, default=REPARSE_BATCH, help="pages per worker task (normalized together)")
+    tr = sub.add_parser("train", help="train a zstd dictionary per source from archived pages")
+    tr.add_argument("--archive", type=str, default="data/pages")
+    tr.add_argument("--sources", type=str, default=",".join(ADAPTER_MODULES))
+    tr.add_argument("--samples", type=int, default=2000)
+    args = parser.parse_args()
+
+    sources = [s.strip() for s in args.sources.split(",") if s.strip()] if args.sources else None
+    if args.command == "train":
+        archive = PageArchive(args.archive)
+        for source in sources:
+            name = archive.train_dictionary(source, args.samples)
+            print(f"{source}: {name or 'not enough pages'}")
+        return
+
+    t0 = time.perf_counter()
+    pages = 0
+    records: List[EventRecord] = []
+    for record in reparse(args.archive, sources, args.since, args.workers, args.batch):
+        pages += 1
+        if record is not None:
+            records.append(record)
+    events = emit_events(records)
+    write_jsonl(args.out, events)
+    unreadable = sum(
+        int(METRICS.counter_value("reparse_unreadable", source=source)) for source in sources or ADAPTER_MODULES
+    )
+    print(
+        f"Re-parsed {pages} pages into {len(events)} events in {time.perf_counter() - t0:.1f}s -> {args.out}"
+        + (f" ({unreadable} unreadable)" if unreadable else "")
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+from __future__ import annotations
+from typing import Any, Callable, List, Optional, Tuple, Union
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+import json
+
+from bs4 import Tag
+
+from src.core.frontier import reference_date
+from src.core.geocode import Geocoder
+from src.core.models import EventRecord, VenueRecord
+from src.core.normalize import Normalizer, RawEvent
+from src.utils.parse import (
+    clean_text,
+    clip_text,
+    extract_description,
+    image_sources,
+    make_soup,
+)
+from src.utils.selectors import Matches, SelectorSet
+
+# Общие для адаптеров списки селекторов
+JSONLD = 'script[type="application/ld+json"]'
+DATES = "time, .date, .event-date"
+VENUE = ".venue, .place, .location a, .location"
+ADDRESS = ".address, .place-address, .venue-address"
+DESCRIPTION = ".description, .event-description, article, .content"
+OG_IMAGE = 'meta[property="og:image"]'
+
+
+def join_text(nodes: List[Tag]) -> Optional[str]:
+    # текст всех совпадений (цены из нескольких блоков)
+    return " ".join(n.get_text() for n in nodes)
+
+
+def description(nodes: List[Tag]) -> Optional[str]:
+    return extract_description(nodes[0])
+
+
+@dataclass(frozen=True)
+class Css:
+    # первое совпадение группы в порядке документа: текст или значение attr;
+    # pick получает все совпадения и сам выбирает значение
+    selector: str
+    attr: Optional[str] = None
+    pick: Optional[Callable[[List[Tag]], Optional[str]]] = None
+
+
+@dataclass(frozen=True)
+class JsonLd:
+    # поле объекта Event из JSON-LD, путь через точку: "location.address.addressLocality"
+    path: str
+    pick: Optional[Callable[[str], Optional[str]]] = None
+
+
+@dataclass(frozen=True)
+class Const:
+    value: Optional[str]
+
+
+# описание из JSON-LD обрезается до бюджета, из узла — собирается extract_description без служебных блоков
+JSONLD_DESCRIPTION = JsonLd("description", pick=clip_text)
+
+Fallback = Union[Css, JsonLd, Const]
+Fallbacks = Tuple[Fallback, ...]
+
+
+@dataclass
+class DetailPlan:
+    # Декларативный разбор детальной страницы: поле -> упорядоченные варианты (первый непустой побеждает).
+    # Селекторы компилируются один раз при импорте адаптера, документ обходится одним проходом.
+    source: str
+    title: Fallbacks = (Css("h1"),)
+    start: Fallbacks = ()
+    end: Fallbacks = ()
+    # узлы с датами: первое значение — начало (если его ещё нет), следующее — окончание
+    date_nodes: Optional[str] = DATES
+    # False — узлы смотрятся, только если start не нашёлся; True — всегда (добирают end)
+    date_nodes_always: bool = False
+    # последний шанс для начала, после узлов дат (meta)
+    start_fallback: Fallbacks = ()
+    venue: Fallbacks = ()
+    address: Fallbacks = ()
+    city: Fallbacks = ()
+    category: Fallbacks = ()
+    price: Fallbacks = ()
+    age: Fallbacks = ()
+    cover: Fallbacks = (Css(OG_IMAGE, attr="content"),)
+    images: Optional[str] = "img"
+    description: Fallbacks = ()
+    selectors: SelectorSet = field(init=False, repr=False)
+    uses_jsonld: bool = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        fallbacks = [fb for name in _FIELDS for fb in getattr(self, name)]
+        single = [fb.selector for fb in fallbacks if isinstance(fb, Css) and fb.pick is None]
+        multi = [fb.selector for fb in fallbacks if isinstance(fb, Css) and fb.pick is not None]
+        multi += [sel for sel in (self.date_nodes, self.images) if sel]
+        self.uses_jsonld = any(isinstance(fb, JsonLd) for fb in fallbacks)
+        if self.uses_jsonld:
+            multi.append(JSONLD)
+        self.selectors = SelectorSet(single + multi, first_only=set(single) - set(multi))
+
+    def parse(self, url: str, html: str, geocoder: Geocoder) -> Optional[EventRecord]:
+        return Normalizer(geocoder).normalize([self.extract(url, html)])[0]
+
+    def extract(self, url: str, html: str) -> Optional[RawEvent]:
+        # Разбор без нормализации дат/цены/возраста: их сырые строки доводит Normalizer пачкой
+        doc = self.selectors.select(make_soup(html))
+        jsonld = _jsonld_event(doc.all(JSONLD)) if self.uses_jsonld else None
+
+        def first(fallbacks: Fallbacks, normalize: Callable[[Any], Any] = clean_text) -> Any:
+            for fb in fallbacks:
+                value = _resolve(fb, doc, jsonld)
+                if value is not None:
+                    value = normalize(value) if normalize else value
+                    if value:
+                        return value
+            return None
+
+        def texts(fallbacks: Fallbacks) -> List[str]:
+            return [value for fb in fallbacks if (value := _resolve(fb, doc, jsonld))]
+
+        title = first(self.title)
+        if not title:
+            return None
+
+        venue_name = first(self.venue) or ""
+        venue_address = first(self.address)
+        city = first(self.city)
+        images = image_sources(doc.all(self.images)) if self.images else []
+
+        record = EventRecord(
+            title=title,
+            start_dt="",
+            venue=VenueRecord(name=venue_name or "Unknown", address=venue_address),
+            city=city,
+            category=first(self.category),
+            link=url,
+            source=self.source,
+            source_uid=None,
+            cover_url=first(self.cover, str.strip),
+            description=first(self.description, None),
+            images=images or None,
+            fetched_at=datetime.now(timezone.utc).isoformat(),
+        )
+        return RawEvent(
+            record,
+            start=texts(self.start),
+            end=texts(self.end),
+            date_nodes=[clean_text(node.get_text()) for node in doc.all(self.date_nodes)] if self.date_nodes else [],
+            date_nodes_always=self.date_nodes_always,
+            start_fallback=texts(self.start_fallback),
+            price=first(self.price),
+            age=first(self.age),
+            venue_query=venue_name,
+            today=reference_date(),
+        )
+
+
+_FIELDS = (
+    "title", "start", "end", "start_fallback", "venue", "address", "city",
+    "category", "price", "age", "cover", "description",
+)
+
+
+def _jsonld_event(scripts: List[Tag]) -> Optional[dict]:
+    for script in scripts:
+        try:
+            data = json.loads(script.get_text() or "{}")
+        except ValueError:
+            continue
+        if isinstance(data, dict) and data.get("@type") == "Event":
+            return data
+    return None
+
+
+def _resolve(fb: Fallback, doc: Matches, jsonld: Optional[dict]) -> Optional[str]:
+    if isinstance(fb, Const):
+        return fb.value
+    if isinstance(fb, JsonLd):
+        value: Any = jsonld
+        for key in fb.path.split("."):
+            value = value.get(key) if isinstance(value, dict) else None
+        if not isinstance(value, str):
+            return None
+        return fb.pick(value) if fb.pick else value
+    if fb.pick is not None:
+        nodes = doc.all(fb.selector)
+        return fb.pick(nodes) if nodes else None
+    node = doc.first(fb.selector)
+    if node is None:
+        return None
+    if fb.attr is None:
+        return node.get_text()
+    value = node.get(fb.attr)
+    return " ".join(value) if isinstance(value, list) else value
+
@@ -0,0 +1,272 @@
+from __future__ import annotations
+from typing import Dict, Iterator, List, Optional, Tuple
+from contextlib import contextmanager
+from pathlib import Path
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+
+PROFILE_MODES = ("cprofile", "sample", "tracemalloc")
+
+
+def _frame_label(code) -> str:
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(";", ",")
+
+
+def source_threads(source: str) -> Tuple[str, ...]:
+    # рабочие потоки источника из crawl: пул детальных страниц и фоновая пагинация листинга
+    return (f"detail-{source}_", f"listing-{source}")
+
+
+class StackSampler:
+    # Семплирующий профайлер на stdlib: периодически снимает стеки целевого потока и потоков,
+    # чьи имена начинаются с thread_prefixes; корень стека — роль потока (для flamegraph)
+    def __init__(
+        self, thread_id: Optional[int] = None, interval: float = 0.005,
+        thread_prefixes: Tuple[str, ...] = (), root: str = "main",
+    ):
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.interval = interval
+        self.thread_prefixes = thread_prefixes
+        self.root = root
+        self.stacks: Dict[str, int] = {}
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def _targets(self) -> Dict[int, str]:
+        targets = {self.thread_id: self.root}
+        if self.thread_prefixes:
+            for t in threading.enumerate():
+                if t.ident is not None and t.name.startswith(self.thread_prefixes):
+                    targets[t.ident] = t.name.split("_")[0]
+        return targets
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            frames = sys._current_frames()
+            for ident, role in self._targets().items():
+                frame = frames.get(ident)
+                if frame is None:
+                    continue
+                labels: List[str] = []
+                while frame is not None:
+                    labels.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                labels.append(role)
+                key = ";".join(reversed(labels))
+                self.stacks[key] = self.stacks.get(key, 0) + 1
+                self.samples += 1
+            time.sleep(self.interval)
+
+    def write_collapsed(self, path: Path) -> None:
+        write_collapsed(self.stacks, path)
+
+    def top(self, n: int) -> List[Tuple[str, int]]:
+        inclusive: Dict[str, int] = {}
+        for stack, count in self.stacks.items():
+            for label in set(stack.split(";")):
+                inclusive[label] = inclusive.get(label, 0) + count
+        return sorted(inclusive.items(), key=lambda kv: -kv[1])[:n]
+
+
+def _pstats_label(func: Tuple[str, int, str]) -> str:
+    filename, line, name = func
+    if filename == "~":  # встроенные функции
+        return name.replace(";", ",")
+    return f"{name} ({os.path.basename(filename)}:{line})".replace(";", ",")
+
+
+def collapsed_from_pstats(stats: pstats.Stats, root: str, min_us: int = 1) -> Dict[str, int]:
+    # pstats хранит только рёбра вызывающий -> вызываемый, а не целые стеки. Стеки восстанавливаются
+    # обходом графа от корней: собственное время функции делится между путями пропорционально
+    # cumtime рёбер, по которым в неё пришли. Вес — микросекунды; рекурсия обрывается на повторе функции.
+    children: Dict[Tuple, List[Tuple[Tuple, float]]] = {}
+    roots = []
+    for func, (_, _, _, _, callers) in stats.stats.items():
+        known = [caller for caller in callers if caller in stats.stats]
+        if not known:
+            roots.append(func)
+        for caller in known:
+            children.setdefault(caller, []).append((func, callers[caller][3]))
+    stacks: Dict[str, int] = {}
+    todo = [(func, (func,), 1.0) for func in roots]
+    while todo:
+        func, path, share = todo.pop()
+        _, _, tt, ct, _ = stats.stats[func]
+        own = int(tt * share * 1e6)
+        if own >= min_us:
+            key = ";".join([root] + [_pstats_label(f) for f in path])
+            stacks[key] = stacks.get(key, 0) + own
+        for child, edge_ct in children.get(func, []):
+            child_ct = stats.stats[child][3]
+            if child in path or child_ct <= 0:
+                continue
+            child_share = share * min(edge_ct / child_ct, 1.0)
+            if child_ct * child_share * 1e6 >= min_us:
+                todo.append((child, path + (child,), child_share))
+    return stacks
+
+
+def write_collapsed(stacks: Dict[str, int], path: Path) -> None:
+    # формат flamegraph.pl / speedscope: "a;b;c <count>"
+    with open(path, "w", encoding="utf-8") as f:
+        for stack, count in sorted(stacks.items(), key=lambda kv: -kv[1]):
+            f.write(f"{stack} {count}\n")
+
+
+class _ThreadProfiles:
+    # cProfile.Profile видит только поток, вызвавший enable(). Хук threading.setprofile срабатывает
+    # в каждом новом потоке: потоку активного источника (по имени) заводится свой Profile,
+    # остальные потоки снимают хук. Источники профилируются параллельно — хук общий, с подсчётом ссылок.
+    def __init__(self):
+        self.sessions: Dict[Tuple[str, ...], List[cProfile.Profile]] = {}
+        self._lock = threading.Lock()
+
+    def start(self, prefixes: Tuple[str, ...]) -> List[cProfile.Profile]:
+        with self._lock:
+            collected = self.sessions[prefixes] = []
+            if len(self.sessions) == 1:
+                threading.setprofile(self._hook)
+        return collected
+
+    def stop(self, prefixes: Tuple[str, ...]) -> None:
+        with self._lock:
+            self.sessions.pop(prefixes, None)
+            if not self.sessions:
+                threading.setprofile(None)
+
+    def _hook(self, frame, event, arg) -> None:
+        name = threading.current_thread().name
+        with self._lock:
+            collected = next((c for p, c in self.sessions.items() if name.startswith(p)), None)
+        if collected is None:
+            sys.setprofile(None)
+            return
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()  # заменяет хук в этом потоке
+        except ValueError:
+            # Python 3.12+: cProfile на sys.monitoring и так видит все потоки, второй профайлер не включить
+            sys.setprofile(None)
+            return
+        with self._lock:
+            collected.append(profiler)
+
+
+THREAD_PROFILES = _ThreadProfiles()
+
+
+class SourceProfiler:
+    def __init__(self, mode: str, out_dir: str, top: int = 25):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode: {mode}")
+        self.mode = mode
+        self.out_dir = Path(out_dir)
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        self.top = top
+
+    @contextmanager
+    def profile(self, source: str) -> Iterator[None]:
+        if self.mode == "tracemalloc":
+            with self._tracemalloc(source):
+                yield
+            return
+        if self.mode == "sample":
+            with self._sampled(source):
+                yield
+            return
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Python 3.12+: cProfile работает через sys.monitoring, и второй профайлер в процессе
+            # не включается — параллельно идущий источник вместо этого семплируется
+            print(f"profile: {source}: another cProfile session is active, sampling instead")
+            with self._sampled(source):
+                yield
+            return
+        prefixes = source_threads(source)
+        workers = THREAD_PROFILES.start(prefixes)
+        try:
+            yield
+        finally:
+            profiler.disable()
+            THREAD_PROFILES.stop(prefixes)
+            self._report_cprofile(source, profiler, workers)
+
+    @contextmanager
+    def _sampled(self, source: str) -> Iterator[None]:
+        sampler = StackSampler(thread_prefixes=source_threads(source), root=source)
+        sampler.start()
+        try:
+            yield
+        finally:
+            sampler.stop()
+            self._report_samples(source, sampler)
+
+    def _report_cprofile(self, source: str, profiler: cProfile.Profile, workers: List[cProfile.Profile]) -> None:
+        buf = io.StringIO()
+        stats = pstats.Stats(profiler, stream=buf)
+        for worker in workers:
+            # потоки источника к этому моменту завершены (пул деталей закрывается внутри обхода)
+            stats.add(worker)
+        stats.dump_stats(str(self.out_dir / f"{source}.pstats"))
+        write_collapsed(collapsed_from_pstats(stats, source), self.out_dir / f"{source}.collapsed")
+        print(f"\n=== profile: {source} ({1 + len(workers)} threads) ===")
+        stats.strip_dirs().sort_stats("cumulative").print_stats(self.top)
+        print(buf.getvalue())
+
+    def _report_samples(self, source: str, sampler: StackSampler) -> None:
+        sampler.write_collapsed(self.out_dir / f"{source}.collapsed")
+        print(f"\n=== profile: {source} ===")
+        print(f"{sampler.samples} samples, top {self.top} by inclusive samples:")
+        for label, count in sampler.top(self.top):
+            print(f"{count:8d} {100.0 * count / max(sampler.samples, 1):6.1f}%  {label}")
+
+    @contextmanager
+    def _tracemalloc(self, source: str) -> Iterator[None]:
+        started_here = not tracemalloc.is_tracing()
+        if started_here:
+            tracemalloc.start(25)
+        tracemalloc.clear_traces()
+        tracemalloc.reset_peak()
+        try:
+            yield
+        finally:
+            current, peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot().filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            ))
+            if started_here:
+                tracemalloc.stop()
+            lines = [
+                f"source: {source}",
+                f"peak: {peak / 1024 / 1024:.1f} MiB, retained: {current / 1024 / 1024:.1f} MiB",
+                f"top {self.top} allocation sites:",
+            ]
+            for stat in snapshot.statistics("lineno")[: self.top]:
+                frame = stat.traceback[0]
+                lines.append(
+                    f"{stat.size / 1024:10.1f} KiB {stat.count:8d} blocks  {frame.filename}:{frame.lineno}"
+                )
+            report = "\n".join(lines)
+            (self.out_dir / f"{source}.tracemalloc.txt").write_text(report + "\n", encoding="utf-8")
+            print(f"\n=== memory: {source} ===\n{report}")
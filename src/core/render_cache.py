@@ -0,0 +1,52 @@
+from __future__ import annotations
+from typing import Optional
+from pathlib import Path
+
+from src.core.frontier import url_pattern
+from src.core.learned import LearnedStore
+
+STATS_PATH = Path("data/render_stats.json")
+
+# Решение принимается, когда у паттерна набралось MIN_SAMPLES удачных разборов и доля одного способа >= DOMINANCE
+MIN_SAMPLES = 3
+DOMINANCE = 0.9
+
+STATIC, RENDER = "static", "render"
+
+
+class RenderStats(LearnedStore):
+    # По (хост + паттерн URL): сколько страниц разобралось из статического HTML и сколько — только после рендера.
+    # Известно-JS паттерны сразу рендерятся (без лишнего статического запроса), известно-статические — никогда.
+    # Третий счётчик — «подозрительные» неудачи статики (по эвристике адаптера похоже на JS-страницу):
+    # они размывают решение «static», и паттерн, переехавший на JS, снова проходит пробу с рендером.
+    def __init__(self, path: Path = STATS_PATH):
+        super().__init__(path)
+
+    def decide(self, url: str) -> Optional[str]:
+        with self._lock:
+            self._load()
+            static_ok, render_ok, suspect = self.data.get(url_pattern(url), (0, 0, 0))
+        total = static_ok + render_ok
+        if total < MIN_SAMPLES:
+            return None
+        if static_ok / (total + suspect) >= DOMINANCE:
+            return STATIC
+        if render_ok / total >= DOMINANCE:
+            return RENDER
+        return None
+
+    def record(self, url: str, rendered: bool) -> None:
+        # учитываются удачные разборы: страница без события ничего не говорит о способе загрузки
+        self._bump(url, 1 if rendered else 0)
+
+    def record_suspect(self, url: str) -> None:
+        self._bump(url, 2)
+
+    def _bump(self, url: str, slot: int) -> None:
+        with self._lock:
+            self._load()
+            entry = self.data.setdefault(url_pattern(url), [0, 0, 0])
+            entry[slot] += 1
+
+
+RENDER_STATS = RenderStats()
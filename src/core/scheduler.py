@@ -0,0 +1,164 @@
+from __future__ import annotations
+from typing import Callable, Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+import math
+import threading
+import time
+
+from src.core.models import EventRecord
+from src.core.metrics import METRICS
+
+
+class BudgetExhausted(Exception):
+    pass
+
+
+@dataclass
+class SourceBudget:
+    name: str
+    status: str = "pending"  # pending -> running -> done | exhausted
+    requests: int = 0
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    time_cap: Optional[float] = None
+    reason: Optional[str] = None
+    events: int = 0
+
+
+class Scheduler:
+    # Общий дедлайн и бюджет запросов с честными долями по источникам.
+    # Доля запросов = (бюджет - потрачено завершёнными) / число незавершённых, поэтому
+    # неиспользованное завершившимися источниками автоматически достаётся остальным.
+    def __init__(
+        self,
+        time_budget: Optional[float] = None,
+        request_budget: Optional[int] = None,
+        workers: int = 1,
+    ):
+        self.started = time.monotonic()
+        self.deadline = self.started + time_budget if time_budget else None
+        self.request_budget = request_budget
+        self.workers = max(1, workers)
+        self.sources: Dict[str, SourceBudget] = {}
+        self.total_requests = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        # списки результатов, которые источники заполняют по ходу обхода: при BudgetExhausted
+        # из адаптера отдаётся уже собранное
+        self._partial: Dict[str, List[EventRecord]] = {}
+
+    @property
+    def current_source(self) -> Optional[str]:
+        return getattr(self._local, "source", None)
+
+    def bind(self, name: Optional[str]) -> None:
+        # рабочие потоки источника (параллельная загрузка деталей) считаются в его бюджет
+        self._local.source = name
+
+    def track(self, results: List[EventRecord]) -> None:
+        name = self.current_source
+        if name:
+            with self._lock:
+                self._partial[name] = results
+
+    def run(self, jobs: Dict[str, Callable[[], List[EventRecord]]]) -> Dict[str, List[EventRecord]]:
+        with self._lock:
+            for name in jobs:
+                self.sources[name] = SourceBudget(name)
+        results: Dict[str, List[EventRecord]] = {}
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="source") as pool:
+            futures = {pool.submit(self._run_one, name, fn): name for name, fn in jobs.items()}
+            for fut in as_completed(futures):
+                results[futures[fut]] = fut.result()
+        return results
+
+    def _run_one(self, name: str, fn: Callable[[], List[EventRecord]]) -> List[EventRecord]:
+        self._local.source = name
+        self._start(name)
+        events: List[EventRecord] = []
+        try:
+            events = fn()
+        except BudgetExhausted:
+            # бюджет кончился посреди обхода: частичные результаты источника не теряются
+            with self._lock:
+                events = list(self._partial.get(name, []))
+        finally:
+            with self._lock:
+                self._partial.pop(name, None)
+            self._finish(name, len(events))
+            self._local.source = None
+        return events
+
+    def _start(self, name: str) -> None:
+        now = time.monotonic()
+        with self._lock:
+            st = self.sources[name]
+            st.status = "running"
+            st.started = now
+            if self.deadline is not None:
+                unstarted = sum(1 for s in self.sources.values() if s.status in ("pending", "running"))
+                slots = math.ceil(unstarted / self.workers)
+                st.time_cap = now + max(0.0, self.deadline - now) / max(slots, 1)
+
+    def _finish(self, name: str, events: int) -> None:
+        with self._lock:
+            st = self.sources[name]
+            st.finished = time.monotonic()
+            st.events = events
+            st.status = "exhausted" if st.reason else "done"
+
+    def _request_share(self) -> float:
+        finished_used = sum(s.requests for s in self.sources.values() if s.status in ("done", "exhausted"))
+        unfinished = sum(1 for s in self.sources.values() if s.status in ("pending", "running"))
+        return (self.request_budget - finished_used) / max(unfinished, 1)
+
+    def acquire(self) -> Optional[float]:
+        # Вызывается перед каждой попыткой запроса; возвращает остаток времени для таймаута
+        name = self.current_source
+        now = time.monotonic()
+        with self._lock:
+            st = self.sources.get(name) if name else None
+            reason = None
+            if self.deadline is not None and now >= self.deadline:
+                reason = "deadline"
+            elif st and st.time_cap is not None and now >= self._time_cap(st):
+                reason = "time_share"
+            elif self.request_budget is not None and self.total_requests >= self.request_budget:
+                reason = "requests"
+            elif st and self.request_budget is not None and st.requests >= self._request_share():
+                reason = "request_share"
+            if reason:
+                if st and not st.reason:
+                    st.reason = reason
+                    METRICS.inc("budget_exhausted", source=name, reason=reason)
+                raise BudgetExhausted(f"{name or 'run'}: {reason}")
+            self.total_requests += 1
+            if st:
+                st.requests += 1
+                cap = self._time_cap(st)
+            else:
+                cap = self.deadline
+        return None if cap is None else max(cap - now, 0.1)
+
+    def _time_cap(self, st: SourceBudget) -> Optional[float]:
+        if st.time_cap is None:
+            return self.deadline
+        # очередь пуста — всё оставшееся время делят между ещё работающими источниками
+        if not any(s.status == "pending" for s in self.sources.values()):
+            return self.deadline
+        return min(st.time_cap, self.deadline)
+
+    def summary(self) -> List[Dict[str, object]]:
+        with self._lock:
+            return [
+                {
+                    "source": s.name,
+                    "status": s.status,
+                    "reason": s.reason,
+                    "requests": s.requests,
+                    "events": s.events,
+                    "elapsed_s": round((s.finished or time.monotonic()) - s.started, 2) if s.started else None,
+                }
+                for s in self.sources.values()
+            ]
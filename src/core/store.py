@@ -0,0 +1,256 @@
+from __future__ import annotations
+from typing import Iterable, Iterator, List, Optional, Any, Tuple
+from dataclasses import asdict
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+import json
+import sqlite3
+import threading
+
+from src.core.models import Event, EventRecord, VenueRecord
+from src.core.dedupe import build_event_key
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    key TEXT PRIMARY KEY,
+    source TEXT NOT NULL,
+    title TEXT NOT NULL,
+    start_dt TEXT NOT NULL,
+    end_dt TEXT,
+    city TEXT,
+    category TEXT,
+    venue_name TEXT,
+    price_min_byn REAL,
+    price_max_byn REAL,
+    is_free INTEGER,
+    link TEXT NOT NULL,
+    fetched_at TEXT NOT NULL,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_events_city_start ON events (city, start_dt);
+CREATE INDEX IF NOT EXISTS idx_events_start ON events (start_dt);
+CREATE INDEX IF NOT EXISTS idx_events_category ON events (category, start_dt);
+CREATE INDEX IF NOT EXISTS idx_events_source ON events (source, start_dt);
+CREATE INDEX IF NOT EXISTS idx_events_price ON events (price_min_byn);
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    content_hash TEXT NOT NULL,
+    checked_at TEXT NOT NULL,
+    record TEXT
+);
+"""
+
+UPSERT = """
+INSERT INTO events (
+    key, source, title, start_dt, end_dt, city, category, venue_name,
+    price_min_byn, price_max_byn, is_free, link, fetched_at, first_seen, last_seen, data
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(key) DO UPDATE SET
+    source = excluded.source,
+    title = excluded.title,
+    start_dt = excluded.start_dt,
+    end_dt = excluded.end_dt,
+    city = excluded.city,
+    category = excluded.category,
+    venue_name = excluded.venue_name,
+    price_min_byn = excluded.price_min_byn,
+    price_max_byn = excluded.price_max_byn,
+    is_free = excluded.is_free,
+    link = excluded.link,
+    fetched_at = excluded.fetched_at,
+    last_seen = excluded.last_seen,
+    data = excluded.data
+"""
+
+
+def event_key(e: Event) -> str:
+    return build_event_key(e.title, e.start_dt, e.venue.name, e.source_uid)
+
+
+class EventStore:
+    def __init__(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def upsert(self, events: Iterable[Event]) -> int:
+        now = datetime.now(timezone.utc).isoformat()
+        rows = [
+            (
+                event_key(e), e.source, e.title, e.start_dt, e.end_dt, e.city, e.category, e.venue.name,
+                e.price_min_byn, e.price_max_byn, None if e.is_free is None else int(e.is_free),
+                str(e.link), e.fetched_at, now, now, e.model_dump_json(),
+            )
+            for e in events
+        ]
+        with self._lock, self.conn:
+            self.conn.executemany(UPSERT, rows)
+        return len(rows)
+
+    def touch(self, events: Iterable[Event]) -> int:
+        # событие снова встретилось без изменений: сдвигается только last_seen
+        now = datetime.now(timezone.utc).isoformat()
+        rows = [(now, event_key(e)) for e in events]
+        with self._lock, self.conn:
+            self.conn.executemany("UPDATE events SET last_seen = ? WHERE key = ?", rows)
+        return len(rows)
+
+    def latest(self, since: Optional[str] = None) -> Iterator[Tuple[str, str, Event, str]]:
+        # (источник, ключ, событие, last_seen) — последние сохранённые версии, например для прогрева демона
+        sql = "SELECT source, key, data, last_seen FROM events"
+        params: List[Any] = []
+        if since:
+            sql += " WHERE last_seen >= ?"
+            params.append(since)
+        with self._lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        for source, key, data, last_seen in rows:
+            yield source, key, Event.model_validate_json(data), last_seen
+
+    def query(
+        self,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        city: Optional[str] = None,
+        category: Optional[str] = None,
+        source: Optional[str] = None,
+        free_only: bool = False,
+        price_min: Optional[float] = None,
+        price_max: Optional[float] = None,
+        limit: Optional[int] = None,
+    ) -> List[Event]:
+        # start_dt хранится как ISO-строка — сравнение по префиксу даты лексикографическое и попадает в индекс
+        where: List[str] = []
+        params: List[Any] = []
+        if city:
+            where.append("city = ?")
+            params.append(city)
+        if category:
+            where.append("category = ?")
+            params.append(category)
+        if source:
+            where.append("source = ?")
+            params.append(source)
+        if date_from:
+            where.append("start_dt >= ?")
+            params.append(date_from.isoformat())
+        if date_to:
+            where.append("start_dt < ?")
+            params.append((date_to + timedelta(days=1)).isoformat())
+        if free_only:
+            where.append("is_free = 1")
+        if price_min is not None:
+            where.append("price_max_byn >= ?")
+            params.append(price_min)
+        if price_max is not None:
+            where.append("price_min_byn <= ?")
+            params.append(price_max)
+        sql = "SELECT data FROM events"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY start_dt"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [Event.model_validate_json(data) for (data,) in rows]
+
+    def seen(self, key: str) -> Optional[dict]:
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT first_seen, last_seen FROM events WHERE key = ?", (key,)
+            ).fetchone()
+        return {"first_seen": row[0], "last_seen": row[1]} if row else None
+
+    # Хеши детальных страниц (по каноническому URL) и разобранная из них запись; record = NULL — страница без события
+    def page(self, url: str) -> Optional[Tuple[str, Optional[EventRecord]]]:
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT content_hash, record FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        digest, data = row
+        if data is None:
+            return digest, None
+        fields = json.loads(data)
+        fields["venue"] = VenueRecord(**fields["venue"])
+        return digest, EventRecord(**fields)
+
+    def remember_page(self, url: str, digest: str, record: Optional[EventRecord]) -> None:
+        data = json.dumps(asdict(record), ensure_ascii=False) if record is not None else None
+        now = datetime.now(timezone.utc).isoformat()
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO pages (url, content_hash, checked_at, record) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(url) DO UPDATE SET content_hash = excluded.content_hash, "
+                "checked_at = excluded.checked_at, record = excluded.record",
+                (url, digest, now, data),
+            )
+
+    def count(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self.conn.close()
+
+
+def weekend(today: Optional[date] = None) -> tuple:
+    # ближайшие (или текущие) суббота–воскресенье
+    today = today or date.today()
+    sat = today + timedelta(days=(5 - today.weekday()) % 7)
+    if today.weekday() == 6:
+        sat = today - timedelta(days=1)
+    return sat, sat + timedelta(days=1)
+
+
+def dump_json(events: List[Event]) -> str:
+    return "\n".join(e.model_dump_json(ensure_ascii=False) for e in events)
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Query the harvested event store")
+    parser.add_argument("--db", type=str, default="data/events.sqlite")
+    parser.add_argument("--from", dest="date_from", type=date.fromisoformat, default=None)
+    parser.add_argument("--to", dest="date_to", type=date.fromisoformat, default=None)
+    parser.add_argument("--weekend", action="store_true", help="the coming Saturday and Sunday")
+    parser.add_argument("--city", type=str, default=None)
+    parser.add_argument("--category", type=str, default=None)
+    parser.add_argument("--source", type=str, default=None)
+    parser.add_argument("--free", action="store_true", help="free events only")
+    parser.add_argument("--price-min", type=float, default=None)
+    parser.add_argument("--price-max", type=float, default=None)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--json", action="store_true", help="print full events as JSONL")
+    args = parser.parse_args()
+
+    date_from, date_to = args.date_from, args.date_to
+    if args.weekend:
+        date_from, date_to = weekend()
+    store = EventStore(args.db)
+    events = store.query(
+        date_from=date_from, date_to=date_to, city=args.city, category=args.category,
+        source=args.source, free_only=args.free, price_min=args.price_min,
+        price_max=args.price_max, limit=args.limit,
+    )
+    if args.json:
+        print(dump_json(events))
+    else:
+        for e in events:
+            price = "free" if e.is_free else (f"{e.price_min_byn:g}–{e.price_max_byn:g} BYN" if e.price_min_byn is not None else "")
+            print(f"{e.start_dt[:16]}  {e.city or '':10s} {e.title[:60]:60s} {e.venue.name[:30]:30s} {price}")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+from __future__ import annotations
+from array import array
+from bisect import bisect_left
+from typing import Set
+import hashlib
+import math
+import threading
+
+from src.utils.urls import canonicalize
+
+VISITED_KINDS = ("set", "hash", "bloom")
+
+
+def url_hash64(canonical: str) -> int:
+    return int.from_bytes(hashlib.blake2b(canonical.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class VisitedSet:
+    # Точное множество канонических URL — для обычных прогонов
+    def __init__(self):
+        self._items: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def add(self, url: str) -> bool:
+        # True, если URL ещё не встречался
+        key = canonicalize(url)
+        with self._lock:
+            if key in self._items:
+                return False
+            self._items.add(key)
+            return True
+
+    def __contains__(self, url: str) -> bool:
+        return canonicalize(url) in self._items
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+
+class HashVisitedSet(VisitedSet):
+    # Отсортированный массив 64-битных хешей (8 байт на URL) + небольшой буфер свежих вставок.
+    # Вероятность ложного совпадения ~ n^2 / 2^65 — пренебрежимо даже для миллионов URL.
+    MERGE_AT = 65536
+
+    def __init__(self):
+        self._sorted = array("Q")
+        self._pending: Set[int] = set()
+        self._lock = threading.Lock()
+
+    def _has(self, h: int) -> bool:
+        if h in self._pending:
+            return True
+        i = bisect_left(self._sorted, h)
+        return i < len(self._sorted) and self._sorted[i] == h
+
+    def add(self, url: str) -> bool:
+        h = url_hash64(canonicalize(url))
+        with self._lock:
+            if self._has(h):
+                return False
+            self._pending.add(h)
+            if len(self._pending) >= self.MERGE_AT:
+                self._merge()
+            return True
+
+    def _merge(self) -> None:
+        merged = sorted(self._sorted.tolist() + list(self._pending))
+        self._sorted = array("Q", merged)
+        self._pending.clear()
+
+    def __contains__(self, url: str) -> bool:
+        with self._lock:
+            return self._has(url_hash64(canonicalize(url)))
+
+    def __len__(self) -> int:
+        return len(self._sorted) + len(self._pending)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._sorted = array("Q")
+            self._pending.clear()
+
+
+class BloomVisitedSet(VisitedSet):
+    # Фильтр Блума: фиксированная память под capacity URL с заданной долей ложных срабатываний
+    # (ложное срабатывание = пропуск ещё не посещённой страницы, никогда не повторный fetch)
+    def __init__(self, capacity: int = 1_000_000, error_rate: float = 1e-4):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def _positions(self, canonical: str):
+        digest = hashlib.blake2b(canonical.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:], "big") | 1
+        # двойное хеширование Кирша–Митценмахера
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, url: str) -> bool:
+        positions = self._positions(canonicalize(url))
+        with self._lock:
+            new = False
+            for p in positions:
+                byte, bit = divmod(p, 8)
+                if not self._bits[byte] & (1 << bit):
+                    self._bits[byte] |= 1 << bit
+                    new = True
+            if new:
+                self._count += 1
+            return new
+
+    def __contains__(self, url: str) -> bool:
+        positions = self._positions(canonicalize(url))
+        return all(self._bits[p // 8] & (1 << (p % 8)) for p in positions)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def clear(self) -> None:
+        with self._lock:
+            self._bits = bytearray(len(self._bits))
+            self._count = 0
+
+
+def make_visited(kind: str = "set", capacity: int = 1_000_000) -> VisitedSet:
+    if kind == "hash":
+        return HashVisitedSet()
+    if kind == "bloom":
+        return BloomVisitedSet(capacity)
+    return VisitedSet()
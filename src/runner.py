@@ -1,11 +1,41 @@
 from __future__ import annotations
 import argparse
-from typing import List
+import importlib
+import json
+import signal
+import threading
+import time
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+from contextlib import nullcontext
+from pathlib import Path
+
+from pydantic import ValidationError
 
 from src.utils.http import HttpClient
-from src.core.models import Event
+from src.utils.archive import HttpArchive
+from src.utils.breaker import CircuitBreakers
+from src.utils.concurrency import AdaptiveConcurrency
+from src.utils.http import host_of
+from src.utils.transport import TRANSPORTS
+from src.utils.render import close_browser_pool, use_browser_pool
+from src.utils import parse as parse_utils
+from src.core.models import Event, EventRecord
 from src.core.dedupe import build_event_key
 from src.core.geocode import Geocoder, DummyGeocoder
+from src.core.metrics import METRICS
+from src.core.profiling import SourceProfiler, PROFILE_MODES
+from src.core.scheduler import Scheduler
+from src.core.frontier import YIELD_STATS, set_reference_date
+from src.core.render_cache import RENDER_STATS
+from src.core.endpoints import ENDPOINTS
+from src.core import crawl
+from src.core.visited import VISITED_KINDS, make_visited
+from src.core.store import EventStore
+from src.core.pages import ADAPTER_MODULES, PageArchive
+from src.core.columnar import write_parquet
+from src.core.output import COMPRESSIONS, JsonlWriter
+from src.core.daemon import BASE_INTERVAL, MAX_INTERVAL, MIN_INTERVAL, ChangeTracker, RevisitSchedule, run_daemon
 from src.adapters.relax import harvest_relax
 from src.adapters.bez_kassira import harvest_bezkassira
 from src.adapters.ticketpro import harvest_ticketpro
@@ -15,10 +45,16 @@ from src.adapters.virtualbrest import harvest_virtualbrest
 from src.adapters.vitebsk_biz import harvest_vitebsk_biz
 
 
-def write_jsonl(path: str, events: List[Event]) -> None:
-    with open(path, 'w', encoding='utf-8') as f:
-        for e in events:
-            f.write(e.model_dump_json(ensure_ascii=False) + "\n")
+def write_jsonl(
+    path: str,
+    events: List[Event],
+    compression: Optional[str] = None,
+    shard_bytes: Optional[int] = None,
+    shard_seconds: Optional[float] = None,
+) -> JsonlWriter:
+    with JsonlWriter(path, compression, shard_bytes, shard_seconds) as writer:
+        writer.write(events)
+    return writer
 
 
 SOURCES = {
@@ -32,41 +68,389 @@ SOURCES = {
 }
 
 
+def parse_base_overrides(values: List[str]) -> Dict[str, str]:
+    overrides: Dict[str, str] = {}
+    for item in values:
+        base, sep, target = item.partition("=")
+        if not sep or not base or not target:
+            raise SystemExit(f"Bad --base-override: {item!r}, expected BASE=URL")
+        overrides[base] = target
+    return overrides
+
+
+def parse_concurrency(values: List[str]) -> Dict[str, Tuple[int, int]]:
+    # SOURCE=MAX или SOURCE=MIN:MAX (вместо источника можно указать хост)
+    bounds: Dict[str, Tuple[int, int]] = {}
+    for item in values:
+        name, sep, spec = item.partition("=")
+        lo, _, hi = spec.partition(":")
+        try:
+            lo_i, hi_i = (int(lo), int(hi)) if hi else (1, int(lo))
+        except ValueError:
+            raise SystemExit(f"Bad --concurrency: {item!r}, expected SOURCE=MAX or SOURCE=MIN:MAX")
+        if not sep or lo_i < 1 or hi_i < lo_i:
+            raise SystemExit(f"Bad --concurrency: {item!r}, expected SOURCE=MAX or SOURCE=MIN:MAX")
+        host = name
+        if name in ADAPTER_MODULES:
+            host = host_of(importlib.import_module(ADAPTER_MODULES[name]).BASE)
+        bounds[host] = (lo_i, hi_i)
+    return bounds
+
+
+def harvest(
+    selected: List[str],
+    client: HttpClient,
+    geocoder: Geocoder,
+    limit: int,
+    profiler: Optional[SourceProfiler] = None,
+    scheduler: Optional[Scheduler] = None,
+) -> List[EventRecord]:
+    known = []
+    for src in selected:
+        if src not in SOURCES:
+            print(f"Unknown source: {src}")
+            continue
+        known.append(src)
+
+    def run_source(src: str) -> List[EventRecord]:
+        with METRICS.timer("source", source=src), (profiler.profile(src) if profiler else nullcontext()):
+            harvested = SOURCES[src](client, geocoder, limit)
+        METRICS.inc("events_harvested", len(harvested), source=src)
+        return harvested
+
+    scheduler = scheduler or Scheduler()
+    client.scheduler = scheduler
+    try:
+        by_source = scheduler.run({src: (lambda src=src: run_source(src)) for src in known})
+    finally:
+        client.scheduler = None
+    events: List[EventRecord] = []
+    for src in known:
+        events.extend(by_source.get(src, []))
+    return events
+
+
+# Выученное состояние, от которого зависит порядок и способ запросов (frontier, рендер, JSON-API)
+LEARNED = {"frontier": YIELD_STATS, "render": RENDER_STATS, "endpoints": ENDPOINTS}
+
+
+def learned_snapshot_path(archive: str) -> Path:
+    return Path(archive).with_name(Path(archive).name + ".learned.json")
+
+
+def pin_learned(args: argparse.Namespace) -> None:
+    # --record сохраняет выученную статистику на момент старта рядом с архивом; --replay обходит с ней же
+    # и ничего не сохраняет — иначе порядок и набор URL меняются от прогона к прогону (ArchiveMiss).
+    # --as-of без replay — исторический прогон: статистику читает, но не перезаписывает.
+    if args.record:
+        snapshot = {name: store.snapshot() for name, store in LEARNED.items()}
+        learned_snapshot_path(args.record).write_text(json.dumps(snapshot, ensure_ascii=False), encoding="utf-8")
+    elif args.replay:
+        path = learned_snapshot_path(args.replay)
+        # архив без снимка (записан до его появления) — обход с пустой статистикой, но одинаковый каждый раз
+        snapshot = json.loads(path.read_text(encoding="utf-8")) if path.exists() else {}
+        for name, store in LEARNED.items():
+            store.freeze(snapshot.get(name, {}))
+    elif args.as_of:
+        for store in LEARNED.values():
+            store.freeze()
+
+
+def emit_events(records: List[EventRecord]) -> List[Event]:
+    # Граница пайплайна: дедупликация и pydantic-валидация (URL ссылки, обложки, галереи) уходящих событий.
+    # Ключ занимает только запись, прошедшая валидацию: невалидный дубль не вытесняет валидный.
+    seen = set()
+    events: List[Event] = []
+    for r in records:
+        key = build_event_key(r.title, r.start_dt, r.venue.name, r.source_uid)
+        if key in seen:
+            METRICS.inc("events_duplicates")
+            continue
+        try:
+            ev = r.to_event()
+        except ValidationError:
+            METRICS.inc("events_invalid", source=r.source)
+            continue
+        seen.add(key)
+        events.append(ev)
+    return events
+
+
+def serve(
+    args: argparse.Namespace,
+    selected: List[str],
+    client: HttpClient,
+    geocoder: Geocoder,
+    profiler: Optional[SourceProfiler],
+    store: Optional[EventStore],
+    workers: int,
+) -> None:
+    # --daemon: один процесс обходит источники по адаптивному расписанию; клиент, пулы соединений,
+    # браузеры, геокэш и выученная статистика живут весь срок. В --out (шардами) и --store
+    # уходят только новые и изменившиеся события.
+    if args.parquet:
+        raise SystemExit("--parquet is not supported with --daemon")
+    schedule = RevisitSchedule(
+        base_interval=args.revisit_base, min_interval=args.revisit_min, max_interval=args.revisit_max,
+    )
+    shard_bytes = int(args.shard_mb * 1024 * 1024) if args.shard_mb else None
+    writer = JsonlWriter(args.out, args.compress, shard_bytes, args.shard_seconds or 3600.0)
+    stop = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop.set())
+    if args.render_pool > 0:
+        use_browser_pool(args.render_pool)
+
+    def cycle(due: List[str]) -> Dict[str, List[Event]]:
+        crawl.SETTINGS.visited = make_visited(args.visited, args.visited_capacity)
+        scheduler = Scheduler(args.budget_seconds, args.budget_requests, workers)
+        records = harvest(due, client, geocoder, args.limit, profiler, scheduler)
+        by_source: Dict[str, List[Event]] = {}
+        for ev in emit_events(records):
+            by_source.setdefault(ev.source, []).append(ev)
+        return by_source
+
+    def on_changed(events: List[Event]) -> None:
+        writer.write(events)
+        METRICS.inc("events_written", len(events))
+        if store is not None:
+            store.upsert(events)
+
+    def after_cycle() -> None:
+        writer.flush()
+        YIELD_STATS.save()
+        RENDER_STATS.save()
+        ENDPOINTS.save()
+        if args.metrics_json:
+            METRICS.write_json(args.metrics_json)
+        if args.metrics_prom:
+            METRICS.write_prometheus(args.metrics_prom)
+
+    def on_seen(events: List[Event]) -> None:
+        if store is not None:
+            store.touch(events)
+
+    tracker = ChangeTracker()
+    if store is not None:
+        warmed = tracker.seed(store, time.time())
+        print(f"Daemon: {warmed} known events loaded from {args.store}")
+    known = [src for src in selected if src in SOURCES]
+    print(f"Daemon: {', '.join(known)}; revisit every {args.revisit_min:.0f}..{args.revisit_max:.0f}s, Ctrl+C to stop")
+    try:
+        cycles = run_daemon(
+            known, cycle, on_changed, after_cycle, schedule, stop,
+            tracker=tracker, max_cycles=args.daemon_cycles, on_seen=on_seen,
+        )
+    finally:
+        writer.close()
+        close_browser_pool()
+    print(f"Daemon stopped after {cycles} cycles, {writer.rows} events written")
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="Belarus Events Harvester")
     parser.add_argument("--sources", type=str, default="relax", help="comma-separated sources")
     parser.add_argument("--limit", type=int, default=50)
     parser.add_argument("--out", type=str, default="/Users/amal/Downloads/1/outputs/events.jsonl")
     parser.add_argument("--no-geocode", action="store_true", help="disable geocoding")
+    parser.add_argument(
+        "--base-override", action="append", default=[], metavar="BASE=URL",
+        help="serve a source base URL from another origin (fixture/mock server)",
+    )
+    parser.add_argument("--budget-seconds", type=float, default=None, help="total wall-clock budget for the run")
+    parser.add_argument("--budget-requests", type=int, default=None, help="total request budget for the run")
+    parser.add_argument("--workers", type=int, default=1, help="sources harvested in parallel")
+    parser.add_argument(
+        "--detail-workers", type=int, default=1,
+        help="upper bound of concurrent detail fetches per source; the live per-host limit adapts (AIMD)",
+    )
+    parser.add_argument(
+        "--prefetch-pages", type=int, default=crawl.SETTINGS.prefetch_pages,
+        help="listing pages fetched ahead in the background while details of the current one load (0: serial)",
+    )
+    parser.add_argument(
+        "--no-api", action="store_true",
+        help="do not query JSON endpoints captured during earlier renders (HTML listings only)",
+    )
+    parser.add_argument(
+        "--concurrency", action="append", default=[], metavar="SOURCE=MIN:MAX",
+        help="per-source bounds for the adaptive concurrency (e.g. vitebsk.biz=1:2)",
+    )
+    parser.add_argument(
+        "--compress", choices=COMPRESSIONS, default=None,
+        help="compress --out (default: by extension, .gz/.zst)",
+    )
+    parser.add_argument("--shard-mb", type=float, default=None, help="rotate --out into shards of this size")
+    parser.add_argument("--shard-seconds", type=float, default=None, help="rotate --out into shards by age")
+    parser.add_argument("--parquet", type=str, default=None, help="also write events as Parquet (needs pyarrow)")
+    parser.add_argument(
+        "--http-backend", choices=TRANSPORTS, default="requests",
+        help="requests (HTTP/1.1) or httpx (HTTP/2 multiplexing, needs httpx[http2])",
+    )
+    parser.add_argument(
+        "--dns-ttl", type=float, default=0.0,
+        help="--http-backend httpx: cache DNS lookups of its connections for this many seconds (off by default)",
+    )
+    parser.add_argument(
+        "--breaker-failures", type=int, default=5,
+        help="consecutive failures that open a host's circuit (requests then fail fast)",
+    )
+    parser.add_argument("--breaker-cooldown", type=float, default=30.0, help="seconds before a half-open probe")
+    parser.add_argument("--store", type=str, default=None, help="also upsert events into this SQLite store")
+    parser.add_argument(
+        "--skip-unchanged", action="store_true",
+        help="with --store: reuse stored events for detail pages whose content did not change",
+    )
+    parser.add_argument(
+        "--archive-pages", type=str, default=None, metavar="DIR",
+        help="keep raw detail HTML (content-addressed, zstd) for offline reparse",
+    )
+    parser.add_argument("--record", type=str, default=None, metavar="ARCHIVE", help="record all HTTP/render traffic")
+    parser.add_argument("--replay", type=str, default=None, metavar="ARCHIVE", help="serve the crawl from an archive")
+    parser.add_argument(
+        "--replay-latency", type=str, default=None,
+        help="simulated latency on replay: seconds, or 'recorded' to reuse recorded timings",
+    )
+    parser.add_argument(
+        "--listing-only", action="store_true",
+        help="build events from listing cards; fetch detail pages only for incomplete or new events",
+    )
+    parser.add_argument(
+        "--description-chars", type=int, default=parse_utils.DESCRIPTION_MAX_CHARS,
+        help="max description length per event (boilerplate blocks are skipped, the rest is cut at a word)",
+    )
+    parser.add_argument("--known", type=str, default=None, help="previous JSONL output: links already seen")
+    parser.add_argument(
+        "--visited", choices=VISITED_KINDS, default="set",
+        help="run-wide visited URL set: exact set, sorted 64-bit hashes or Bloom filter",
+    )
+    parser.add_argument("--visited-capacity", type=int, default=1_000_000, help="expected URLs for --visited bloom")
+    parser.add_argument(
+        "--as-of", type=date.fromisoformat, default=None, metavar="YYYY-MM-DD",
+        help="reference date for ranking listing cards (e.g. when replaying an old archive)",
+    )
+    parser.add_argument(
+        "--daemon", action="store_true",
+        help="keep running: revisit each source on an adaptive interval, write new/changed events as they come",
+    )
+    parser.add_argument("--revisit-base", type=float, default=BASE_INTERVAL, help="--daemon: initial revisit interval, s")
+    parser.add_argument("--revisit-min", type=float, default=MIN_INTERVAL, help="--daemon: shortest revisit interval, s")
+    parser.add_argument("--revisit-max", type=float, default=MAX_INTERVAL, help="--daemon: longest revisit interval, s")
+    parser.add_argument("--render-pool", type=int, default=2, help="--daemon: long-lived browsers for rendering (0: per render)")
+    parser.add_argument("--daemon-cycles", type=int, default=None, help="--daemon: stop after this many cycles")
+    parser.add_argument("--metrics-json", type=str, default=None, help="write JSON timing report")
+    parser.add_argument("--metrics-prom", type=str, default=None, help="write Prometheus textfile")
+    parser.add_argument("--profile", choices=PROFILE_MODES, default=None, help="profile each source")
+    parser.add_argument("--profile-dir", type=str, default="outputs/profiles")
+    parser.add_argument("--profile-top", type=int, default=25, help="functions/sites to print per source")
     args = parser.parse_args()
 
-    client = HttpClient()
+    if args.record and args.replay:
+        raise SystemExit("--record and --replay are mutually exclusive")
+    archive = None
+    if args.record:
+        archive = HttpArchive(args.record, "record")
+    elif args.replay:
+        archive = HttpArchive(args.replay, "replay")
+    pin_learned(args)
+    replay_latency = None
+    if args.replay_latency:
+        replay_latency = -1.0 if args.replay_latency == "recorded" else float(args.replay_latency)
+    client = HttpClient(
+        base_overrides=parse_base_overrides(args.base_override),
+        archive=archive,
+        replay_latency=replay_latency,
+        breakers=CircuitBreakers(failure_threshold=args.breaker_failures, cooldown=args.breaker_cooldown),
+        limits=AdaptiveConcurrency(args.detail_workers, bounds=parse_concurrency(args.concurrency)),
+        backend=args.http_backend,
+        dns_ttl=args.dns_ttl,
+    )
     geocoder = DummyGeocoder() if args.no_geocode else Geocoder()
+    profiler = SourceProfiler(args.profile, args.profile_dir, args.profile_top) if args.profile else None
+
+    set_reference_date(args.as_of)
+    parse_utils.DESCRIPTION_MAX_CHARS = max(1, args.description_chars)
+    crawl.SETTINGS.listing_only = args.listing_only
+    crawl.SETTINGS.api = not args.no_api
+    crawl.SETTINGS.prefetch_pages = max(0, args.prefetch_pages)
+    crawl.SETTINGS.visited = make_visited(args.visited, args.visited_capacity)
+    store = EventStore(args.store) if args.store else None
+    if args.skip_unchanged:
+        if store is None:
+            raise SystemExit("--skip-unchanged needs --store")
+        crawl.SETTINGS.changes = store
+    crawl.SETTINGS.detail_workers = max(
+        [args.detail_workers] + [hi for _, hi in client.limits.bounds.values()]
+    )
+    if args.archive_pages:
+        crawl.SETTINGS.pages = PageArchive(args.archive_pages)
+    if args.known:
+        crawl.SETTINGS.known_links = crawl.load_known_links(args.known)
+    workers = args.workers
+    if args.profile == "tracemalloc" and workers > 1:
+        # tracemalloc глобален для процесса — пики по источникам имеют смысл только последовательно
+        print("--profile tracemalloc: running sources sequentially")
+        workers = 1
+    scheduler = Scheduler(args.budget_seconds, args.budget_requests, workers)
 
     selected = [s.strip() for s in args.sources.split(',') if s.strip()]
-    events: List[Event] = []
+    if args.daemon:
+        try:
+            serve(args, selected, client, geocoder, profiler, store, workers)
+        finally:
+            if store is not None:
+                store.close()
+            client.close()
+            if archive:
+                archive.close()
+        return
+    events = harvest(selected, client, geocoder, args.limit, profiler, scheduler)
+    for row in scheduler.summary():
+        reason = f" ({row['reason']})" if row["reason"] else ""
+        print(f"{row['source']}: {row['events']} events, {row['requests']} requests, "
+              f"{row['elapsed_s']}s, {row['status']}{reason}")
+    if crawl.SETTINGS.detail_workers > 1:
+        for host, row in client.limits.summary().items():
+            p95 = f"{row['p95_s']:.3f}s" if row["p95_s"] is not None else "-"
+            print(f"concurrency {host}: limit {row['limit']} (bounds {row['bounds'][0]}..{row['bounds'][1]}), p95 {p95}")
+    for row in client.breakers.summary():
+        if row["failures"] or row["state"] != "closed":
+            print(f"circuit {row['host']}: {row['state']}, {row['failures']}/{row['requests']} failed, "
+                  f"opened {row['opened']}x, {row['rejected']} requests rejected")
 
-    for src in selected:
-        if src not in SOURCES:
-            print(f"Unknown source: {src}")
-            continue
-        events.extend(SOURCES[src](client, geocoder, args.limit))
+    # Дедупликация и валидация на выходе
+    with METRICS.timer("emit"):
+        unique_events = emit_events(events)
 
-    # Дедупликация на выходе
-    seen = set()
-    unique_events: List[Event] = []
-    for e in events:
-        key = build_event_key(e.title, e.start_dt, e.venue.name, e.source_uid)
-        if key in seen:
-            continue
-        seen.add(key)
-        unique_events.append(e)
+    shard_bytes = int(args.shard_mb * 1024 * 1024) if args.shard_mb else None
+    with METRICS.timer("write"):
+        writer = write_jsonl(args.out, unique_events, args.compress, shard_bytes, args.shard_seconds)
+    METRICS.inc("events_written", len(unique_events))
+    if writer.sharded:
+        print(f"Wrote {len(unique_events)} events to {len(writer.shards)} shards, manifest {writer.manifest_path}")
+    else:
+        print(f"Wrote {len(unique_events)} events to {writer.files[0]}")
+    if args.parquet:
+        with METRICS.timer("write_parquet"):
+            write_parquet(args.parquet, unique_events)
+        print(f"Wrote {len(unique_events)} events to {args.parquet}")
+    if store is not None:
+        with METRICS.timer("store_upsert"):
+            store.upsert(unique_events)
+        print(f"Upserted {len(unique_events)} events into {args.store} ({store.count()} total)")
+        store.close()
+    client.close()
+    if archive:
+        archive.close()
+    YIELD_STATS.save()
+    RENDER_STATS.save()
+    ENDPOINTS.save()
 
-    write_jsonl(args.out, unique_events)
-    print(f"Wrote {len(unique_events)} events to {args.out}")
+    if args.metrics_json:
+        METRICS.write_json(args.metrics_json)
+    if args.metrics_prom:
+        METRICS.write_prometheus(args.metrics_prom)
 
 
 if __name__ == "__main__":
     main()
-
-
@@ -0,0 +1,83 @@
+from __future__ import annotations
+from typing import Dict, Optional, Tuple, Any
+from pathlib import Path
+from urllib.parse import urlencode
+import gzip
+import json
+import threading
+import time
+
+# Архив запросов/ответов в духе WARC: каждая запись — отдельный gzip-member
+# (JSON-заголовок + "\n" + тело), индекс key -> (offset, length) лежит рядом в <path>.idx
+
+RECORD_MODES = ("record", "replay")
+
+
+class ArchiveMiss(LookupError):
+    pass
+
+
+def request_key(kind: str, url: str, params: Optional[Dict[str, str]] = None) -> str:
+    if params:
+        url = f"{url}{'&' if '?' in url else '?'}{urlencode(sorted(params.items()))}"
+    return f"{kind} {url}"
+
+
+class HttpArchive:
+    def __init__(self, path: str, mode: str):
+        if mode not in RECORD_MODES:
+            raise ValueError(f"Unknown archive mode: {mode}")
+        self.path = Path(path)
+        self.index_path = self.path.with_name(self.path.name + ".idx")
+        self.mode = mode
+        self.index: Dict[str, Tuple[int, int]] = {}
+        self._lock = threading.Lock()
+        if mode == "record":
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._data = open(self.path, "ab")
+            self._idx = open(self.index_path, "a", encoding="utf-8")
+        else:
+            self._data = open(self.path, "rb")
+            self._idx = None
+            self._load_index()
+
+    def _load_index(self) -> None:
+        with open(self.index_path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                item = json.loads(line)
+                # последняя запись для ключа выигрывает
+                self.index[item["key"]] = (item["offset"], item["length"])
+
+    def record(self, key: str, body: bytes, **meta: Any) -> None:
+        header = {"key": key, "recorded_at": time.time(), "length": len(body), **meta}
+        member = gzip.compress(json.dumps(header, ensure_ascii=False).encode("utf-8") + b"\n" + body)
+        with self._lock:
+            offset = self._data.seek(0, 2)
+            self._data.write(member)
+            self._data.flush()
+            self._idx.write(json.dumps({"key": key, "offset": offset, "length": len(member)}) + "\n")
+            self._idx.flush()
+            self.index[key] = (offset, len(member))
+
+    def lookup(self, key: str) -> Tuple[Dict[str, Any], bytes]:
+        loc = self.index.get(key)
+        if loc is None:
+            raise ArchiveMiss(key)
+        offset, length = loc
+        with self._lock:
+            self._data.seek(offset)
+            member = self._data.read(length)
+        raw = gzip.decompress(member)
+        head, _, body = raw.partition(b"\n")
+        return json.loads(head), body
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.index
+
+    def close(self) -> None:
+        with self._lock:
+            self._data.close()
+            if self._idx:
+                self._idx.close()
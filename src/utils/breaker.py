@@ -0,0 +1,139 @@
+from __future__ import annotations
+from typing import Deque, Dict, List
+from collections import deque
+from dataclasses import dataclass, field
+import threading
+import time
+
+from src.core.metrics import METRICS
+
+
+class CircuitOpen(Exception):
+    # Не RequestException — tenacity не ретраит, запрос к «лежащему» хосту падает сразу
+    pass
+
+
+@dataclass
+class _HostState:
+    state: str = "closed"  # closed -> open -> half_open -> closed | open
+    consecutive: int = 0
+    window: Deque[bool] = field(default_factory=deque)
+    opened_at: float = 0.0
+    cooldown: float = 0.0
+    probing: bool = False
+    opened: int = 0
+    rejected: int = 0
+    requests: int = 0
+    failures: int = 0
+
+
+class CircuitBreakers:
+    # Автомат на каждый хост: открывается после failure_threshold ошибок подряд или при доле ошибок
+    # >= error_rate среди последних window запросов; через cooldown пропускает один пробный запрос
+    # (half-open). Неудачная проба снова открывает цепь с удвоенным cooldown (до max_cooldown).
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        error_rate: float = 0.5,
+        window: int = 20,
+        min_requests: int = 10,
+        cooldown: float = 30.0,
+        max_cooldown: float = 300.0,
+    ):
+        self.failure_threshold = failure_threshold
+        self.error_rate = error_rate
+        self.window = window
+        self.min_requests = min_requests
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.hosts: Dict[str, _HostState] = {}
+        self._lock = threading.Lock()
+
+    def _host(self, host: str) -> _HostState:
+        st = self.hosts.get(host)
+        if st is None:
+            st = self.hosts[host] = _HostState()
+        return st
+
+    def before(self, host: str) -> None:
+        with self._lock:
+            st = self._host(host)
+            if st.state == "open":
+                if time.monotonic() - st.opened_at < st.cooldown:
+                    st.rejected += 1
+                    METRICS.inc("circuit_rejected", host=host)
+                    raise CircuitOpen(f"{host}: circuit open")
+                st.state = "half_open"
+            if st.state == "half_open":
+                if st.probing:
+                    st.rejected += 1
+                    METRICS.inc("circuit_rejected", host=host)
+                    raise CircuitOpen(f"{host}: circuit half-open, probe in flight")
+                st.probing = True
+
+    def success(self, host: str) -> None:
+        with self._lock:
+            st = self._host(host)
+            st.requests += 1
+            st.consecutive = 0
+            self._push(st, True)
+            if st.state == "half_open":
+                st.state = "closed"
+                st.probing = False
+                st.cooldown = 0.0
+                st.window.clear()
+
+    def failure(self, host: str) -> None:
+        with self._lock:
+            st = self._host(host)
+            st.requests += 1
+            st.failures += 1
+            st.consecutive += 1
+            self._push(st, False)
+            if st.state == "half_open":
+                self._open(host, st, min(st.cooldown * 2, self.max_cooldown))
+                return
+            errors = st.window.count(False)
+            too_many = st.consecutive >= self.failure_threshold
+            rate_bad = len(st.window) >= self.min_requests and errors / len(st.window) >= self.error_rate
+            if st.state == "closed" and (too_many or rate_bad):
+                self._open(host, st, self.base_cooldown)
+
+    def abandon(self, host: str) -> None:
+        # запрос прерван не по вине хоста: исход не учитывается, но следующая проба разрешается
+        with self._lock:
+            st = self._host(host)
+            if st.state == "half_open":
+                st.probing = False
+
+    def _push(self, st: _HostState, ok: bool) -> None:
+        st.window.append(ok)
+        if len(st.window) > self.window:
+            st.window.popleft()
+
+    def _open(self, host: str, st: _HostState, cooldown: float) -> None:
+        st.state = "open"
+        st.opened_at = time.monotonic()
+        st.cooldown = cooldown
+        st.probing = False
+        st.opened += 1
+        METRICS.inc("circuit_opened", host=host)
+
+    def state(self, host: str) -> str:
+        with self._lock:
+            st = self.hosts.get(host)
+            return st.state if st else "closed"
+
+    def summary(self) -> List[Dict[str, object]]:
+        with self._lock:
+            return [
+                {
+                    "host": host,
+                    "state": st.state,
+                    "requests": st.requests,
+                    "failures": st.failures,
+                    "opened": st.opened,
+                    "rejected": st.rejected,
+                }
+                for host, st in sorted(self.hosts.items())
+            ]
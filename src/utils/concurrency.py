@@ -0,0 +1,139 @@
+from __future__ import annotations
+from typing import Deque, Dict, Iterator, Optional, Tuple
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+import math
+import threading
+import time
+
+from src.core.metrics import METRICS
+
+# Исходы запроса для AIMD: overload — 429/503/таймаут (сайт просит сбавить), error — прочие сбои
+OK, OVERLOAD, ERROR = "ok", "overload", "error"
+
+
+@dataclass
+class _HostWindow:
+    limit: float
+    min_limit: int
+    max_limit: int
+    inflight: int = 0
+    reserved: int = 0
+    latencies: Deque[float] = field(default_factory=lambda: deque(maxlen=50))
+    outcomes: Deque[str] = field(default_factory=lambda: deque(maxlen=50))
+    baseline: Optional[float] = None
+    last_decrease: float = 0.0
+
+
+def _quantile(values, q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(math.ceil(q * len(ordered))) - 1)]
+
+
+class AdaptiveConcurrency:
+    # Конкурентность запросов на хост по схеме AIMD:
+    #   успех при здоровой латентности (p95 <= latency_slack * базовой p50) и доле ошибок < max_error_rate
+    #     -> limit += 1 / limit (примерно +1 за «раунд» из limit запросов);
+    #   429/503/таймаут -> limit /= 2, не чаще раза за текущую p50 (одна перегрузка — одно снижение).
+    # Границы задаются на хост (bounds), по умолчанию [default_min, default_max].
+    # Поток внутри reserve() (фоновая пагинация листинга) получает один запасной слот сверх лимита,
+    # чтобы загрузка следующей страницы не ждала, пока детальные запросы освободят хост.
+    def __init__(
+        self,
+        default_max: int = 4,
+        default_min: int = 1,
+        bounds: Optional[Dict[str, Tuple[int, int]]] = None,
+        latency_slack: float = 3.0,
+        max_error_rate: float = 0.1,
+    ):
+        self.default_max = max(1, default_max)
+        self.default_min = max(1, min(default_min, self.default_max))
+        self.bounds: Dict[str, Tuple[int, int]] = dict(bounds or {})
+        self.latency_slack = latency_slack
+        self.max_error_rate = max_error_rate
+        self.hosts: Dict[str, _HostWindow] = {}
+        self._cond = threading.Condition()
+        self._local = threading.local()
+
+    @contextmanager
+    def reserve(self) -> Iterator[None]:
+        self._local.reserve = True
+        try:
+            yield
+        finally:
+            self._local.reserve = False
+
+    def _host(self, host: str) -> _HostWindow:
+        w = self.hosts.get(host)
+        if w is None:
+            lo, hi = self.bounds.get(host, (self.default_min, self.default_max))
+            w = self.hosts[host] = _HostWindow(limit=float(lo), min_limit=lo, max_limit=max(lo, hi))
+        return w
+
+    def acquire(self, host: str) -> None:
+        with self._cond:
+            w = self._host(host)
+            if getattr(self._local, "reserve", False) and w.reserved == 0:
+                w.reserved += 1
+                self._local.held = True
+                self._publish(host, w)
+                return
+            while w.inflight >= max(1, int(w.limit)):
+                self._cond.wait()
+            w.inflight += 1
+            self._publish(host, w)
+
+    def release(self, host: str, latency: Optional[float], outcome: str) -> None:
+        now = time.monotonic()
+        with self._cond:
+            w = self._host(host)
+            if getattr(self._local, "held", False):
+                w.reserved -= 1
+                self._local.held = False
+            else:
+                w.inflight -= 1
+            w.outcomes.append(outcome)
+            if latency is not None and outcome == OK:
+                w.latencies.append(latency)
+                p50 = _quantile(w.latencies, 0.5)
+                if len(w.latencies) >= 5 and (w.baseline is None or p50 < w.baseline):
+                    w.baseline = p50
+            if outcome == OVERLOAD:
+                if now - w.last_decrease >= (_quantile(w.latencies, 0.5) or 0.0):
+                    w.limit = max(float(w.min_limit), w.limit / 2)
+                    w.last_decrease = now
+                    METRICS.inc("concurrency_backoff", host=host)
+            elif outcome == OK and self._healthy(w):
+                w.limit = min(float(w.max_limit), w.limit + 1.0 / max(w.limit, 1.0))
+            self._publish(host, w)
+            self._cond.notify_all()
+
+    def _healthy(self, w: _HostWindow) -> bool:
+        errors = sum(1 for o in w.outcomes if o != OK)
+        if errors / len(w.outcomes) >= self.max_error_rate:
+            return False
+        if w.baseline is None or len(w.latencies) < 5:
+            return True
+        return _quantile(w.latencies, 0.95) <= w.baseline * self.latency_slack
+
+    def _publish(self, host: str, w: _HostWindow) -> None:
+        METRICS.set_gauge("host_concurrency_limit", round(w.limit, 2), host=host)
+        METRICS.set_gauge("host_inflight", w.inflight + w.reserved, host=host)
+        p95 = _quantile(w.latencies, 0.95)
+        if p95 is not None:
+            METRICS.set_gauge("host_latency_p95_seconds", round(p95, 4), host=host)
+
+    def summary(self) -> Dict[str, Dict[str, object]]:
+        with self._cond:
+            return {
+                host: {
+                    "limit": round(w.limit, 2),
+                    "bounds": [w.min_limit, w.max_limit],
+                    "p95_s": _quantile(w.latencies, 0.95),
+                    "baseline_p50_s": w.baseline,
+                }
+                for host, w in sorted(self.hosts.items())
+            }
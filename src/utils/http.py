@@ -1,25 +1,92 @@
 from __future__ import annotations
-from typing import Optional, Dict
+from typing import Callable, Optional, Dict
+from urllib.parse import urlsplit
 import time
 import requests
+from requests.structures import CaseInsensitiveDict
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 
+from src.core.metrics import METRICS
+from src.utils.archive import HttpArchive, request_key
+from src.utils.breaker import CircuitBreakers
+from src.utils.concurrency import AdaptiveConcurrency, ERROR, OK, OVERLOAD
+from src.utils.render import render_html
+from src.utils.transport import ACCEPT_ENCODING, decoded_headers, make_transport
+
 DEFAULT_HEADERS: Dict[str, str] = {
     "User-Agent": (
         "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
         "(KHTML, like Gecko) Chrome/124.0 Safari/537.36"
     ),
     "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Encoding": ACCEPT_ENCODING,
 }
 
 
+def host_of(url: str) -> str:
+    return urlsplit(url).hostname or ""
+
+
 class HttpClient:
-    def __init__(self, headers: Optional[Dict[str, str]] = None, timeout: int = 20):
-        self.session = requests.Session()
-        self.session.headers.update(DEFAULT_HEADERS)
+    def __init__(
+        self,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: int = 20,
+        base_overrides: Optional[Dict[str, str]] = None,
+        archive: Optional[HttpArchive] = None,
+        replay_latency: Optional[float] = None,
+        breakers: Optional[CircuitBreakers] = None,
+        limits: Optional[AdaptiveConcurrency] = None,
+        backend: str = "requests",
+        dns_ttl: float = 0.0,
+    ):
+        self.headers: Dict[str, str] = dict(DEFAULT_HEADERS)
         if headers:
-            self.session.headers.update(headers)
+            self.headers.update(headers)
         self.timeout = timeout
+        # подмена базовых URL источников (локальный fixture/mock-сервер)
+        self.base_overrides: Dict[str, str] = dict(base_overrides or {})
+        # record/replay: archive.mode == "record" пишет всё, "replay" отдаёт из архива без сети;
+        # replay_latency: None — без задержки, < 0 — записанная латентность, иначе секунды
+        self.archive = archive
+        self.replay_latency = replay_latency
+        # общий дедлайн/бюджет запросов (src.core.scheduler.Scheduler), проверяется перед каждой попыткой
+        self.scheduler = None
+        # автоматы по хостам: к хосту, который стабильно не отвечает, запросы не уходят вовсе
+        self.breakers = breakers or CircuitBreakers()
+        # AIMD-лимит одновременных запросов на хост; пул соединений — с запасом под верхние границы
+        self.limits = limits or AdaptiveConcurrency()
+        # транспорт: requests (HTTP/1.1) или httpx (HTTP/2, одно мультиплексированное соединение на хост);
+        # dns_ttl > 0 — DNS-кэш внутри httpx-транспорта
+        self.transport = make_transport(backend, self.headers, max(10, self.limits.default_max * 2), dns_ttl)
+
+    def _acquire(self) -> float:
+        if self.scheduler is None:
+            return self.timeout
+        remaining = self.scheduler.acquire()
+        return self.timeout if remaining is None else min(self.timeout, remaining)
+
+    def resolve(self, url: str) -> str:
+        for base, target in self.base_overrides.items():
+            if url.startswith(base):
+                return target + url[len(base):]
+        return url
+
+    def unresolve(self, url: str) -> str:
+        # обратно к исходному URL источника (например, для URL, увиденных браузером при рендере)
+        for base, target in self.base_overrides.items():
+            if url.startswith(target):
+                return base + url[len(target):]
+        return url
+
+    @property
+    def replaying(self) -> bool:
+        return self.archive is not None and self.archive.mode == "replay"
+
+    def get(self, url: str, params: Optional[Dict[str, str]] = None) -> requests.Response:
+        if self.replaying:
+            return self._replay(url, params)
+        return self._get_live(url, params)
 
     @retry(
         reraise=True,
@@ -27,11 +94,131 @@ class HttpClient:
         wait=wait_exponential(multiplier=0.5, min=0.5, max=4),
         retry=retry_if_exception_type((requests.RequestException,)),
     )
-    def get(self, url: str, params: Optional[Dict[str, str]] = None) -> requests.Response:
-        resp = self.session.get(url, params=params, timeout=self.timeout)
+    def _get_live(self, url: str, params: Optional[Dict[str, str]] = None) -> requests.Response:
+        return self._fetch(url, params)
+
+    def probe(self, url: str, timeout: float = 5.0) -> requests.Response:
+        # Одна попытка с коротким таймаутом и без ретраев — для перебора кандидатов листинга
+        if self.replaying:
+            return self._replay(url, None)
+        return self._fetch(url, None, timeout)
+
+    def _fetch(
+        self, url: str, params: Optional[Dict[str, str]] = None, max_timeout: Optional[float] = None,
+    ) -> requests.Response:
+        timeout = self._acquire()
+        if max_timeout is not None:
+            timeout = min(timeout, max_timeout)
+        host = host_of(url)
+        self.breakers.before(host)
+        # Всё после before() должно закончиться success/failure/abandon: иначе флаг пробы half-open
+        # не снимается и хост отклоняется навсегда. Исключения транспорта помимо RequestException
+        # (httpx DecodingError, TooManyRedirects) тоже считаются неудачей хоста.
+        try:
+            self.limits.acquire(host)
+            outcome, latency = ERROR, None
+            t0 = time.perf_counter()
+            try:
+                with METRICS.timer("http_fetch", host=host):
+                    resp = self.transport.get(self.resolve(url), params, timeout)
+                latency = time.perf_counter() - t0
+                if resp.status_code in (429, 503):
+                    outcome = OVERLOAD
+                elif resp.status_code < 500:
+                    outcome = OK
+            except Exception as exc:
+                if isinstance(exc, requests.Timeout):
+                    outcome = OVERLOAD
+                METRICS.inc("http_errors", host=host, error=type(exc).__name__)
+                raise
+            finally:
+                self.limits.release(host, latency, outcome)
+        except Exception:
+            self.breakers.failure(host)
+            raise
+        except BaseException:
+            # прерывание (KeyboardInterrupt/SystemExit) — не ошибка хоста, но пробу надо снять
+            self.breakers.abandon(host)
+            raise
+        if resp.status_code >= 500 or resp.status_code == 429:
+            self.breakers.failure(host)
+        else:
+            self.breakers.success(host)
+        METRICS.inc("http_responses", host=host, status=resp.status_code)
+        METRICS.inc("http_bytes", len(resp.content), host=host)
+        if self.archive is not None:
+            self.archive.record(
+                request_key("GET", url, params),
+                resp.content,
+                url=url,
+                status=resp.status_code,
+                reason=resp.reason,
+                headers=dict(decoded_headers(resp.headers)),
+                encoding=resp.encoding,
+                elapsed=time.perf_counter() - t0,
+            )
         if resp.status_code in (429, 503):
             time.sleep(1.5)
         resp.raise_for_status()
         return resp
 
+    def _replay(self, url: str, params: Optional[Dict[str, str]]) -> requests.Response:
+        self._acquire()
+        host = host_of(url)
+        try:
+            meta, body = self.archive.lookup(request_key("GET", url, params))
+        except LookupError:
+            METRICS.inc("replay", host=host, result="miss")
+            raise
+        METRICS.inc("replay", host=host, result="hit")
+        self._simulate_latency(meta)
+        resp = requests.Response()
+        resp.status_code = meta["status"]
+        resp.reason = meta.get("reason")
+        resp.headers = CaseInsensitiveDict(meta.get("headers") or {})
+        resp.encoding = meta.get("encoding")
+        resp.url = url
+        resp._content = body
+        METRICS.inc("http_responses", host=host, status=resp.status_code)
+        resp.raise_for_status()
+        return resp
+
+    def _simulate_latency(self, meta: Dict) -> None:
+        if self.replay_latency is None:
+            return
+        delay = meta.get("elapsed", 0.0) if self.replay_latency < 0 else self.replay_latency
+        if delay > 0:
+            time.sleep(delay)
+
+    def close(self) -> None:
+        self.transport.close()
 
+    def render(
+        self, url: str, wait_selector: Optional[str] = None, on_json: Optional[Callable[[str, str], None]] = None,
+    ) -> str:
+        # JS-рендер идёт через клиента, чтобы попадать в тот же архив record/replay
+        self._acquire()
+        key = request_key("RENDER", url)
+        if self.replaying:
+            meta, body = self.archive.lookup(key)
+            self._simulate_latency(meta)
+            return body.decode("utf-8")
+        host = host_of(url)
+        self.breakers.before(host)
+        t0 = time.perf_counter()
+        if on_json is not None:
+            # JSON-эндпоинты запоминаются по адресу источника, а не подменённому --base-override
+            capture, on_json = on_json, lambda seen, body: capture(self.unresolve(seen), body)
+        try:
+            html = render_html(self.resolve(url), wait_selector=wait_selector, on_json=on_json)
+        except Exception:
+            self.breakers.failure(host)
+            raise
+        except BaseException:
+            self.breakers.abandon(host)
+            raise
+        self.breakers.success(host)
+        if self.archive is not None:
+            self.archive.record(key, html.encode("utf-8"), url=url, status=200,
+                                elapsed=time.perf_counter() - t0)
+        return html
@@ -1,9 +1,18 @@
 from __future__ import annotations
 from typing import Optional, Tuple, List
 import re
-from bs4 import BeautifulSoup
+from datetime import date, datetime, time, timedelta
+from bs4 import BeautifulSoup, NavigableString, Tag
+from bs4.element import PreformattedString
 from dateutil import parser as dtparser
 
+from src.core.metrics import METRICS
+
+
+def make_soup(html: str) -> BeautifulSoup:
+    with METRICS.timer("soup_build"):
+        return BeautifulSoup(html, "lxml")
+
 
 def clean_text(value: Optional[str]) -> Optional[str]:
     if value is None:
@@ -12,23 +21,152 @@ def clean_text(value: Optional[str]) -> Optional[str]:
     return text or None
 
 
-def parse_datetime(text: Optional[str]) -> Optional[str]:
+# Описание события: сколько символов хранить (--description-chars), остальное отрезается по границе слова
+DESCRIPTION_MAX_CHARS = 2000
+
+_RE_WS = re.compile(r"\s+")
+# Узлы, которые никогда не относятся к описанию
+_SKIP_TAGS = {
+    "script", "style", "noscript", "template", "nav", "footer", "header", "aside", "form",
+    "iframe", "svg", "button", "select", "input", "figure",
+}
+# Блоки навигации, похожих событий, шаринга и т.п. по class/id
+_RE_BOILERPLATE = re.compile(
+    r"related|similar|recommend|more-events|other-events|share|social|breadcrumb|comment|menu|"
+    r"banner|advert|promo|subscribe|cookie|sidebar|widget|footer|\bnav",
+    re.I,
+)
+_BLOCK_TAGS = {"p", "div", "br", "li", "ul", "ol", "h1", "h2", "h3", "h4", "h5", "h6", "tr", "td", "section", "blockquote"}
+
+
+def _boilerplate(tag: Tag) -> bool:
+    if tag.name in _SKIP_TAGS:
+        return True
+    marker = " ".join(tag.get("class") or []) + " " + (tag.get("id") or "")
+    return bool(marker.strip()) and _RE_BOILERPLATE.search(marker) is not None
+
+
+def _clip(text: str, max_chars: int) -> str:
+    if len(text) <= max_chars:
+        return text
+    cut = text.rfind(" ", 0, max_chars)
+    return text[: cut if cut > max_chars // 2 else max_chars].rstrip() + "…"
+
+
+def clip_text(value: Optional[str], max_chars: Optional[int] = None) -> Optional[str]:
+    # clean_text + ограничение длины (описание из JSON-LD и т.п.)
+    text = clean_text(value)
+    return _clip(text, max_chars or DESCRIPTION_MAX_CHARS) if text else text
+
+
+def extract_description(node: Optional[Tag], max_chars: Optional[int] = None) -> Optional[str]:
+    # Текст узла без служебных блоков: обход в порядке документа с пропуском поддеревьев навигации/«похожих»,
+    # пробелы схлопываются по мере сбора, обход останавливается, как только набран бюджет символов
+    if node is None:
+        return None
+    budget = max_chars or DESCRIPTION_MAX_CHARS
+    parts: List[str] = []
+    size = 0
+    space = True  # последний выведенный символ — пробел (или начало текста)
+    stack = [iter(node.children)]
+    while stack and size <= budget:
+        child = next(stack[-1], None)
+        if child is None:
+            stack.pop()
+            continue
+        if isinstance(child, Tag):
+            if _boilerplate(child):
+                continue
+            if child.name in _BLOCK_TAGS and not space:
+                parts.append(" ")
+                size += 1
+                space = True
+            stack.append(iter(child.children))
+        elif isinstance(child, NavigableString) and not isinstance(child, PreformattedString):
+            piece = _RE_WS.sub(" ", child)
+            if space:
+                piece = piece.lstrip()
+            if piece:
+                parts.append(piece)
+                size += len(piece)
+                space = piece.endswith(" ")
+    text = "".join(parts).strip()
+    return _clip(text, budget) if text else None
+
+
+MONTHS_RU = {
+    "янв": 1, "фев": 2, "мар": 3, "апр": 4, "мая": 5, "май": 5, "июн": 6,
+    "июл": 7, "авг": 8, "сен": 9, "окт": 10, "ноя": 11, "дек": 12,
+}
+_RE_RU_DATE = re.compile(
+    r"(\d{1,2})\s+(янв|фев|мар|апр|ма[яй]|июн|июл|авг|сен|окт|ноя|дек)[а-я]*\.?(?:\s+(\d{4}))?(?:\s*г\.?)?",
+    re.I,
+)
+
+
+_RE_WEEKDAY = re.compile(r"\b(пн|вт|ср|чт|пт|сб|вс)\b\.?", re.I)
+# «14.06» без года (но не «14.06.2024» и не часть числа)
+_RE_DAY_MONTH = re.compile(r"(?<![\d.,:])(\d{1,2})\.(\d{1,2})(?![\d.,:])")
+
+
+def guess_year(day: int, month: int, today: date) -> int:
+    # дата без года: «прошедшая» на полгода и больше — скорее следующий год
+    try:
+        if date(today.year, month, day) < today - timedelta(days=180):
+            return today.year + 1
+    except ValueError:
+        pass
+    return today.year
+
+
+def normalize_ru_date(text: Optional[str], today: Optional[date] = None) -> Optional[str]:
+    # "Сб, 14 июня, 19:30" -> "14.06.2024 19:30" — dateutil не знает русских месяцев
+    if not text:
+        return text
+    today = today or date.today()
+
+    def repl(m: re.Match) -> str:
+        day, month = int(m.group(1)), MONTHS_RU[m.group(2).lower()[:3]]
+        year = m.group(3) or guess_year(day, month, today)
+        return f"{day:02d}.{month:02d}.{year}"
+
+    text = _RE_WEEKDAY.sub(" ", _RE_RU_DATE.sub(repl, text)).replace(",", " ")
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def _add_year(m: re.Match, today: date) -> str:
+    day, month = int(m.group(1)), int(m.group(2))
+    if not (1 <= day <= 31 and 1 <= month <= 12):
+        return m.group(0)
+    return f"{day:02d}.{month:02d}.{guess_year(day, month, today)}"
+
+
+def parse_datetime(text: Optional[str], today: Optional[date] = None) -> Optional[str]:
+    # Год у «14.06 19:00» и прочие недостающие части берутся от today, а не от часов машины:
+    # при reparse/--as-of это день скачивания страницы. dateutil сам читает «14.06» как число, поэтому год дописываем.
     if not text:
         return None
+    today = today or date.today()
+    text = _RE_DAY_MONTH.sub(lambda m: _add_year(m, today), text)
     try:
-        dt = dtparser.parse(text, dayfirst=True)
+        dt = dtparser.parse(text, dayfirst=True, default=datetime.combine(today, time()))
         return dt.isoformat()
     except Exception:
         return None
 
 
+# «0 BYN» — бесплатно только как отдельное число: «60 BYN» и «10 руб» — цены
+_RE_FREE = re.compile(r"бесплатно|free|(?<![\d.,])0(?:[.,]0+)?\s*(?:byn|руб)")
+_RE_PRICE_NUM = re.compile(r"\d+[\.,]?\d*")
+
+
 def parse_price_byn(text: Optional[str]) -> Tuple[Optional[float], Optional[float], Optional[bool]]:
     if not text:
         return None, None, None
     t = text.lower()
-    if any(k in t for k in ["бесплатно", "free", "0 byn", "0 руб"]):
+    if _RE_FREE.search(t):
         return 0.0, 0.0, True
-    nums = [float(x.replace(",", ".")) for x in re.findall(r"\d+[\.,]?\d*", t)]
+    nums = [float(x.replace(",", ".")) for x in _RE_PRICE_NUM.findall(t)]
     if not nums:
         return None, None, None
     if len(nums) == 1:
@@ -43,13 +181,9 @@ def parse_age(text: Optional[str]) -> Optional[str]:
     return m.group(1) if m else None
 
 
-def extract_meta(soup: BeautifulSoup) -> Tuple[Optional[str], List[str]]:
-    cover = None
+def image_sources(tags: List[Tag]) -> List[str]:
     images: List[str] = []
-    og_image = soup.select_one('meta[property="og:image"]')
-    if og_image and og_image.get("content"):
-        cover = og_image["content"].strip()
-    for tag in soup.select('img'):
+    for tag in tags:
         src = tag.get('src') or tag.get('data-src')
         if not src:
             continue
@@ -58,6 +192,14 @@ def extract_meta(soup: BeautifulSoup) -> Tuple[Optional[str], List[str]]:
         if any(x in low for x in ["/ajax-loader", "mc.yandex.ru", "counter", "pixel", "1x1"]):
             continue
         images.append(src)
-    return cover, images
+    return images
+
+
+def extract_meta(soup: BeautifulSoup) -> Tuple[Optional[str], List[str]]:
+    cover = None
+    og_image = soup.select_one('meta[property="og:image"]')
+    if og_image and og_image.get("content"):
+        cover = og_image["content"].strip()
+    return cover, image_sources(soup.select('img'))
 
 
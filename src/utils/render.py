@@ -1,9 +1,14 @@
 from __future__ import annotations
-from typing import Optional
+from typing import Any, Callable, Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
+from urllib.parse import urlsplit
+import queue
 
 from playwright.sync_api import sync_playwright
 
+from src.core.metrics import METRICS
+
 
 @contextmanager
 def browser_context():
@@ -24,15 +29,112 @@ def browser_context():
         pw.stop()
 
 
-def render_html(url: str, wait_selector: Optional[str] = None, timeout_ms: int = 10000) -> str:
-    with browser_context() as ctx:
+class BrowserPool:
+    # Долгоживущие браузеры (daemon-режим): у каждого свой поток, потому что sync-API Playwright
+    # привязан к потоку запуска; рендер берёт свободный браузер и открывает в нём новый контекст
+    def __init__(self, size: int = 2):
+        size = max(1, size)
+        self._threads = [ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"browser-{i}") for i in range(size)]
+        self._browsers: Dict[int, Any] = {}
+        self._free: "queue.Queue[int]" = queue.Queue()
+        for i in range(size):
+            self._free.put(i)
+
+    def _browser(self, i: int):
+        entry = self._browsers.get(i)
+        if entry is None or not entry[1].is_connected():
+            pw = sync_playwright().start()
+            self._browsers[i] = entry = (pw, pw.chromium.launch(headless=True))
+            METRICS.inc("browser_launch")
+        return entry[1]
+
+    def _in_context(self, i: int, fn: Callable[[Any], str]) -> str:
+        context = self._browser(i).new_context()
+        try:
+            return fn(context)
+        finally:
+            try:
+                context.close()
+            except Exception:
+                pass
+
+    def run(self, fn: Callable[[Any], str]) -> str:
+        i = self._free.get()
+        try:
+            return self._threads[i].submit(self._in_context, i, fn).result()
+        finally:
+            self._free.put(i)
+
+    def _close_one(self, i: int) -> None:
+        entry = self._browsers.pop(i, None)
+        if entry is None:
+            return
+        pw, browser = entry
+        try:
+            browser.close()
+        except Exception:
+            pass
+        pw.stop()
+
+    def close(self) -> None:
+        for i, thread in enumerate(self._threads):
+            try:
+                thread.submit(self._close_one, i).result()
+            except Exception:
+                pass
+            thread.shutdown()
+
+
+_POOL: Optional[BrowserPool] = None
+
+
+def use_browser_pool(size: int) -> BrowserPool:
+    global _POOL
+    _POOL = BrowserPool(size)
+    return _POOL
+
+
+def close_browser_pool() -> None:
+    global _POOL
+    pool, _POOL = _POOL, None
+    if pool is not None:
+        pool.close()
+
+
+def render_html(
+    url: str,
+    wait_selector: Optional[str] = None,
+    timeout_ms: int = 10000,
+    on_json: Optional[Callable[[str, str], None]] = None,
+) -> str:
+    # on_json(url, body) получает JSON-ответы XHR/fetch, которые страница запросила при рендере
+    def load(ctx) -> str:
         page = ctx.new_page()
+        responses: List[Any] = []
+        if on_json:
+            page.on("response", responses.append)
         page.goto(url, timeout=timeout_ms)
         if wait_selector:
             try:
                 page.wait_for_selector(wait_selector, timeout=timeout_ms)
             except Exception:
                 pass
-        return page.content()
-
+        html = page.content()
+        for resp in responses:
+            try:
+                if resp.request.resource_type not in ("xhr", "fetch"):
+                    continue
+                if "json" not in (resp.headers.get("content-type") or ""):
+                    continue
+                on_json(resp.url, resp.text())
+            except Exception:
+                continue
+        return html
 
+    host = urlsplit(url).hostname or ""
+    METRICS.inc("render_fallback", host=host)
+    with METRICS.timer("render", host=host):
+        if _POOL is not None:
+            return _POOL.run(load)
+        with browser_context() as ctx:
+            return load(ctx)
@@ -0,0 +1,170 @@
+from __future__ import annotations
+from typing import Dict, List, Optional, Sequence, Tuple
+from dataclasses import dataclass
+import re
+
+from bs4 import BeautifulSoup, Tag
+
+# Подмножество CSS, которого хватает адаптерам: tag, .class, #id, [attr], [attr=v], [attr*=v], [attr^=v],
+# :last-child, комбинатор потомка (пробел) и группы через запятую. Остальное — ошибка при компиляции.
+_RE_COMPOUND = re.compile(
+    r"""(?P<tag>[a-zA-Z][\w-]*|\*)?
+        (?P<rest>(?:\.[\w-]+|\#[\w-]+|\[[^\]]+\]|:last-child)*)$""",
+    re.X,
+)
+_RE_PART = re.compile(r"\.([\w-]+)|#([\w-]+)|\[\s*([\w:-]+)\s*(?:([*^]?=)\s*(?:\"([^\"]*)\"|'([^']*)'|([^\]\s]*)))?\s*\]|(:last-child)")
+
+
+@dataclass(frozen=True)
+class Compound:
+    tag: Optional[str]
+    classes: Tuple[str, ...]
+    attrs: Tuple[Tuple[str, str, Optional[str]], ...]  # (имя, оператор, значение)
+    last_child: bool = False
+
+    def matches(self, el: Tag) -> bool:
+        if self.tag is not None and el.name != self.tag:
+            return False
+        if self.classes:
+            have = el.get("class") or ()
+            if not all(c in have for c in self.classes):
+                return False
+        for name, op, value in self.attrs:
+            actual = el.get(name)
+            if actual is None:
+                return False
+            if isinstance(actual, list):
+                actual = " ".join(actual)
+            if op == "=" and actual != value:
+                return False
+            if op == "*=" and value not in actual:
+                return False
+            if op == "^=" and not actual.startswith(value):
+                return False
+        if self.last_child and el.find_next_sibling() is not None:
+            return False
+        return True
+
+
+def _compound(text: str, selector: str) -> Compound:
+    m = _RE_COMPOUND.match(text)
+    if not m or not text:
+        raise ValueError(f"Unsupported selector: {selector!r}")
+    tag = m.group("tag")
+    classes: List[str] = []
+    attrs: List[Tuple[str, str, Optional[str]]] = []
+    last_child = False
+    rest = m.group("rest")
+    pos = 0
+    for part in _RE_PART.finditer(rest):
+        if part.start() != pos:
+            raise ValueError(f"Unsupported selector: {selector!r}")
+        pos = part.end()
+        if part.group(1):
+            classes.append(part.group(1))
+        elif part.group(2):
+            attrs.append(("id", "=", part.group(2)))
+        elif part.group(3):
+            op = part.group(4) or ""
+            value = next((g for g in part.group(5, 6, 7) if g is not None), None)
+            attrs.append((part.group(3), op, value))
+        else:
+            last_child = True
+    if pos != len(rest):
+        raise ValueError(f"Unsupported selector: {selector!r}")
+    return Compound(None if tag in (None, "*") else tag.lower(), tuple(classes), tuple(attrs), last_child)
+
+
+@dataclass(frozen=True)
+class Complex:
+    # A B C: субъект C, у которого среди предков есть B, а выше — A
+    parts: Tuple[Compound, ...]
+
+    @property
+    def subject(self) -> Compound:
+        return self.parts[-1]
+
+    def matches(self, el: Tag) -> bool:
+        if not self.subject.matches(el):
+            return False
+        j = len(self.parts) - 2
+        if j < 0:
+            return True
+        for parent in el.parents:
+            if self.parts[j].matches(parent):
+                j -= 1
+                if j < 0:
+                    return True
+        return False
+
+
+def compile_selector(selector: str) -> Tuple[Complex, ...]:
+    group = []
+    for alt in selector.split(","):
+        compounds = alt.split()
+        if not compounds:
+            raise ValueError(f"Unsupported selector: {selector!r}")
+        group.append(Complex(tuple(_compound(c, selector) for c in compounds)))
+    return tuple(group)
+
+
+class SelectorSet:
+    # Набор селекторов, скомпилированный один раз: документ обходится одним проходом, каждый элемент
+    # проверяется только против селекторов с подходящим тегом/классом субъекта.
+    # Результат — совпадения по каждому селектору в порядке документа (как soup.select).
+    def __init__(self, selectors: Sequence[str], first_only: Sequence[str] = ()):
+        self.selectors: List[str] = list(dict.fromkeys(selectors))
+        self.ids: Dict[str, int] = {sel: i for i, sel in enumerate(self.selectors)}
+        # достаточно первого совпадения (select_one) — остальные не собираются
+        self.first_only = [sel in set(first_only) for sel in self.selectors]
+        self._by_tag: Dict[str, List[Tuple[int, Complex]]] = {}
+        self._by_class: Dict[str, List[Tuple[int, Complex]]] = {}
+        self._any: List[Tuple[int, Complex]] = []
+        for i, sel in enumerate(self.selectors):
+            for cx in compile_selector(sel):
+                subject = cx.subject
+                if subject.tag is not None:
+                    self._by_tag.setdefault(subject.tag, []).append((i, cx))
+                elif subject.classes:
+                    self._by_class.setdefault(subject.classes[0], []).append((i, cx))
+                else:
+                    self._any.append((i, cx))
+
+    def select(self, root: BeautifulSoup) -> "Matches":
+        found: List[List[Tag]] = [[] for _ in self.selectors]
+        by_tag, by_class, any_ = self._by_tag, self._by_class, self._any
+        first_only = self.first_only
+        for el in root.descendants:
+            if not isinstance(el, Tag):
+                continue
+            candidates = by_tag.get(el.name)
+            classes = el.get("class")
+            if classes:
+                for cls in classes:
+                    more = by_class.get(cls)
+                    if more:
+                        candidates = (candidates or []) + more
+            if any_:
+                candidates = (candidates or []) + any_
+            if not candidates:
+                continue
+            for i, cx in candidates:
+                hits = found[i]
+                if hits and (hits[-1] is el or first_only[i]):
+                    continue
+                if cx.matches(el):
+                    hits.append(el)
+        return Matches(self, found)
+
+
+class Matches:
+    def __init__(self, selectors: SelectorSet, found: List[List[Tag]]):
+        self._ids = selectors.ids
+        self._found = found
+
+    def all(self, selector: str) -> List[Tag]:
+        return self._found[self._ids[selector]]
+
+    def first(self, selector: str) -> Optional[Tag]:
+        hits = self._found[self._ids[selector]]
+        return hits[0] if hits else None
@@ -0,0 +1,229 @@
+from __future__ import annotations
+from typing import Dict, Iterator, List, Optional, Tuple
+from contextlib import contextmanager
+import socket
+import ssl
+import threading
+import time
+
+import certifi
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from src.core.metrics import METRICS
+
+try:
+    import httpx
+    import httpcore
+except ImportError:  # httpx[http2] — необязательный бэкенд
+    httpx = httpcore = None
+
+try:
+    import h2  # noqa: F401  (без него httpx не поднимает HTTP/2)
+except ImportError:
+    h2 = None
+
+
+def _brotli_available() -> bool:
+    # urllib3 и httpx декодируют br любым из двух пакетов; без них br не объявляется
+    for name in ("brotli", "brotlicffi"):
+        try:
+            __import__(name)
+            return True
+        except ImportError:
+            continue
+    return False
+
+
+ACCEPT_ENCODING = "gzip, deflate, br" if _brotli_available() else "gzip, deflate"
+
+TRANSPORTS = ("requests", "httpx")
+
+
+# Тело ответа отдаётся уже распакованным, поэтому заголовки сжатого представления к нему не относятся
+# (иначе они попадают в архив record/replay вместе с распакованным телом)
+DECODED_DROP = ("Content-Encoding", "Content-Length")
+
+
+def decoded_headers(headers) -> CaseInsensitiveDict:
+    out = CaseInsensitiveDict(headers)
+    for name in DECODED_DROP:
+        out.pop(name, None)
+    return out
+
+
+if httpx is not None:
+
+    class CachedDNSBackend(httpcore.SyncBackend):
+        # DNS-кэш только для соединений httpx-транспорта: один резолв хоста на ttl секунд,
+        # socket.getaddrinfo процесса (requests, Playwright, геокодер) не трогается.
+        # Соединение открывается по IP, SNI и Host остаются исходными.
+        def __init__(self, ttl: float):
+            self.ttl = ttl
+            self._cache: Dict[Tuple[str, int], Tuple[float, List[str]]] = {}
+            self._lock = threading.Lock()
+
+        def _resolve(self, host: str, port: int) -> List[str]:
+            now = time.monotonic()
+            with self._lock:
+                hit = self._cache.get((host, port))
+            if hit and now - hit[0] < self.ttl:
+                METRICS.inc("dns_cache", result="hit")
+                return hit[1]
+            METRICS.inc("dns_cache", result="miss")
+            infos = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+            addrs = list(dict.fromkeys(info[4][0] for info in infos))
+            with self._lock:
+                self._cache[(host, port)] = (now, addrs)
+            return addrs
+
+        def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+            try:
+                addrs = self._resolve(host, port)
+            except OSError as exc:
+                raise httpcore.ConnectError(str(exc)) from exc
+            error: Optional[Exception] = None
+            for addr in addrs:
+                try:
+                    return super().connect_tcp(addr, port, timeout, local_address, socket_options)
+                except (httpcore.ConnectError, httpcore.ConnectTimeout) as exc:
+                    error = exc
+            with self._lock:
+                self._cache.pop((host, port), None)
+            raise error or httpcore.ConnectError(f"{host}: no addresses")
+
+    @contextmanager
+    def _httpx_errors(request: "httpx.Request") -> Iterator[None]:
+        # исключения httpcore -> httpx, как у штатного HTTPTransport (дальше они приводятся к requests)
+        try:
+            yield
+        except httpcore.TimeoutException as exc:
+            raise httpx.TimeoutException(str(exc), request=request) from exc
+        except httpcore.ConnectError as exc:
+            raise httpx.ConnectError(str(exc), request=request) from exc
+        except (httpcore.NetworkError, httpcore.ProtocolError, httpcore.ProxyError, httpcore.UnsupportedProtocol) as exc:
+            raise httpx.TransportError(str(exc), request=request) from exc
+
+    class _PoolStream(httpx.SyncByteStream):
+        def __init__(self, stream, request: "httpx.Request"):
+            self._stream = stream
+            self._request = request
+
+        def __iter__(self) -> Iterator[bytes]:
+            with _httpx_errors(self._request):
+                for part in self._stream:
+                    yield part
+
+        def close(self) -> None:
+            if hasattr(self._stream, "close"):
+                self._stream.close()
+
+    class PoolTransport(httpx.BaseTransport):
+        # Транспорт httpx поверх собственного httpcore.ConnectionPool: только так можно задать
+        # network_backend (DNS-кэш) через публичный API, не трогая внутренности HTTPTransport
+        def __init__(self, network_backend: httpcore.NetworkBackend, limits: "httpx.Limits"):
+            self.pool = httpcore.ConnectionPool(
+                ssl_context=ssl.create_default_context(cafile=certifi.where()),
+                max_connections=limits.max_connections,
+                max_keepalive_connections=limits.max_keepalive_connections,
+                keepalive_expiry=limits.keepalive_expiry,
+                http1=True,
+                http2=True,
+                network_backend=network_backend,
+            )
+
+        def handle_request(self, request: "httpx.Request") -> "httpx.Response":
+            req = httpcore.Request(
+                method=request.method,
+                url=httpcore.URL(
+                    scheme=request.url.raw_scheme,
+                    host=request.url.raw_host,
+                    port=request.url.port,
+                    target=request.url.raw_path,
+                ),
+                headers=request.headers.raw,
+                content=request.stream,
+                extensions=request.extensions,
+            )
+            with _httpx_errors(request):
+                resp = self.pool.handle_request(req)
+            return httpx.Response(
+                status_code=resp.status,
+                headers=resp.headers,
+                stream=_PoolStream(resp.stream, request),
+                extensions=resp.extensions,
+            )
+
+        def close(self) -> None:
+            self.pool.close()
+
+
+class RequestsTransport:
+    # HTTP/1.1, keep-alive пул urllib3 на хост
+    name = "requests"
+
+    def __init__(self, headers: Dict[str, str], pool_maxsize: int = 10):
+        self.session = requests.Session()
+        self.session.headers.update(headers)
+        adapter = HTTPAdapter(pool_connections=32, pool_maxsize=pool_maxsize)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def get(self, url: str, params: Optional[Dict[str, str]], timeout: float) -> requests.Response:
+        return self.session.get(url, params=params, timeout=timeout)
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class HttpxTransport:
+    # HTTP/2: параллельные запросы к одному хосту мультиплексируются в одном TLS-соединении,
+    # соединения живут весь прогон и переиспользуются всеми источниками
+    name = "httpx"
+
+    def __init__(self, headers: Dict[str, str], pool_maxsize: int = 10, dns_ttl: float = 0.0):
+        if httpx is None or h2 is None:
+            raise RuntimeError("httpx backend needs: pip install 'httpx[http2,brotli]'")
+        limits = httpx.Limits(
+            max_connections=max(100, pool_maxsize * 4),
+            max_keepalive_connections=max(20, pool_maxsize),
+            keepalive_expiry=90.0,
+        )
+        # dns_ttl > 0 — DNS-кэш только для соединений этого транспорта
+        self.dns: Optional[CachedDNSBackend] = CachedDNSBackend(dns_ttl) if dns_ttl > 0 else None
+        if self.dns is not None:
+            transport = PoolTransport(self.dns, limits)
+        else:
+            transport = httpx.HTTPTransport(http2=True, limits=limits)
+        self.client = httpx.Client(headers=headers, follow_redirects=True, transport=transport)
+
+    def get(self, url: str, params: Optional[Dict[str, str]], timeout: float) -> requests.Response:
+        # Ответ приводится к requests.Response: адаптеры, архив и ретраи не знают о бэкенде
+        try:
+            r = self.client.get(url, params=params, timeout=timeout)
+        except httpx.TimeoutException as exc:
+            raise requests.Timeout(str(exc)) from exc
+        except httpx.TransportError as exc:
+            raise requests.ConnectionError(str(exc)) from exc
+        METRICS.inc("http_version", version=r.http_version)
+        resp = requests.Response()
+        resp.status_code = r.status_code
+        resp.reason = r.reason_phrase
+        resp.headers = decoded_headers(r.headers)
+        resp.url = str(r.url)
+        # как в requests: charset из Content-Type, для text/* без него — ISO-8859-1, иначе угадывание в .text
+        resp.encoding = get_encoding_from_headers(resp.headers)
+        resp._content = r.content
+        resp.elapsed = r.elapsed
+        return resp
+
+    def close(self) -> None:
+        self.client.close()
+
+
+def make_transport(kind: str, headers: Dict[str, str], pool_maxsize: int = 10, dns_ttl: float = 0.0):
+    if kind == "httpx":
+        return HttpxTransport(headers, pool_maxsize, dns_ttl)
+    return RequestsTransport(headers, pool_maxsize)
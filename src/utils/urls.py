@@ -0,0 +1,37 @@
+from __future__ import annotations
+from urllib.parse import parse_qsl, quote, unquote, urlencode, urlsplit, urlunsplit
+import re
+
+# Чисто рекламные/трекинговые параметры (плюс все utm_*). Неоднозначные имена (from, ref, sid) сюда
+# не входят: на сайтах это смещение пагинации, раздел или id — их выкидывание склеивает разные страницы.
+TRACKING_PARAMS = {"fbclid", "gclid", "yclid", "ysclid", "msclkid", "_openstat"}
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+_SAFE_PATH = "/:@!$&'()*+,;=-._~"
+
+
+def canonicalize(url: str) -> str:
+    # Ключ для дедупликации ссылок: одна и та же страница под разными querystring/фрагментами/слэшами
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    port = parts.port
+    netloc = host if port in (None, _DEFAULT_PORTS.get(scheme)) else f"{host}:{port}"
+
+    path = quote(unquote(parts.path), safe=_SAFE_PATH)
+    path = re.sub(r"/{2,}", "/", path)
+    if path.endswith("/index.html") or path.endswith("/index.php"):
+        path = path[: path.rfind("/") + 1]
+    if len(path) > 1 and path.endswith("/"):
+        path = path[:-1]
+    path = path or "/"
+
+    params = [
+        (k, v)
+        for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS
+    ]
+    query = urlencode(sorted(params))
+    # https/http одного хоста считаем одной страницей
+    return urlunsplit(("https" if scheme in ("http", "https") else scheme, netloc, path, query, ""))
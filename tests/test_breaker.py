@@ -0,0 +1,46 @@
+from __future__ import annotations
+import pytest
+
+from src.utils.breaker import CircuitBreakers, CircuitOpen
+from src.utils.http import HttpClient
+
+
+class _BrokenTransport:
+    # как httpx.DecodingError: не RequestException, tenacity не ретраит
+    def get(self, url, params, timeout):
+        raise ValueError("broken body")
+
+    def close(self):
+        pass
+
+
+def _client() -> HttpClient:
+    client = HttpClient(breakers=CircuitBreakers(failure_threshold=1, cooldown=0.0))
+    client.transport = _BrokenTransport()
+    return client
+
+
+def test_unexpected_error_counts_as_failure():
+    client = _client()
+    with pytest.raises(ValueError):
+        client.get("http://example.test/a")
+    assert client.breakers.state("example.test") == "open"
+
+
+def test_half_open_probe_is_released_after_unexpected_error():
+    client = _client()
+    for _ in range(3):
+        # cooldown 0: каждый вызов — новая проба half-open, а не CircuitOpen из-за зависшего флага
+        with pytest.raises(ValueError):
+            client.get("http://example.test/a")
+    assert client.breakers.summary()[0]["rejected"] == 0
+
+
+def test_abandon_releases_probe():
+    breakers = CircuitBreakers(failure_threshold=1, cooldown=0.0)
+    breakers.failure("h")
+    breakers.before("h")
+    with pytest.raises(CircuitOpen):
+        breakers.before("h")
+    breakers.abandon("h")
+    breakers.before("h")
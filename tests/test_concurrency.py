@@ -0,0 +1,40 @@
+from __future__ import annotations
+import threading
+
+from src.utils.concurrency import OK, AdaptiveConcurrency
+
+
+def test_reserved_slot_bypasses_a_full_host():
+    limits = AdaptiveConcurrency(default_max=1)
+    limits.acquire("h")  # детальный воркер занял единственный слот
+    done = threading.Event()
+
+    def listing() -> None:
+        with limits.reserve():
+            limits.acquire("h")
+            limits.release("h", 0.01, OK)
+        done.set()
+
+    threading.Thread(target=listing, daemon=True).start()
+    assert done.wait(2.0)
+    limits.release("h", 0.01, OK)
+    assert limits.hosts["h"].inflight == 0 and limits.hosts["h"].reserved == 0
+
+
+def test_reserve_is_a_single_extra_slot():
+    limits = AdaptiveConcurrency(default_max=1)
+    limits.acquire("h")
+    with limits.reserve():
+        limits.acquire("h")
+        blocked = threading.Event()
+
+        def second() -> None:
+            with limits.reserve():
+                limits.acquire("h")
+            blocked.set()
+
+        threading.Thread(target=second, daemon=True).start()
+        assert not blocked.wait(0.2)
+        limits.release("h", 0.01, OK)
+    limits.release("h", 0.01, OK)
+    assert blocked.wait(2.0)
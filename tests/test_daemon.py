@@ -0,0 +1,67 @@
+from __future__ import annotations
+import threading
+import time
+
+from benchmarks.fixture_server import ADAPTERS, load_fixture
+from src.core.daemon import ChangeTracker, RevisitSchedule, run_daemon
+from src.core.geocode import DummyGeocoder
+from src.core.store import EventStore, event_key
+
+
+def _events(source="relax", n=3):
+    module = ADAPTERS[source]
+    return [
+        module._parse_detail(module.BASE + f"event/{i}/", load_fixture(source, "detail", str(i)), DummyGeocoder()).to_event()
+        for i in range(n)
+    ]
+
+
+def _cycle(tmp_path, store, events, tracker):
+    changed, seen = [], []
+
+    def on_changed(evs):
+        changed.extend(evs)
+        store.upsert(evs)
+
+    def on_seen(evs):
+        seen.extend(evs)
+        store.touch(evs)
+
+    # своё расписание на каждый вызов: сохранённое прошлым циклом отложило бы обход на час
+    schedule = RevisitSchedule(tmp_path / f"revisit-{time.monotonic_ns()}.json")
+    run_daemon(
+        ["relax"], lambda due: {"relax": events}, on_changed, lambda: None, schedule, threading.Event(),
+        tracker=tracker, max_cycles=1, on_seen=on_seen,
+    )
+    return changed, seen
+
+
+def test_restart_does_not_rewrite_unchanged_events_and_touches_last_seen(tmp_path):
+    store = EventStore(str(tmp_path / "events.sqlite"))
+    events = _events()
+    changed, _ = _cycle(tmp_path, store, events, ChangeTracker())
+    assert len(changed) == len(events)
+    before = {event_key(e): store.seen(event_key(e))["last_seen"] for e in events}
+
+    # «перезапуск»: новый трекер, прогретый из хранилища
+    time.sleep(0.01)
+    tracker = ChangeTracker()
+    assert tracker.seed(store, time.time()) == len(events)
+    changed, seen = _cycle(tmp_path, store, events, tracker)
+    assert changed == []
+    assert len(seen) == len(events)
+    for e in events:
+        info = store.seen(event_key(e))
+        assert info["last_seen"] > before[event_key(e)]
+        assert info["first_seen"] < info["last_seen"]
+
+
+def test_changed_event_is_written_after_seed(tmp_path):
+    store = EventStore(str(tmp_path / "events.sqlite"))
+    events = _events()
+    store.upsert(events)
+    tracker = ChangeTracker()
+    tracker.seed(store, time.time())
+    events[0] = events[0].model_copy(update={"price_min_byn": 1.0})
+    changed, _ = _cycle(tmp_path, store, events, tracker)
+    assert [e.link for e in changed] == [events[0].link]
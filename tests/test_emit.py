@@ -0,0 +1,25 @@
+from __future__ import annotations
+import copy
+
+from benchmarks.fixture_server import ADAPTERS, load_fixture
+from src.core.geocode import DummyGeocoder
+from src.runner import emit_events
+
+
+def _record():
+    module = ADAPTERS["relax"]
+    return module._parse_detail(module.BASE + "event/1/", load_fixture("relax", "detail"), DummyGeocoder())
+
+
+def test_invalid_duplicate_does_not_shadow_valid_one():
+    valid = _record()
+    invalid = copy.deepcopy(valid)
+    invalid.images = ["/relative/gallery.jpg"]
+    events = emit_events([invalid, valid])
+    assert len(events) == 1
+    assert str(events[0].link) == valid.link
+
+
+def test_duplicates_are_dropped():
+    record = _record()
+    assert len(emit_events([record, copy.deepcopy(record)])) == 1
@@ -0,0 +1,85 @@
+from __future__ import annotations
+import json
+
+import pytest
+import requests
+
+from src.core import endpoints
+from src.core.endpoints import FORGET_AFTER, EndpointStore, harvest_api
+from src.core.geocode import DummyGeocoder
+from src.core.scheduler import BudgetExhausted
+from src.utils.breaker import CircuitOpen
+from src.utils import http
+from src.utils.http import HttpClient
+
+TEMPLATE = "https://bezkassira.by/api/events?page={page}"
+BODY = json.dumps({"events": [{"title": "A", "date": "2024-06-14"}, {"title": "B", "date": "2024-06-15"}]})
+
+
+def _response(status: int, body: str = "") -> requests.Response:
+    resp = requests.Response()
+    resp.status_code = status
+    resp._content = body.encode("utf-8")
+    return resp
+
+
+class _Client:
+    def __init__(self, error: Exception):
+        self.error = error
+
+    def get(self, url):
+        raise self.error
+
+
+def _http_error(status: int) -> requests.HTTPError:
+    return requests.HTTPError(f"{status}", response=_response(status))
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = EndpointStore(tmp_path / "endpoints.json")
+    store.observe("bezkassira", TEMPLATE.format(page=2), BODY)
+    monkeypatch.setattr(endpoints, "ENDPOINTS", store)
+    return store
+
+
+def _harvest(error: Exception) -> None:
+    harvest_api(_Client(error), DummyGeocoder(), "bezkassira", "https://bezkassira.by/", None, 10, [])
+
+
+@pytest.mark.parametrize("error", [
+    requests.Timeout("slow"), _http_error(503), CircuitOpen("bezkassira.by: circuit open"),
+])
+def test_transient_errors_never_forget_the_endpoint(store, error):
+    for _ in range(FORGET_AFTER + 1):
+        _harvest(error)
+    assert [t for t, _ in store.templates("bezkassira")] == [TEMPLATE]
+
+
+def test_budget_exhaustion_propagates_and_keeps_the_endpoint(store):
+    with pytest.raises(BudgetExhausted):
+        _harvest(BudgetExhausted("bezkassira: deadline"))
+    assert store.templates("bezkassira")
+
+
+def test_endpoint_is_forgotten_after_repeated_real_failures(store):
+    for _ in range(FORGET_AFTER - 1):
+        _harvest(_http_error(404))
+    assert store.templates("bezkassira")
+    _harvest(_http_error(404))
+    assert store.templates("bezkassira") == []
+
+
+def test_capture_stores_the_source_url_not_the_override(tmp_path, monkeypatch):
+    store = EndpointStore(tmp_path / "endpoints.json")
+    monkeypatch.setattr(endpoints, "ENDPOINTS", store)
+
+    def fake_render(url, wait_selector=None, on_json=None):
+        # браузер видит подменённый адрес fixture-сервера
+        on_json(url.replace("afisha/", "api/events?page=2"), BODY)
+        return "<html></html>"
+
+    monkeypatch.setattr(http, "render_html", fake_render)
+    client = HttpClient(base_overrides={"https://bezkassira.by/": "http://127.0.0.1:8765/bezkassira/"})
+    client.render("https://bezkassira.by/afisha/", on_json=endpoints.capture("bezkassira"))
+    assert [t for t, _ in store.templates("bezkassira")] == [TEMPLATE]
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import pytest
+from bs4 import BeautifulSoup
+
+from benchmarks.fixture_server import ADAPTERS, load_fixture
+from src.core.geocode import DummyGeocoder
+from src.utils.parse import make_soup, parse_age, parse_price_byn
+from src.utils.selectors import SelectorSet
+
+# Ожидаемые поля детальной страницы корпуса (page_id="1") по источникам
+EXPECTED = {
+    "relax": {
+        "title": "Вечер органной музыки 1",
+        "start_dt": "2024-06-14T19:00:00+03:00",
+        "end_dt": "2024-06-14T21:00:00+03:00",
+        "venue": ("Белгосфилармония", "пр. Независимости, 50"),
+        "city": "Минск",
+        "category": "Концерты",
+        "price": (25.0, 60.0, False),
+        "age": "6+",
+        "cover_url": "https://ms1.relax.by/images/event_1.jpg",
+    },
+    "bezkassira": {
+        "title": "Стендап: большой сольный концерт 1",
+        "start_dt": "2024-02-07T20:00:00+03:00",
+        "end_dt": None,
+        "venue": ("Prime Hall", "пр. Победителей, 65"),
+        "city": "Минск",
+        "category": "Шоу",
+        "price": (45.0, 90.0, False),
+        "age": "18+",
+        "cover_url": "https://bezkassira.by/upload/iblock/1/poster.jpg",
+    },
+    "ticketpro": {
+        "title": "Лебединое озеро 1",
+        "start_dt": "2024-09-21T19:00:00+03:00",
+        "end_dt": None,
+        "venue": ("Большой театр Беларуси", "пл. Парижской Коммуны, 1"),
+        "city": "Минск",
+        "category": "Театр",
+        "price": (30.0, 150.0, False),
+        "age": "6+",
+        "cover_url": "https://www.ticketpro.by/images/events/1.jpg",
+    },
+}
+EXHIBITION = {
+    "title": "Выставка «Шагал и Витебск» 1",
+    "start_dt": "2024-08-15T11:00:00",
+    "end_dt": "2024-09-30T19:00:00",
+    "venue": ("Арт-центр Марка Шагала", "ул. Путна, 2"),
+    "category": "Выставки",
+    "price": (None, None, None),
+    "age": None,
+}
+for source, city in (("belarus.by", None), ("minsktourism", "Минск"), ("virtualbrest", "Брест"), ("vitebsk.biz", "Витебск")):
+    EXPECTED[source] = dict(EXHIBITION, city=city)
+
+LIST_LINKS = {
+    "relax": 24, "bezkassira": 24, "ticketpro": 24, "belarus.by": 26,
+    "minsktourism": 27, "virtualbrest": 27, "vitebsk.biz": 27,
+}
+
+
+def _parse(source: str, html: str):
+    module = ADAPTERS[source]
+    return module._parse_detail(module.BASE + "event/1/", html, DummyGeocoder())
+
+
+@pytest.mark.parametrize("source", sorted(EXPECTED))
+def test_detail_fixture_fields(source):
+    expected = EXPECTED[source]
+    record = _parse(source, load_fixture(source, "detail"))
+    assert record is not None
+    assert record.title == expected["title"]
+    assert record.start_dt == expected["start_dt"]
+    assert record.end_dt == expected["end_dt"]
+    assert (record.venue.name, record.venue.address) == expected["venue"]
+    assert record.city == expected["city"]
+    assert record.category == expected["category"]
+    assert (record.price_min_byn, record.price_max_byn, record.is_free) == expected["price"]
+    assert record.age == expected["age"]
+    if "cover_url" in expected:
+        assert record.cover_url == expected["cover_url"]
+    assert record.description
+    assert record.images
+    # запись проходит валидацию выходной модели
+    assert str(record.to_event().link) == ADAPTERS[source].BASE + "event/1/"
+
+
+@pytest.mark.parametrize("source", sorted(LIST_LINKS))
+def test_list_fixture_links(source):
+    links = ADAPTERS[source]._parse_list(make_soup(load_fixture(source, "list")))
+    assert len(links) == LIST_LINKS[source]
+    assert len(set(links)) == len(links)
+
+
+@pytest.mark.parametrize("source", sorted(EXPECTED))
+def test_detail_without_title_is_skipped(source):
+    soup = BeautifulSoup(load_fixture(source, "detail"), "lxml")
+    for node in soup.select('h1, script[type="application/ld+json"], meta[property="og:title"]'):
+        node.decompose()
+    assert _parse(source, str(soup)) is None
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("от 25 до 60 BYN", (25.0, 60.0, False)),
+    ("60 BYN", (60.0, 60.0, False)),
+    ("150 руб.", (150.0, 150.0, False)),
+    ("15,50 – 45 BYN", (15.5, 45.0, False)),
+    ("0 BYN", (0.0, 0.0, True)),
+    ("вход 0,00 руб", (0.0, 0.0, True)),
+    ("Бесплатно", (0.0, 0.0, True)),
+    ("по записи", (None, None, None)),
+    (None, (None, None, None)),
+])
+def test_parse_price_byn(text, expected):
+    assert parse_price_byn(text) == expected
+
+
+def test_parse_age():
+    assert parse_age("Возраст: 12+") == "12+"
+    assert parse_age("без ограничений") is None
+
+
+@pytest.mark.parametrize("source", sorted(ADAPTERS))
+def test_selector_set_matches_soup_select(source):
+    selectors = [
+        "h1", "time, .date, .event-date", ".venue, .place, .location a, .location",
+        ".category, .breadcrumbs a:last-child, .tags a", 'meta[property="og:image"]', "img",
+        'script[type="application/ld+json"]', ".description, .event-description, article, .content",
+    ]
+    soup = BeautifulSoup(load_fixture(source, "detail"), "lxml")
+    found = SelectorSet(selectors).select(soup)
+    for selector in selectors:
+        assert found.all(selector) == soup.select(selector), selector
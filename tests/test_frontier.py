@@ -0,0 +1,49 @@
+from __future__ import annotations
+from datetime import date
+
+from src.core.frontier import MIN_SAMPLES, Frontier, YieldStats, card_date, url_pattern
+
+TODAY = date(2024, 6, 1)
+
+
+def _frontier(tmp_path, source="relax"):
+    return Frontier(source, stats=YieldStats(tmp_path / "stats.json"), today=TODAY)
+
+
+def test_card_date_ignores_prices():
+    assert card_date("20.05 BYN", TODAY) is None
+    assert card_date("от 12.50 руб.", TODAY) is None
+    assert card_date("15.06 19:00, 20 BYN", TODAY) == date(2024, 6, 15)
+    assert card_date("14.06.2024", TODAY) == date(2024, 6, 14)
+
+
+def test_past_cards_are_kept_at_low_priority(tmp_path):
+    frontier = _frontier(tmp_path)
+    frontier.push("https://afisha.relax.by/event/running-show/", "Выставка с 20.05.2024 по 30.06.2024")
+    frontier.push("https://afisha.relax.by/event/undated/", "Концерт")
+    frontier.push("https://afisha.relax.by/event/soon/", "03.06.2024 19:00")
+    assert list(frontier) == [
+        "https://afisha.relax.by/event/soon/",
+        "https://afisha.relax.by/event/undated/",
+        "https://afisha.relax.by/event/running-show/",
+    ]
+
+
+def test_failed_pattern_is_explored_and_recovers(tmp_path):
+    stats = YieldStats(tmp_path / "stats.json")
+    urls = [f"https://afisha.relax.by/kino/{i}/" for i in range(400)]
+    pattern = url_pattern(urls[0])
+    for _ in range(MIN_SAMPLES * 3):
+        stats.record("relax", pattern, False)
+    frontier = Frontier("relax", stats=stats, today=TODAY)
+    for url in urls:
+        frontier.push(url)
+    # паттерн не выкинут навсегда: небольшая доля ссылок всё равно пробуется
+    assert 0 < len(frontier) < len(urls) // 5
+    # после починки парсера удачные пробы быстро перевешивают старые неудачи
+    for _ in range(5):
+        stats.record("relax", pattern, True)
+    retry = Frontier("relax", stats=stats, today=TODAY)
+    for url in urls:
+        retry.push(url)
+    assert len(retry) == len(urls)
@@ -0,0 +1,56 @@
+from __future__ import annotations
+import argparse
+import json
+
+from src import runner
+from src.core.endpoints import EndpointStore
+from src.core.frontier import YieldStats
+from src.core.render_cache import RenderStats
+
+
+def _stores(tmp_path, monkeypatch):
+    stores = {
+        "frontier": YieldStats(tmp_path / "frontier_stats.json"),
+        "render": RenderStats(tmp_path / "render_stats.json"),
+        "endpoints": EndpointStore(tmp_path / "endpoints.json"),
+    }
+    monkeypatch.setattr(runner, "LEARNED", stores)
+    return stores
+
+
+def _args(**kw):
+    base = {"record": None, "replay": None, "as_of": None}
+    base.update(kw)
+    return argparse.Namespace(**base)
+
+
+def test_replay_uses_recorded_snapshot_and_never_saves(tmp_path, monkeypatch):
+    archive = str(tmp_path / "http.bin")
+    stores = _stores(tmp_path, monkeypatch)
+    stores["frontier"].record("relax", "afisha.relax.by/event/{slug}/", True)
+    runner.pin_learned(_args(record=archive))
+    recorded = json.loads(runner.learned_snapshot_path(archive).read_text(encoding="utf-8"))
+    assert recorded["frontier"] == {"relax afisha.relax.by/event/{slug}/": [1, 1]}
+
+    # между записью и replay боевые прогоны успели переучиться
+    stores = _stores(tmp_path, monkeypatch)
+    stores["frontier"].record("relax", "afisha.relax.by/event/{slug}/", False)
+    stores["frontier"].save()
+    on_disk = (tmp_path / "frontier_stats.json").read_text(encoding="utf-8")
+
+    stores = _stores(tmp_path, monkeypatch)
+    runner.pin_learned(_args(replay=archive))
+    assert stores["frontier"].rate("relax", "afisha.relax.by/event/{slug}/") == (2 / 3, 1)
+    stores["frontier"].record("relax", "afisha.relax.by/event/{slug}/", False)
+    for store in stores.values():
+        store.save()
+    assert (tmp_path / "frontier_stats.json").read_text(encoding="utf-8") == on_disk
+    assert not (tmp_path / "render_stats.json").exists()
+
+
+def test_as_of_reads_but_does_not_persist(tmp_path, monkeypatch):
+    stores = _stores(tmp_path, monkeypatch)
+    runner.pin_learned(_args(as_of="2024-06-01"))
+    stores["render"].record("https://afisha.relax.by/event/1/", rendered=True)
+    stores["render"].save()
+    assert not (tmp_path / "render_stats.json").exists()
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import pytest
+
+from src.core.crawl import load_known_links
+from src.core.output import JsonlWriter, read_jsonl
+
+ROWS = [{"link": f"https://Example.by/event/{i}/?utm_source=x"} for i in range(3)]
+
+
+@pytest.mark.parametrize("compression", ["none", "gzip", "zstd"])
+def test_known_links_from_compressed_output(tmp_path, compression):
+    if compression == "zstd":
+        pytest.importorskip("zstandard")
+    out = str(tmp_path / "events.jsonl")
+    with JsonlWriter(out, compression) as writer:
+        writer.write(ROWS)
+    # печатается и читается реальный файл, а не имя из --out
+    assert writer.files[0].exists()
+    assert list(read_jsonl(str(writer.files[0]))) == ROWS
+    assert load_known_links(out) == {f"https://example.by/event/{i}" for i in range(3)}
+
+
+def test_known_links_from_shards(tmp_path):
+    out = str(tmp_path / "events.jsonl")
+    with JsonlWriter(out, "gzip", shard_bytes=1, batch_size=1) as writer:
+        writer.write(ROWS)
+    assert len(writer.files) == 3 and all(f.name.endswith(".jsonl.gz") for f in writer.files)
+    assert len(load_known_links(out)) == 3
+
+
+def test_missing_known_file(tmp_path):
+    assert load_known_links(str(tmp_path / "nope.jsonl")) == set()
@@ -0,0 +1,65 @@
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
+import cProfile
+import pstats
+import threading
+import time
+
+from src.core.profiling import SourceProfiler
+
+
+def _detail_work() -> None:
+    deadline = time.perf_counter() + 0.1
+    while time.perf_counter() < deadline:
+        sum(range(1000))
+
+
+def _listing_work() -> None:
+    _detail_work()
+
+
+def _run_source() -> None:
+    # как crawl: пул деталей и фоновый поток пагинации с именами по источнику
+    listing = threading.Thread(target=_listing_work, name="listing-demo")
+    listing.start()
+    with ThreadPoolExecutor(max_workers=2, thread_name_prefix="detail-demo") as pool:
+        list(pool.map(lambda _: _detail_work(), range(2)))
+    listing.join()
+
+
+def test_cprofile_covers_worker_threads(tmp_path):
+    with SourceProfiler("cprofile", str(tmp_path)).profile("demo"):
+        _run_source()
+    stats = pstats.Stats(str(tmp_path / "demo.pstats"))
+    names = {func[2]: counts for func, counts in stats.stats.items()}
+    assert names["_detail_work"][1] == 3
+    assert "_listing_work" in names
+    # стеки для flamegraph восстановлены из того же pstats: корень — источник, вес — микросекунды
+    lines = (tmp_path / "demo.collapsed").read_text(encoding="utf-8").splitlines()
+    stacks = {line.rsplit(" ", 1)[0]: int(line.rsplit(" ", 1)[1]) for line in lines}
+    assert all(stack.startswith("demo;") for stack in stacks)
+    detail = sum(us for stack, us in stacks.items() if "_detail_work (test_profiling.py" in stack)
+    listing = sum(us for stack, us in stacks.items() if "_listing_work (test_profiling.py" in stack)
+    assert detail >= 250_000
+    assert listing >= 80_000
+
+
+def test_cprofile_falls_back_to_sampling_when_profiler_busy(tmp_path, monkeypatch, capsys):
+    # Python 3.12+: второй cProfile в процессе (параллельный источник) не включается
+    def busy(self, *args, **kwargs):
+        raise ValueError("Another profiling tool is already active")
+
+    monkeypatch.setattr(cProfile.Profile, "enable", busy)
+    with SourceProfiler("cprofile", str(tmp_path)).profile("demo"):
+        _run_source()
+    assert "sampling instead" in capsys.readouterr().out
+    assert not (tmp_path / "demo.pstats").exists()
+    roots = {line.split(";", 1)[0] for line in (tmp_path / "demo.collapsed").read_text().splitlines()}
+    assert {"demo", "detail-demo", "listing-demo"} <= roots
+
+
+def test_sampler_covers_worker_threads(tmp_path):
+    with SourceProfiler("sample", str(tmp_path)).profile("demo"):
+        _run_source()
+    roots = {line.split(";", 1)[0] for line in (tmp_path / "demo.collapsed").read_text().splitlines()}
+    assert {"demo", "detail-demo", "listing-demo"} <= roots
@@ -0,0 +1,61 @@
+from __future__ import annotations
+import json
+
+import pytest
+
+from benchmarks.fixture_server import load_fixture
+from src.core.metrics import METRICS
+from src.core.pages import PageArchive, reparse
+
+
+def _archive(root, pages):
+    # pages: (url, html, fetched_at) — время скачивания задаётся явно, как у старого архива
+    archive = PageArchive(str(root))
+    for url, html, _ in pages:
+        archive.put(url, "belarus.by", html)
+    lines = archive.index_path.read_text(encoding="utf-8").splitlines()
+    entries = [json.loads(line) for line in lines]
+    for entry, (_, _, fetched_at) in zip(entries, pages):
+        entry["fetched_at"] = fetched_at
+    archive.index_path.write_text("".join(json.dumps(e) + "\n" for e in entries), encoding="utf-8")
+
+
+def test_reparse_resolves_yearless_dates_from_fetch_day(tmp_path):
+    html = load_fixture("belarus.by", "detail").replace("15.08.2024 11:00", "14.06 19:00")
+    html = html.replace("30.09.2024 19:00", "")
+    _archive(tmp_path, [
+        ("https://www.belarus.by/event/2023/", html.replace("{{id}}", "a"), "2023-05-20T10:00:00+00:00"),
+        ("https://www.belarus.by/event/2021/", html.replace("{{id}}", "b"), "2021-05-20T10:00:00+00:00"),
+    ])
+    records = {r.link: r for r in reparse(str(tmp_path), workers=1) if r is not None}
+    assert records["https://www.belarus.by/event/2023/"].start_dt == "2023-06-14T19:00:00"
+    assert records["https://www.belarus.by/event/2021/"].start_dt == "2021-06-14T19:00:00"
+    assert records["https://www.belarus.by/event/2021/"].fetched_at.startswith("2021-05-20")
+
+
+def test_duplicate_after_training_records_the_real_dictionary(tmp_path):
+    pytest.importorskip("zstandard")
+    html = load_fixture("belarus.by", "detail")
+    archive = PageArchive(str(tmp_path))
+    pages = [(f"https://www.belarus.by/event/{i}/", html.replace("{{id}}", str(i)) + f"<!-- {i * 7919} -->")
+             for i in range(64)]
+    for url, page in pages:
+        archive.put(url, "belarus.by", page)
+    assert archive.train_dictionary("belarus.by") == "belarus.by-1.dict"
+    url, page = "https://www.belarus.by/event/new/", html.replace("{{id}}", "new")
+    archive.put(url, "belarus.by", page)  # объект сжат словарём
+    archive.put(url, "belarus.by", page)  # тот же HTML ещё раз: объект уже есть
+    entry = next(e for e in archive.entries() if e["url"] == url)
+    assert entry["dict"] == "belarus.by-1.dict"
+    assert PageArchive(str(tmp_path)).get(entry) == page
+
+
+def test_reparse_reports_unreadable_pages(tmp_path, capsys):
+    html = load_fixture("belarus.by", "detail")
+    _archive(tmp_path, [("https://www.belarus.by/event/1/", html, "2024-05-20T10:00:00+00:00")])
+    for obj in (tmp_path / "objects").rglob("*.*"):
+        obj.unlink()
+    before = METRICS.counter_value("reparse_unreadable", source="belarus.by")
+    assert list(reparse(str(tmp_path), workers=1)) == [None]
+    assert METRICS.counter_value("reparse_unreadable", source="belarus.by") == before + 1
+    assert "cannot read archived page https://www.belarus.by/event/1/" in capsys.readouterr().out
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import pytest
+
+from benchmarks.bench import CORPUS_DATE
+from benchmarks.fixture_server import FixtureServer
+from src import runner
+from src.core import crawl, frontier
+from src.core.geocode import DummyGeocoder
+from src.core.metrics import METRICS
+from src.core.scheduler import BudgetExhausted, Scheduler
+from src.core.visited import VisitedSet
+from src.utils.http import HttpClient
+
+
+def _spend(scheduler: Scheduler, n: int):
+    def job():
+        results = []
+        scheduler.track(results)
+        for i in range(n):
+            scheduler.acquire()
+            results.append(i)
+        return results
+    return job
+
+
+def test_exhausted_source_keeps_partial_results():
+    scheduler = Scheduler(request_budget=3)
+    out = scheduler.run({"a": _spend(scheduler, 10)})
+    assert out["a"] == [0, 1, 2]
+    assert scheduler.summary()[0]["status"] == "exhausted"
+
+
+def test_finished_source_share_goes_to_the_rest():
+    # доля 10/2 = 5 на источник; «a» тратит 2, и «b» достаётся всё оставшееся — 8
+    scheduler = Scheduler(request_budget=10, workers=1)
+    out = scheduler.run({"a": _spend(scheduler, 2), "b": _spend(scheduler, 100)})
+    assert len(out["a"]) == 2
+    assert len(out["b"]) == 8
+    rows = {row["source"]: row for row in scheduler.summary()}
+    assert rows["a"]["status"] == "done"
+    assert rows["b"]["status"] == "exhausted" and rows["b"]["reason"] == "requests"
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_budget_stops_the_crawl_without_detail_errors(monkeypatch, workers):
+    monkeypatch.setattr(crawl.SETTINGS, "visited", VisitedSet())
+    monkeypatch.setattr(crawl.SETTINGS, "detail_workers", workers)
+    frontier.set_reference_date(CORPUS_DATE)
+    for store in runner.LEARNED.values():
+        monkeypatch.setattr(store, "frozen", True)
+    errors = METRICS.counter_value("detail_errors", source="relax")
+    try:
+        with FixtureServer() as server:
+            client = HttpClient(base_overrides=server.base_overrides())
+            scheduler = Scheduler(request_budget=8)
+            records = runner.harvest(["relax"], client, DummyGeocoder(), 50, scheduler=scheduler)
+            client.close()
+    finally:
+        frontier.set_reference_date(None)
+    # часть детальных страниц успела разобраться, остальные не считаются ошибками
+    assert 0 < len(records) < 8
+    assert scheduler.summary()[0]["status"] == "exhausted"
+    assert METRICS.counter_value("detail_errors", source="relax") == errors
+    with pytest.raises(BudgetExhausted):
+        scheduler.acquire()
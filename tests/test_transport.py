@@ -0,0 +1,83 @@
+from __future__ import annotations
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import gzip
+import socket
+import threading
+
+import pytest
+import requests
+
+from src.core.metrics import METRICS
+from src.utils.archive import HttpArchive
+from src.utils import transport
+from src.utils.http import HttpClient
+
+httpx = pytest.importorskip("httpx")
+
+BODY = "<html><body>Концерт</body></html>".encode("cp1251")
+
+
+class _GzipHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        data = gzip.compress(BODY)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=windows-1251")
+        self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def base_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _GzipHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://localhost:{server.server_address[1]}/"
+    server.shutdown()
+    server.server_close()
+
+
+def test_httpx_response_is_decoded_with_matching_headers(base_url, tmp_path):
+    archive = HttpArchive(str(tmp_path / "crawl.warc.gz"), "record")
+    client = HttpClient(backend="httpx", archive=archive)
+    resp = client.get(base_url)
+    client.close()
+    archive.close()
+    assert resp.content == BODY
+    assert resp.text == BODY.decode("cp1251")
+    assert "Content-Encoding" not in resp.headers and "Content-Length" not in resp.headers
+
+    replay = HttpArchive(str(tmp_path / "crawl.warc.gz"), "replay")
+    meta, body = replay.lookup(next(iter(replay.index)))
+    assert body == BODY
+    assert not {"content-encoding", "content-length"} & {k.lower() for k in meta["headers"]}
+
+
+def test_dns_cache_is_scoped_to_the_httpx_transport(base_url):
+    original = socket.getaddrinfo
+    misses = METRICS.counter_value("dns_cache", result="miss")
+    hits = METRICS.counter_value("dns_cache", result="hit")
+    client = HttpClient(backend="httpx", dns_ttl=300)
+    first, second = client.get(base_url), client.get(base_url + "again")
+    client.close()
+    assert first.content == second.content == BODY
+    assert socket.getaddrinfo is original
+    # сервер HTTP/1.0 закрывает соединение: второй запрос открывает новое, но хост не резолвит
+    assert METRICS.counter_value("dns_cache", result="miss") == misses + 1
+    assert METRICS.counter_value("dns_cache", result="hit") == hits + 1
+
+
+def test_dns_cache_connection_errors_map_to_requests():
+    client = HttpClient(backend="httpx", dns_ttl=300)
+    with pytest.raises(requests.ConnectionError):
+        client.transport.get("http://localhost:1/", None, 2.0)
+    client.close()
+
+
+def test_missing_http2_extra_is_a_clear_error(monkeypatch):
+    monkeypatch.setattr(transport, "h2", None)
+    with pytest.raises(RuntimeError, match="httpx\\[http2"):
+        HttpClient(backend="httpx")
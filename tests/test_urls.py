@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+import pytest
+
+from src.utils.urls import canonicalize
+
+
+@pytest.mark.parametrize("query", ["from=20", "ref=concerts", "sid=7", "page=2", "offset=40"])
+def test_pagination_and_content_params_survive(query):
+    assert canonicalize(f"https://x.by/afisha/?{query}") == f"https://x.by/afisha?{query}"
+
+
+def test_offset_pages_stay_distinct():
+    assert canonicalize("https://x.by/afisha/?from=20") != canonicalize("https://x.by/afisha/?from=40")
+
+
+def test_tracking_params_are_dropped():
+    url = "https://www.x.by/event/1/?utm_source=vk&utm_campaign=a&fbclid=1&gclid=2&yclid=3&ysclid=4&_openstat=5&id=9"
+    assert canonicalize(url) == "https://x.by/event/1?id=9"